@@ -45,6 +45,18 @@ async def custom_key_builder(
 
     return cache_key
 
+def get_redis():
+    """
+    Returns the Redis client shared with FastAPICache,
+    or None if the cache has not been initialised yet.
+    """
+    try:
+        backend = FastAPICache.get_backend()
+    except AssertionError:
+        return None
+    return getattr(backend, "redis", None)
+
+
 async def clear_cache(func, *args, **kwargs):
     """
     Clears the cache for a specific function.
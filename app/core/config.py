@@ -1,3 +1,5 @@
+from typing import Optional
+
 from dotenv import load_dotenv
 from pydantic import BaseModel, PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -51,6 +53,30 @@ class FileUrl(BaseModel):
 class HemisConfig(BaseModel):
     login_url: str
     me_url: str
+    # One pooled client per worker, see modules/hemis/client.py
+    http2: bool = True  # used only when the h2 package is installed
+    max_connections: int = 50
+    max_keepalive_connections: int = 20
+    keepalive_expiry_seconds: float = 30
+    connect_timeout_seconds: float = 3
+    read_timeout_seconds: float = 8
+    pool_timeout_seconds: float = 3
+    retries: int = 2  # on connection errors, timeouts and 5xx
+    retry_backoff_seconds: float = 0.2
+    # Consecutive failures that open the circuit, and how long it stays open
+    breaker_threshold: int = 5
+    breaker_reset_seconds: float = 30
+    # Cross-worker lock around one username's HEMIS login. Must outlast a
+    # slow exchange including retries; waiters give up after the wait
+    login_lock_seconds: float = 60
+    login_lock_wait_seconds: float = 30
+    # Paginated student list for the bulk roster sync, items shaped like `me`
+    roster_url: Optional[str] = None
+    roster_token: Optional[str] = None
+    roster_page_size: int = 200
+    roster_concurrency: int = 8  # pages fetched at once
+    roster_batch_size: int = 1000  # students per upsert, ~25 bind params each
+    roster_status_ttl_seconds: int = 86400  # last POST /hemis/roster/sync outcome
 
 
 class RedisConfig(BaseModel):
@@ -64,6 +90,71 @@ class RedisConfig(BaseModel):
         return f"redis://{self.host}:{self.port}/0"
 
 
+class QuizProcessConfig(BaseModel):
+    paper_cache_ttl_seconds: int = 3600
+    paper_cache_size: int = 256
+    # Pre-rendered variants per quiz paper. With N > 0 every attempt gets
+    # one of only N papers (seed % N), so students can share questions and
+    # order; 0 renders a distinct paper for every attempt on demand
+    paper_variants: int = 0
+    attempt_grace_seconds: int = 60
+    # How long a finalized attempt is remembered, so that a late end_quiz
+    # is refused instead of graded again; must exceed attempt_grace_seconds.
+    # An open attempt is kept as long past its grace period for the sweeper
+    attempt_tombstone_seconds: int = 3600
+    # Opt-in: end_quiz enqueues submissions and background workers grade them
+    async_grading: bool = False
+    grading_workers: int = 2
+    grading_batch_size: int = 100
+    grading_result_ttl_seconds: int = 3600
+    # Opt-in: merge concurrent end_quiz writes into one transaction
+    group_commit: bool = False
+    group_commit_window_ms: int = 5
+    group_commit_max_batch: int = 200
+    # Finalizes attempts nobody submitted once their deadline has passed
+    sweeper: bool = True
+    sweeper_interval_seconds: float = 5
+    sweeper_delay_seconds: int = 15
+    sweeper_batch_size: int = 50
+    # start_quiz admission control, per worker process
+    admission_concurrency: int = 10  # paper builds in flight per quiz
+    admission_queue_size: int = 500  # waiting students per quiz
+    admission_max_wait_seconds: float = 15
+    admission_rate: float = 50  # starts per second
+    admission_burst: int = 20
+
+
+class AuthConfig(BaseModel):
+    # Effective permissions per user, in-process LRU backed by Redis
+    permission_cache_ttl_seconds: int = 60
+    permission_cache_size: int = 10000
+    # Access tokens whose signature was already verified
+    token_cache_size: int = 4096
+    # bcrypt runs on its own thread pool of this size
+    bcrypt_workers: int = 4
+    bcrypt_rounds: int = 12
+
+
+class StatisticsConfig(BaseModel):
+    # /statistics/general is served from a snapshot refreshed this often
+    # by one worker at a time
+    general_snapshot: bool = True
+    general_snapshot_seconds: float = 30
+    # /statistics/question: item analyses cached per quiz and subject,
+    # recomputed this often when new results came in
+    item_analysis: bool = True
+    item_analysis_seconds: float = 60
+    item_analysis_ttl_seconds: int = 7 * 24 * 3600
+    item_analysis_batch_size: int = 20
+    # Results per Redis pipeline when rebuilding the leaderboards
+    leaderboard_rebuild_batch_size: int = 5000
+    # Hourly trend rows are recomputed from results this often, covering
+    # the last trends_lookback_seconds
+    trends: bool = True
+    trends_refresh_seconds: float = 60
+    trends_lookback_seconds: float = 2 * 3600
+
+
 class AppConfig(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -80,6 +171,9 @@ class AppConfig(BaseSettings):
     hemis: HemisConfig
     file_url: FileUrl
     redis: RedisConfig
+    quiz_process: QuizProcessConfig = QuizProcessConfig()
+    auth: AuthConfig = AuthConfig()
+    statistics: StatisticsConfig = StatisticsConfig()
 
 
 settings = AppConfig()
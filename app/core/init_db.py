@@ -7,6 +7,7 @@ from sqlalchemy import select, text
 from app.models.role.model import Role
 from app.models.permission.model import Permission
 from app.models.role_permission.model import RolePermission
+from dependence.permission_claims import permission_registry
 from dependence.role_checker import PermissionRequired
 import inspect
 
@@ -96,6 +97,11 @@ async def init_db(app: FastAPI, session: AsyncSession):
         else:
             logger.info("All discovered permissions already exist.")
 
+        # Bit positions of the permission claims in access tokens
+        permission_registry.load(
+            {name: perm.id for name, perm in existing_perms.items() if name in discovered_permissions}
+        )
+
         # 3. Create Roles
         ROLES = ["Admin", "Teacher", "Student", "User"]
         existing_roles_stmt = select(Role)
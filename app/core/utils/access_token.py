@@ -0,0 +1,69 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+import jwt
+from starlette.requests import Request
+
+from core.config import settings
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of access tokens whose signature was already checked,
+    keyed by the token's hash. An entry is only served until the token's
+    own exp, so expiry is enforced exactly as jwt.decode would.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._tokens: OrderedDict[bytes, dict] = OrderedDict()
+
+    def decode(self, token: str) -> dict:
+        """Verified claims of token; raises jwt.PyJWTError like jwt.decode."""
+        key = hashlib.sha256(token.encode()).digest()
+
+        claims = self._tokens.get(key)
+        if claims is not None:
+            if claims["exp"] > time.time():
+                self._tokens.move_to_end(key)
+                return claims
+            del self._tokens[key]
+
+        claims = jwt.decode(
+            token, settings.jwt.access_token_secret, algorithms=[settings.jwt.algorithm]
+        )
+        if "exp" in claims:
+            self._tokens[key] = claims
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+        return claims
+
+
+def strip_bearer(token: str) -> str:
+    if token.startswith("Bearer "):
+        return token.replace("Bearer ", "")
+    return token
+
+
+def request_access_claims(request: Request) -> dict:
+    """
+    Verified claims of the request's Authorization token, decoded at most
+    once per request and shared through request.state. Raises
+    jwt.PyJWTError for an invalid token.
+    """
+    claims = getattr(request.state, "access_claims", None)
+    if claims is None:
+        token = strip_bearer(request.headers.get("Authorization", ""))
+        try:
+            claims = verified_tokens.decode(token)
+        except jwt.PyJWTError as e:
+            claims = e
+        request.state.access_claims = claims
+
+    if isinstance(claims, jwt.PyJWTError):
+        raise claims
+    return claims
+
+
+verified_tokens = VerifiedTokenCache(max_size=settings.auth.token_cache_size)
@@ -1,11 +1,95 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
+from pydantic import BaseModel
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherMetrics(BaseModel):
+    workers: int
+    rounds: int
+    completed: int
+    pending: int
+    average_queue_seconds: float
+    max_queue_seconds: float
+
+
+class PasswordHasher:
+    """
+    bcrypt off the event loop.
+
+    Hashes and verifications run on a dedicated thread pool (the bcrypt C
+    extension releases the GIL), so at most `workers` of them run at once
+    and the rest queue without blocking other requests. Queue time is
+    tracked per call for the metrics endpoint.
+    """
+
+    def __init__(self, workers: int, rounds: int):
+        self.workers = workers
+        self.rounds = rounds
+        self._context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+
+        self.completed = 0
+        self.pending = 0
+        self._total_queue = 0.0
+        self._max_queue = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self._context.verify, password, hashed_password)
+
+    async def _run(self, func, *args):
+        submitted = time.monotonic()
+
+        def timed():
+            return time.monotonic(), func(*args)
+
+        self.pending += 1
+        try:
+            started, result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, timed
+            )
+        finally:
+            self.pending -= 1
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        queued = started - submitted
+        self.completed += 1
+        self._total_queue += queued
+        self._max_queue = max(self._max_queue, queued)
+        if queued > 1:
+            logger.warning(f"Password hashing queued for {queued:.2f}s")
+        return result
 
+    def metrics(self) -> PasswordHasherMetrics:
+        return PasswordHasherMetrics(
+            workers=self.workers,
+            rounds=self.rounds,
+            completed=self.completed,
+            pending=self.pending,
+            average_queue_seconds=(
+                self._total_queue / self.completed if self.completed else 0.0
+            ),
+            max_queue_seconds=self._max_queue,
+        )
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+password_hasher = PasswordHasher(
+    workers=settings.auth.bcrypt_workers,
+    rounds=settings.auth.bcrypt_rounds,
+)
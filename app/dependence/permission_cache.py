@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.cache import get_redis
+from app.models.permission.model import Permission
+from app.models.role.model import Role
+from app.models.role_permission.model import RolePermission
+from app.models.user.model import User
+from app.models.user_role.model import UserRole
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UserPermissions(BaseModel):
+    user_id: int
+    is_admin: bool
+    permissions: frozenset[str]
+    # Global generation and per-user epoch the entry was built under,
+    # see PermissionCache. Access tokens carry the same pair.
+    generation: str
+    epoch: int = 0
+
+    model_config = ConfigDict(frozen=True)
+
+    def allows(self, permission_name: str) -> bool:
+        return self.is_admin or permission_name in self.permissions
+
+
+class PermissionCache:
+    """
+    Effective permission set per user: in-process LRU in front of Redis
+    in front of the DB.
+
+    Changes are broadcast over Redis pub/sub so every worker drops its
+    local copies. A change to one user's roles deletes that user's entry
+    and bumps the user's epoch; a change to roles or permissions themselves
+    replaces the global generation token, which makes every Redis entry
+    stale at once. Permission claims in access tokens are checked against
+    the same (generation, epoch) pair.
+    The admin panel views invalidate the same way as the repositories.
+    The TTL bounds staleness if a pub/sub message is missed.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._local: OrderedDict[int, tuple[float, UserPermissions]] = OrderedDict()
+        self._listener: asyncio.Task | None = None
+
+    @property
+    def channel(self) -> str:
+        return f"{settings.redis.prefix}:user_permissions:invalidate"
+
+    @property
+    def _generation_key(self) -> str:
+        return f"{settings.redis.prefix}:user_permissions:generation"
+
+    def _key(self, user_id: int) -> str:
+        return f"{settings.redis.prefix}:user_permissions:{user_id}"
+
+    def _epoch_key(self, user_id: int) -> str:
+        return f"{settings.redis.prefix}:user_permissions:{user_id}:epoch"
+
+    async def get(
+        self, session: AsyncSession, user_id: int
+    ) -> Optional[UserPermissions]:
+        """Permissions of user_id, None if the user does not exist."""
+        cached = self._local.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            self._local.move_to_end(user_id)
+            return cached[1]
+
+        redis = get_redis()
+        if redis is None:
+            return await self.load(session, user_id, generation="")
+
+        try:
+            generation, epoch, raw = await self._versions(redis, user_id)
+
+            entry = UserPermissions.model_validate_json(raw) if raw else None
+            if entry is None or (entry.generation, entry.epoch) != (generation, epoch):
+                entry = await self.load(session, user_id, generation, epoch)
+                if entry is None:
+                    return None
+                await redis.set(
+                    self._key(user_id), entry.model_dump_json(), ex=self.ttl_seconds
+                )
+        except RedisError as e:
+            logger.warning(f"Permission cache unavailable, reading from DB: {e}")
+            return await self.load(session, user_id, generation="")
+
+        self._remember(entry)
+        return entry
+
+    async def is_current(self, user_id: int, generation: str, epoch: int) -> bool:
+        """Whether permissions issued under (generation, epoch) are still valid."""
+        if not generation:
+            # Issued while Redis was unavailable
+            return False
+
+        cached = self._local.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return (cached[1].generation, cached[1].epoch) == (generation, epoch)
+
+        redis = get_redis()
+        if redis is None:
+            # Nothing to compare against, make the caller look permissions up
+            return False
+
+        try:
+            current = await self._versions(redis, user_id)
+        except RedisError as e:
+            logger.warning(f"Failed to read permission epoch: {e}")
+            return False
+        return current[:2] == (generation, epoch)
+
+    async def _versions(self, redis, user_id: int) -> tuple[str, int, Optional[str]]:
+        generation, epoch, raw = await redis.mget(
+            self._generation_key, self._epoch_key(user_id), self._key(user_id)
+        )
+        if generation is None:
+            # nx: concurrent first readers must agree on a single token
+            await redis.set(self._generation_key, uuid.uuid4().hex, nx=True)
+            generation = await redis.get(self._generation_key)
+        return generation, int(epoch or 0), raw
+
+    async def load(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        generation: str,
+        epoch: int = 0,
+    ) -> Optional[UserPermissions]:
+        user_stmt = (
+            select(User).where(User.id == user_id).options(selectinload(User.roles))
+        )
+        user = (await session.execute(user_stmt)).scalar_one_or_none()
+        if not user:
+            return None
+
+        perm_stmt = (
+            select(Permission.name)
+            .join(RolePermission)
+            .join(Role)
+            .join(UserRole)
+            .where(UserRole.user_id == user_id)
+            .distinct()
+        )
+        permissions = (await session.execute(perm_stmt)).scalars().all()
+
+        return UserPermissions(
+            user_id=user_id,
+            is_admin=any(role.name == "Admin" for role in user.roles),
+            permissions=frozenset(permissions),
+            generation=generation,
+            epoch=epoch,
+        )
+
+    async def invalidate_user(self, user_id: int) -> None:
+        self._local.pop(user_id, None)
+
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            # The new epoch also makes the user's access tokens stale
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(user_id))
+                pipe.incr(self._epoch_key(user_id))
+                await pipe.execute()
+            await redis.publish(self.channel, str(user_id))
+        except RedisError as e:
+            logger.warning(f"Failed to invalidate permissions of user {user_id}: {e}")
+
+    async def invalidate_all(self) -> None:
+        self._local.clear()
+
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.set(self._generation_key, uuid.uuid4().hex)
+            await redis.publish(self.channel, "*")
+        except RedisError as e:
+            logger.warning(f"Failed to invalidate permissions: {e}")
+
+    def clear(self) -> None:
+        self._local.clear()
+
+    async def start(self) -> None:
+        redis = get_redis()
+        if redis is None:
+            logger.warning("Redis is not initialised, permission cache stays local")
+            return
+        self._listener = asyncio.create_task(self._listen(redis))
+
+    async def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        await asyncio.gather(self._listener, return_exceptions=True)
+        self._listener = None
+
+    async def _listen(self, redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # Anything published while we were not listening is lost
+                    self._local.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        if message["data"] == "*":
+                            self._local.clear()
+                        else:
+                            self._local.pop(int(message["data"]), None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Permission invalidation listener failed: {e}")
+                await asyncio.sleep(1)
+
+    def _remember(self, entry: UserPermissions) -> None:
+        self._local[entry.user_id] = (time.monotonic() + self.ttl_seconds, entry)
+        self._local.move_to_end(entry.user_id)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+
+permission_cache = PermissionCache(
+    max_size=settings.auth.permission_cache_size,
+    ttl_seconds=settings.auth.permission_cache_ttl_seconds,
+)
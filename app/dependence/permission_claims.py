@@ -0,0 +1,71 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dependence.permission_cache import permission_cache
+
+
+class PermissionRegistry:
+    """
+    Permission name -> bit position in the access token bitmask.
+
+    The bit is the permission's primary key, so it is the same in every
+    worker and across restarts. init_db fills the registry with the
+    permissions it discovers on the routes.
+    """
+
+    def __init__(self):
+        self._bits: dict[str, int] = {}
+
+    def load(self, bits: dict[str, int]) -> None:
+        self._bits = dict(bits)
+
+    def bit(self, permission_name: str) -> Optional[int]:
+        return self._bits.get(permission_name)
+
+    def mask(self, permission_names) -> int:
+        mask = 0
+        for name in permission_names:
+            bit = self._bits.get(name)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+
+async def build_permission_claims(session: AsyncSession, user_id: int) -> dict:
+    """Claims that let PermissionRequired authorize from the token alone."""
+    permissions = await permission_cache.get(session, user_id)
+    if permissions is None:
+        return {}
+
+    return {
+        "pm": format(permission_registry.mask(permissions.permissions), "x"),
+        "adm": permissions.is_admin,
+        "pg": permissions.generation,
+        "pe": permissions.epoch,
+    }
+
+
+async def authorize_from_claims(claims: dict, permission_name: str) -> Optional[bool]:
+    """
+    Decision taken from the token's permission claims, or None when the
+    token cannot tell (no claims, permission unknown to the registry,
+    or roles changed since the token was issued).
+    """
+    if "pm" not in claims:
+        return None
+
+    is_admin = bool(claims.get("adm"))
+    bit = permission_registry.bit(permission_name)
+    if bit is None and not is_admin:
+        return None
+
+    if not await permission_cache.is_current(
+        claims["user_id"], claims.get("pg", ""), claims.get("pe", 0)
+    ):
+        return None
+
+    return is_admin or bool(int(claims["pm"], 16) >> bit & 1)
+
+
+permission_registry = PermissionRegistry()
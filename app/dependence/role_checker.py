@@ -1,44 +1,41 @@
-import jwt
-from core.config import settings
 from core.db_helper import db_helper
-from fastapi import Depends, HTTPException, status
+from core.utils.access_token import request_access_claims
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import APIKeyHeader
 from jwt import PyJWTError
-from app.models.permission.model import Permission
-from app.models.role.model import Role
-from app.models.role_permission.model import RolePermission
 from app.models.user.model import User
-from app.models.user_role.model import UserRole
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+
+from dependence.permission_cache import permission_cache
+from dependence.permission_claims import authorize_from_claims
 
 # Используем заголовок Authorization
 api_key_header = APIKeyHeader(name="Authorization")
 
 
-async def get_current_user_id(token: str = Depends(api_key_header)):
-    # Если токен приходит как "Bearer <token>", нужно убрать префикс
-    if token.startswith("Bearer "):
-        token = token.replace("Bearer ", "")
-
+async def get_access_claims(
+    request: Request, token: str = Depends(api_key_header)
+) -> dict:
+    # Usually already decoded by LoggingMiddleware for this request
     try:
-        payload = jwt.decode(
-            token, settings.jwt.access_token_secret, algorithms=[settings.jwt.algorithm]
-        )
-        user_id: int = payload.get("user_id")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token: user_id missing",
-            )
-        return user_id
+        payload = request_access_claims(request)
     except PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
 
+    if payload.get("user_id") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token: user_id missing",
+        )
+    return payload
+
+
+async def get_current_user_id(claims: dict = Depends(get_access_claims)):
+    return claims["user_id"]
+
 
 class PermissionRequired:
     def __init__(self, permission_name: str):
@@ -46,54 +43,29 @@ class PermissionRequired:
 
     async def __call__(
         self,
-        user_id: int = Depends(get_current_user_id),
+        claims: dict = Depends(get_access_claims),
         session: AsyncSession = Depends(db_helper.session_getter),
     ) -> User:
-        # Загружаем пользователя с ролями один раз
-        user_stmt = (
-            select(User).where(User.id == user_id).options(selectinload(User.roles))
-        )
-        result = await session.execute(user_stmt)
-        user = result.scalar_one_or_none()
-
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-            )
-
-        # Проверяем, является ли пользователь админом
-        is_admin = any(role.name == "Admin" for role in user.roles)
+        user_id = claims["user_id"]
 
-        if is_admin:
-            return user  # Админ имеет доступ ко всему
+        # Tokens issued since the last role change carry the answer
+        allowed = await authorize_from_claims(claims, self.permission_name)
 
-        # Для не-админов проверяем конкретное разрешение
-        # Permissions are created at startup by init_db, no need to create here
-        perm_stmt = select(Permission).where(Permission.name == self.permission_name)
-        perm_result = await session.execute(perm_stmt)
-        perm_obj = perm_result.scalar_one_or_none()
+        if allowed is None:
+            # Effective permissions come from the cache, a DB read only on a miss
+            permissions = await permission_cache.get(session, user_id)
 
-        if not perm_obj:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Permission '{self.permission_name}' not found. Restart the app to sync permissions.",
-            )
-
-        # 2. Проверяем наличие права у пользователя
-        perm_check_stmt = (
-            select(Permission.id)
-            .join(RolePermission)
-            .join(Role)
-            .join(UserRole)
-            .where(UserRole.user_id == user_id, Permission.name == self.permission_name)
-        )
-        perm_check_result = await session.execute(perm_check_stmt)
-        has_permission = perm_check_result.scalar_one_or_none()
+            if permissions is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+                )
+            allowed = permissions.allows(self.permission_name)
 
-        if not has_permission:
+        if not allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied: user lacks '{self.permission_name}' permission",
             )
 
-        return user
+        # Routes only use the id, so no need to load the row itself
+        return User(id=user_id)
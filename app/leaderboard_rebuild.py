@@ -0,0 +1,46 @@
+"""
+Rebuild the quiz, group and subject leaderboards from the results table:
+
+    python app/leaderboard_rebuild.py [--batch-size N]
+
+Needed after Redis lost its data or results were deleted; new results
+are added to the leaderboards as they are saved.
+"""
+import argparse
+import asyncio
+import json
+
+from redis import asyncio as aioredis
+
+import app.core.logging  # noqa: F401  Trigger logging/logfire configuration
+from app.core.config import settings
+from app.core.db_helper import db_helper
+from app.modules.statistics.leaderboard import leaderboard
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.batch_size:
+        leaderboard.rebuild_batch_size = args.batch_size
+
+    redis = aioredis.from_url(
+        settings.redis.url, encoding="utf8", decode_responses=True
+    )
+    try:
+        async with db_helper.session_factory() as session:
+            counts = await leaderboard.rebuild(session, redis)
+        print(json.dumps(counts, indent=2))
+    finally:
+        await redis.aclose()
+        await db_helper.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the leaderboards from results"
+    )
+    parser.add_argument("--batch-size", type=int)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
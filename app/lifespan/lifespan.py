@@ -33,6 +33,34 @@ async def lifespan(app: FastAPI):
         await FastAPILimiter.init(redis)
         logger.info("Initialized FastAPICache and FastAPILimiter")
 
+        # init_db may have changed role permissions
+        from dependence.permission_cache import permission_cache
+        await permission_cache.invalidate_all()
+        await permission_cache.start()
+
+        from app.modules.hemis.client import hemis_client
+        await hemis_client.start()
+
+        if settings.quiz_process.async_grading:
+            from app.modules.quiz_process.grading import grading_workers
+            await grading_workers.start()
+
+        if settings.quiz_process.sweeper:
+            from app.modules.quiz_process.sweeper import attempt_sweeper
+            await attempt_sweeper.start()
+
+        if settings.statistics.general_snapshot:
+            from app.modules.statistics.snapshot import general_stats_snapshot
+            await general_stats_snapshot.start()
+
+        if settings.statistics.item_analysis:
+            from app.modules.statistics.item_analysis import item_analysis
+            await item_analysis.start()
+
+        if settings.statistics.trends:
+            from app.modules.statistics.trends import trend_refresher
+            await trend_refresher.start()
+
     except Exception as e:
         logger.error(f"Failed to connect to Redis: {e}")
         # We might want to re-raise if Redis is critical, 
@@ -43,5 +71,34 @@ async def lifespan(app: FastAPI):
     yield
 
     # Shutdown
+    from dependence.permission_cache import permission_cache
+    await permission_cache.stop()
+
+    if settings.quiz_process.sweeper:
+        from app.modules.quiz_process.sweeper import attempt_sweeper
+        await attempt_sweeper.stop()
+
+    if settings.quiz_process.async_grading:
+        from app.modules.quiz_process.grading import grading_workers
+        await grading_workers.stop()
+
+    if settings.statistics.general_snapshot:
+        from app.modules.statistics.snapshot import general_stats_snapshot
+        await general_stats_snapshot.stop()
+
+    if settings.statistics.item_analysis:
+        from app.modules.statistics.item_analysis import item_analysis
+        await item_analysis.stop()
+
+    if settings.statistics.trends:
+        from app.modules.statistics.trends import trend_refresher
+        await trend_refresher.stop()
+
+    from app.modules.hemis.client import hemis_client
+    await hemis_client.stop()
+
+    from core.utils.password_hash import password_hasher
+    password_hasher.shutdown()
+
     await redis.close()
     logger.info("Closed Redis connection")
@@ -6,7 +6,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
-from core.config import settings
+from core.utils.access_token import request_access_claims
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +19,10 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         auth_header = request.headers.get("Authorization")
         if auth_header:
             logger.debug(f"Auth header found: {auth_header[:10]}...") 
-            
-            token = auth_header
-            if token.startswith("Bearer "):
-                token = token.replace("Bearer ", "")
 
             try:
-                # Decode with verification using settings
-                payload = jwt.decode(token, settings.jwt.access_token_secret, algorithms=[settings.jwt.algorithm])
+                # Verified once here and reused by the auth dependencies
+                payload = request_access_claims(request)
                 user_id = payload.get("user_id")
                 
                 if user_id:
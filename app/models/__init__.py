@@ -17,6 +17,9 @@ __all__ = [
     "Result",
     "UserAnswers",
     "GroupTeacher",
+    "StatsRollup",
+    "GradeHistogram",
+    "TrendRollup",
 ]
 
 
@@ -39,4 +42,7 @@ from .quiz.model import Quiz
 from .quiz_questions.model import QuizQuestion
 from .results.model import Result
 from .user_answers.model import UserAnswers
-from .group_teachers.model import GroupTeacher
\ No newline at end of file
+from .group_teachers.model import GroupTeacher
+from .stats_rollup.model import StatsRollup
+from .grade_histogram.model import GradeHistogram
+from .trend_rollup.model import TrendRollup
@@ -0,0 +1,25 @@
+from sqlalchemy import Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.mixins.id_int_pk import IdIntPk
+from app.models.mixins.time_stamp_mixin import TimestampMixin
+
+
+class GradeHistogram(Base, IdIntPk, TimestampMixin):
+    """
+    Number of results with a given grade for one quiz, group or subject:
+    at most 101 rows per scope. Maintained next to StatsRollup, see
+    modules/statistics/rollup.py.
+    """
+
+    __tablename__ = "grade_histograms"
+    __table_args__ = (UniqueConstraint("scope", "scope_id", "grade"),)
+
+    scope: Mapped[str] = mapped_column(String(16))
+    scope_id: Mapped[int] = mapped_column(Integer)
+    grade: Mapped[int] = mapped_column(Integer)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+    def __str__(self):
+        return f"{self.scope} {self.scope_id}: {self.grade} x{self.count}"
@@ -1,4 +1,5 @@
 from app.models.permission.model import Permission
+from dependence.permission_cache import permission_cache
 from sqladmin import ModelView
 
 
@@ -37,3 +38,10 @@ class PermissionView(ModelView, model=Permission):
         "created_at",
         "updated_at",
     ]
+
+    async def after_model_change(self, data, model, is_created, request):
+        # Edits here bypass PermissionRepository, drop every cached permission set
+        await permission_cache.invalidate_all()
+
+    async def after_model_delete(self, model, request):
+        await permission_cache.invalidate_all()
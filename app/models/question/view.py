@@ -1,5 +1,9 @@
 from sqladmin import ModelView
+from sqlalchemy import select
 from app.models.question.model import Question
+from app.models.quiz_questions.model import QuizQuestion
+from app.modules.quiz_process.paper import quiz_paper_cache
+from core.db_helper import db_helper
 
 
 class QuestionView(ModelView, model=Question):
@@ -72,4 +76,25 @@ class QuestionView(ModelView, model=Question):
         "quiz_questions",
         "created_at",
         "updated_at",
-    ]
\ No newline at end of file
+    ]
+
+    async def _linked_quiz_ids(self, question_id: int) -> list[int]:
+        # Quizzes whose cached paper contains this question
+        async with db_helper.session_factory() as session:
+            result = await session.execute(
+                select(QuizQuestion.quiz_id).where(
+                    QuizQuestion.question_id == question_id
+                )
+            )
+            return list(set(result.scalars().all()))
+
+    async def after_model_change(self, data, model, is_created, request):
+        if not is_created:
+            await quiz_paper_cache.invalidate(*await self._linked_quiz_ids(model.id))
+
+    async def on_model_delete(self, model, request):
+        # Read before the links go away with the question
+        request.state.paper_quiz_ids = await self._linked_quiz_ids(model.id)
+
+    async def after_model_delete(self, model, request):
+        await quiz_paper_cache.invalidate(*request.state.paper_quiz_ids)
@@ -1,5 +1,6 @@
 from sqladmin import ModelView
 from app.models.quiz.model import Quiz  
+from app.modules.quiz_process.paper import quiz_paper_cache
 
 
 class QuizView(ModelView, model=Quiz):
@@ -77,4 +78,11 @@ class QuizView(ModelView, model=Quiz):
         "quiz_questions",
         "created_at",
         "updated_at",
-    ]
\ No newline at end of file
+    ]
+
+    async def after_model_change(self, data, model, is_created, request):
+        # Edits here bypass QuizRepository, drop the cached paper too
+        await quiz_paper_cache.invalidate(model.id)
+
+    async def after_model_delete(self, model, request):
+        await quiz_paper_cache.invalidate(model.id)
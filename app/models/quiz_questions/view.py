@@ -1,5 +1,6 @@
 from sqladmin import ModelView
 from app.models.quiz_questions.model import QuizQuestion
+from app.modules.quiz_process.paper import quiz_paper_cache
 
 
 class QuizQuestionView(ModelView, model=QuizQuestion):
@@ -43,4 +44,16 @@ class QuizQuestionView(ModelView, model=QuizQuestion):
     form_excluded_columns = [
         "created_at",
         "updated_at",
-    ]
\ No newline at end of file
+    ]
+
+    async def on_model_change(self, data, model, is_created, request):
+        # The link may move to another quiz, whose paper changes as well
+        request.state.paper_quiz_ids = [] if is_created else [model.quiz_id]
+
+    async def after_model_change(self, data, model, is_created, request):
+        await quiz_paper_cache.invalidate(
+            *{*request.state.paper_quiz_ids, model.quiz_id}
+        )
+
+    async def after_model_delete(self, model, request):
+        await quiz_paper_cache.invalidate(model.quiz_id)
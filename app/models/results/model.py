@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, ForeignKey
+from sqlalchemy import BigInteger, Index, Integer, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import Base
 from app.models.mixins.id_int_pk import IdIntPk
@@ -13,6 +13,11 @@ if TYPE_CHECKING:
 
 class Result(Base, IdIntPk, TimestampMixin):
     __tablename__ = "results"
+    # Rows arrive in created_at order, so block ranges are enough for the
+    # time-range scans of the trend refresh
+    __table_args__ = (
+        Index("ix_results_created_at_brin", "created_at", postgresql_using="brin"),
+    )
 
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     quiz_id: Mapped[int] = mapped_column(Integer, ForeignKey("quizzes.id", ondelete="SET NULL"), nullable=True)
@@ -22,6 +27,13 @@ class Result(Base, IdIntPk, TimestampMixin):
     correct_answers: Mapped[int] = mapped_column(Integer, nullable=False)
     wrong_answers: Mapped[int] = mapped_column(Integer, nullable=False)
     grade: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Seed of the paper the student was given (QuizPaper.sample)
+    seed: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    # QuizAttempt.attempt_id; a redelivered or repeated submission of the
+    # same attempt is not stored twice
+    attempt_id: Mapped[str] = mapped_column(
+        String(32), nullable=True, unique=True, index=True
+    )
 
     user: Mapped["User"] = relationship("User", back_populates="results")
     quiz: Mapped["Quiz"] = relationship("Quiz", back_populates="results")
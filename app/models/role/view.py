@@ -1,4 +1,5 @@
 from app.models.role.model import Role
+from dependence.permission_cache import permission_cache
 from sqladmin import ModelView
 
 
@@ -37,3 +38,10 @@ class RoleView(ModelView, model=Role):
         "created_at",
         "updated_at",
     ]
+
+    async def after_model_change(self, data, model, is_created, request):
+        # Edits here bypass RoleRepository, drop every cached permission set
+        await permission_cache.invalidate_all()
+
+    async def after_model_delete(self, model, request):
+        await permission_cache.invalidate_all()
@@ -1,4 +1,5 @@
 from app.models.role_permission.model import RolePermission
+from dependence.permission_cache import permission_cache
 from sqladmin import ModelView
 
 
@@ -42,3 +43,10 @@ class RolePermissionView(ModelView, model=RolePermission):
         RolePermission.created_at,
         RolePermission.updated_at,
     )
+
+    async def after_model_change(self, data, model, is_created, request):
+        # A role gained or lost a permission, which may affect any user
+        await permission_cache.invalidate_all()
+
+    async def after_model_delete(self, model, request):
+        await permission_cache.invalidate_all()
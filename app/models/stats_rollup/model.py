@@ -0,0 +1,28 @@
+from sqlalchemy import BigInteger, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.mixins.id_int_pk import IdIntPk
+from app.models.mixins.time_stamp_mixin import TimestampMixin
+
+
+class StatsRollup(Base, IdIntPk, TimestampMixin):
+    """
+    Running aggregate of result grades for one quiz, group, faculty,
+    subject, teacher or user, kept up to date as results are written.
+    See modules/statistics/rollup.py.
+    """
+
+    __tablename__ = "stats_rollups"
+    __table_args__ = (UniqueConstraint("scope", "scope_id"),)
+
+    scope: Mapped[str] = mapped_column(String(16))
+    scope_id: Mapped[int] = mapped_column(Integer)
+
+    count: Mapped[int] = mapped_column(Integer, default=0)
+    grade_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+    grade_min: Mapped[int] = mapped_column(Integer, nullable=True)
+    grade_max: Mapped[int] = mapped_column(Integer, nullable=True)
+
+    def __str__(self):
+        return f"{self.scope} {self.scope_id}: {self.count}"
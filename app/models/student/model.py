@@ -16,7 +16,11 @@ class Student(Base, TimestampMixin, IdIntPk):
     __tablename__ = "students"
 
     user_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+        Integer,
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True,
+        unique=True,
+        index=True,
     )
 
     group_id: Mapped[int] = mapped_column(
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.mixins.id_int_pk import IdIntPk
+from app.models.mixins.time_stamp_mixin import TimestampMixin
+
+
+class TrendRollup(Base, IdIntPk, TimestampMixin):
+    """
+    Results of one quiz, group or faculty created within one hour.
+    Refreshed from results by modules/statistics/trends.py.
+    """
+
+    __tablename__ = "trend_rollups"
+    __table_args__ = (UniqueConstraint("scope", "scope_id", "hour"),)
+
+    scope: Mapped[str] = mapped_column(String(16))
+    scope_id: Mapped[int] = mapped_column(Integer)
+    # Start of the hour, naive database-local time like results.created_at
+    hour: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+    count: Mapped[int] = mapped_column(Integer, default=0)
+    grade_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    def __str__(self):
+        return f"{self.scope} {self.scope_id} {self.hour:%Y-%m-%d %H}:00: {self.count}"
@@ -22,6 +22,8 @@ class User(Base, IdIntPk, TimestampMixin):
 
     username: Mapped[str] = mapped_column(String(50), unique=True)
     password: Mapped[str] = mapped_column(String(255))
+    # HMAC of the HEMIS profile last saved for this user, see HemisLoginService
+    hemis_fingerprint: Mapped[str] = mapped_column(String(64), nullable=True)
 
     roles: Mapped[list["Role"]] = relationship(
         "Role", secondary="user_roles", back_populates="users", overlaps="user_roles"
@@ -1,9 +1,8 @@
 from app.models.user.model import User
-from passlib.context import CryptContext
+from core.utils.password_hash import password_hasher
+from dependence.permission_cache import permission_cache
 from sqladmin import ModelView
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class UserView(ModelView, model=User):
     column_list = (
@@ -25,6 +24,7 @@ class UserView(ModelView, model=User):
         "quizzes",
         "results",
         "student",
+        "hemis_fingerprint",
         "created_at",
         "updated_at",
     ]
@@ -53,10 +53,17 @@ class UserView(ModelView, model=User):
         # Check if the password is being sent in the form
         if "password" in data:
             # Hash the plain text password
-            data["password"] = pwd_context.hash(data["password"])
+            data["password"] = await password_hasher.hash(data["password"])
 
         # If updating an existing user and password field is empty,
         # you might want to remove it from 'data' so it doesn't overwrite
         # the hash with an empty string.
         elif not is_created:
             data.pop("password", None)
+
+    async def after_model_change(self, data, model, is_created, request):
+        # Roles may be edited here too, bypassing UserRepository
+        await permission_cache.invalidate_user(model.id)
+
+    async def after_model_delete(self, model, request):
+        await permission_cache.invalidate_user(model.id)
@@ -14,10 +14,12 @@ class UserAnswers(Base, IdIntPk, TimestampMixin):
     __tablename__ = "user_answers"
 
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    quiz_id: Mapped[int] = mapped_column(Integer, ForeignKey("quizzes.id", ondelete="SET NULL"), nullable=True)
-    question_id: Mapped[int] = mapped_column(Integer, ForeignKey("questions.id", ondelete="SET NULL"), nullable=True)
+    quiz_id: Mapped[int] = mapped_column(Integer, ForeignKey("quizzes.id", ondelete="SET NULL"), nullable=True, index=True)
+    question_id: Mapped[int] = mapped_column(Integer, ForeignKey("questions.id", ondelete="SET NULL"), nullable=True, index=True)
     answer: Mapped[str] = mapped_column(String, nullable=True)
     is_correct: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Result.attempt_id of the submission the answer belongs to
+    attempt_id: Mapped[str] = mapped_column(String(32), nullable=True)
 
     user: Mapped["User"] = relationship("User", back_populates="user_answers")
     quiz: Mapped["Quiz"] = relationship("Quiz", back_populates="user_answers")
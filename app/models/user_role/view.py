@@ -1,4 +1,5 @@
 from app.models.user_role.model import UserRole
+from dependence.permission_cache import permission_cache
 from sqladmin import ModelView
 
 
@@ -52,3 +53,14 @@ class UserRoleView(ModelView, model=UserRole):
         UserRole.created_at,
         UserRole.updated_at,
     )
+
+    async def on_model_change(self, data, model, is_created, request):
+        # The role may move to another user, who loses it
+        request.state.permission_user_ids = [] if is_created else [model.user_id]
+
+    async def after_model_change(self, data, model, is_created, request):
+        for user_id in {*request.state.permission_user_ids, model.user_id}:
+            await permission_cache.invalidate_user(user_id)
+
+    async def after_model_delete(self, model, request):
+        await permission_cache.invalidate_user(model.user_id)
@@ -0,0 +1,266 @@
+import asyncio
+import importlib.util
+import logging
+import math
+import random
+import time
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Fails HEMIS calls fast while HEMIS is down.
+
+    After `threshold` consecutive failed calls the circuit opens and calls
+    are refused without touching the network for `reset_seconds`. Then a
+    single trial call is let through: success closes the circuit, failure
+    opens it for another period.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self.retry_after() == 0:
+            return self.HALF_OPEN
+        return self._state
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Give up a trial call without an outcome."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._state = self.CLOSED
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or (
+            self._state == self.CLOSED and self.failures >= self.threshold
+        ):
+            logger.warning(f"HEMIS circuit opened after {self.failures} failures")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+
+class HemisClient:
+    """
+    App-lifetime HTTP client for HEMIS.
+
+    Connections are pooled and kept alive between logins (HTTP/2 when the
+    h2 package is installed), every call has connect/read/pool timeouts,
+    connection errors, timeouts and 5xx answers are retried with jittered
+    exponential backoff, and a circuit breaker turns a degraded HEMIS into
+    an immediate 503 instead of requests piling up behind it.
+
+    The lifespan opens and closes the client; outside of it (e.g. tests on
+    ASGITransport) it is opened on first use.
+    """
+
+    def __init__(
+        self,
+        login_url: str,
+        me_url: str,
+        *,
+        roster_url: Optional[str] = None,
+        roster_token: Optional[str] = None,
+        timeout: httpx.Timeout,
+        limits: httpx.Limits,
+        retries: int,
+        retry_backoff: float,
+        breaker: CircuitBreaker,
+        http2: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.login_url = login_url
+        self.me_url = me_url
+        self.roster_url = roster_url
+        self.roster_token = roster_token
+        self.timeout = timeout
+        self.limits = limits
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        self._get_client()
+        logger.info(f"Opened HEMIS client (http2={self.http2})")
+
+    async def stop(self) -> None:
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+        logger.info("Closed HEMIS client")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self._transport,
+                headers={"Accept": "application/json"},
+            )
+        return self._client
+
+    async def fetch_profile(self, login: str, password: str) -> dict:
+        """HEMIS `me` data of the student, logging in with their credentials."""
+        token = await self.login(login, password)
+        return await self.me(token)
+
+    async def login(self, login: str, password: str) -> str:
+        response = await self._request(
+            "POST", self.login_url, json={"login": login, "password": password}
+        )
+        if response.status_code != 200:
+            raise HTTPException(status_code=400, detail="Hemis login failed")
+
+        login_data = response.json()
+        if not login_data.get("success"):
+            raise HTTPException(
+                status_code=400, detail="Hemis login returned unsuccessful"
+            )
+        return login_data["data"]["token"]
+
+    async def me(self, token: str) -> dict:
+        response = await self._request(
+            "GET", self.me_url, headers={"Authorization": f"Bearer {token}"}
+        )
+        if response.status_code != 200:
+            raise HTTPException(status_code=400, detail="Hemis ME endpoint failed")
+
+        me_result = response.json()
+        if not me_result.get("success"):
+            raise HTTPException(
+                status_code=400, detail="Hemis ME returned unsuccessful"
+            )
+        return me_result["data"]
+
+    async def roster_page(self, page: int, limit: int) -> dict:
+        """
+        One page of the student roster: {"items": [...], "pagination":
+        {"pageCount": ..., ...}}, as returned by the HEMIS student list.
+        """
+        if not self.roster_url:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Hemis roster source is not configured",
+            )
+
+        response = await self._request(
+            "GET",
+            self.roster_url,
+            params={"page": page, "limit": limit},
+            headers={"Authorization": f"Bearer {self.roster_token}"},
+        )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Hemis roster request failed with HTTP {response.status_code}",
+            )
+
+        result = response.json()
+        if not result.get("success"):
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Hemis roster returned unsuccessful",
+            )
+        return result["data"]
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if not self.breaker.allow():
+            retry_after = max(1, math.ceil(self.breaker.retry_after()))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Hemis service unavailable, try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+        client = self._get_client()
+        error = ""
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    # Full jitter keeps retries from many workers from lining up
+                    await asyncio.sleep(
+                        random.uniform(0, self.retry_backoff * 2 ** attempt)
+                    )
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.RequestError as e:
+                    error = str(e) or type(e).__name__
+                    continue
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                    return response
+                error = f"HTTP {response.status_code}"
+        except asyncio.CancelledError:
+            # A cancelled trial call must not keep the circuit half-open forever
+            self.breaker.release()
+            raise
+
+        self.breaker.record_failure()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Hemis service unavailable: {error}",
+        )
+
+
+hemis_client = HemisClient(
+    login_url=settings.hemis.login_url,
+    me_url=settings.hemis.me_url,
+    roster_url=settings.hemis.roster_url,
+    roster_token=settings.hemis.roster_token,
+    timeout=httpx.Timeout(
+        settings.hemis.read_timeout_seconds,
+        connect=settings.hemis.connect_timeout_seconds,
+        pool=settings.hemis.pool_timeout_seconds,
+    ),
+    limits=httpx.Limits(
+        max_connections=settings.hemis.max_connections,
+        max_keepalive_connections=settings.hemis.max_keepalive_connections,
+        keepalive_expiry=settings.hemis.keepalive_expiry_seconds,
+    ),
+    retries=settings.hemis.retries,
+    retry_backoff=settings.hemis.retry_backoff_seconds,
+    breaker=CircuitBreaker(
+        threshold=settings.hemis.breaker_threshold,
+        reset_seconds=settings.hemis.breaker_reset_seconds,
+    ),
+    http2=settings.hemis.http2,
+)
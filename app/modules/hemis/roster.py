@@ -0,0 +1,316 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.models.faculty.model import Faculty
+from app.models.group.model import Group
+from app.models.student.model import Student
+from app.models.user.model import User
+from app.models.user_role.model import UserRole
+from core.config import settings
+from core.db_helper import db_helper
+from dependence.permission_cache import permission_cache
+
+from .client import HemisClient, hemis_client
+from .schemas import RosterSyncResponse, RosterSyncStatus
+from .service import hemis_service
+
+logger = logging.getLogger(__name__)
+
+
+class RosterSync:
+    """
+    Bulk import of the HEMIS student roster.
+
+    Roster pages are fetched `concurrency` at a time through the shared
+    HEMIS client, then faculties, groups, users and students are upserted
+    with INSERT ... ON CONFLICT, `batch_size` students per statement.
+    Users are keyed by student_id_number, the login students use in
+    HEMIS, and get no password: the first /hemis/login sets it and finds
+    every other record already in place.
+
+    Running it again is safe; unchanged students are left untouched.
+
+    The HTTP endpoint starts it in the background (`start`) and callers
+    poll `get_status`, which is kept in Redis so any worker can answer.
+    The CLI awaits `run` directly.
+    """
+
+    def __init__(
+        self, client: HemisClient, page_size: int, concurrency: int, batch_size: int
+    ):
+        self.client = client
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._status = RosterSyncStatus(status="idle")
+
+    @property
+    def _status_key(self) -> str:
+        return f"{settings.redis.prefix}:hemis:roster_sync"
+
+    async def start(self) -> RosterSyncStatus:
+        """Starts a sync in the background and returns its running status."""
+        # The task only takes the lock once it is scheduled
+        if self._lock.locked() or (self._task is not None and not self._task.done()):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Roster sync is already running",
+            )
+
+        running = RosterSyncStatus(
+            status="running", started_at=datetime.now(timezone.utc)
+        )
+        await self._set_status(running)
+        self._task = asyncio.create_task(self._run_in_background(running))
+        return running
+
+    async def get_status(self) -> RosterSyncStatus:
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(self._status_key)
+            except RedisError as e:
+                logger.warning(f"Failed to read roster sync status: {e}")
+                raw = None
+            if raw:
+                return RosterSyncStatus.model_validate_json(raw)
+        return self._status
+
+    async def _run_in_background(self, running: RosterSyncStatus) -> None:
+        try:
+            result = await self.run()
+        except Exception as e:
+            logger.exception("HEMIS roster sync failed")
+            detail = e.detail if isinstance(e, HTTPException) else "Roster sync failed"
+            finished = running.model_copy(
+                update={"status": "failed", "detail": str(detail)}
+            )
+        else:
+            finished = running.model_copy(update={"status": "done", "result": result})
+        finished.finished_at = datetime.now(timezone.utc)
+        await self._set_status(finished)
+
+    async def _set_status(self, sync_status: RosterSyncStatus) -> None:
+        self._status = sync_status
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                self._status_key,
+                sync_status.model_dump_json(),
+                ex=settings.hemis.roster_status_ttl_seconds,
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to store roster sync status: {e}")
+
+    async def run(self) -> RosterSyncResponse:
+        if self._lock.locked():
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Roster sync is already running",
+            )
+
+        async with self._lock:
+            started = time.monotonic()
+            records = await self.fetch()
+            logger.info(f"Fetched {len(records)} students from the HEMIS roster")
+
+            result = RosterSyncResponse(
+                fetched=len(records),
+                faculties_created=0,
+                groups_created=0,
+                users_created=0,
+                students_upserted=0,
+                duration_seconds=0,
+            )
+            granted: list[int] = []
+            async with db_helper.session_factory() as session:
+                for i in range(0, len(records), self.batch_size):
+                    batch = records[i : i + self.batch_size]
+                    granted += await self.upsert(session, batch, result)
+                    await session.commit()
+
+            for user_id in granted:
+                await permission_cache.invalidate_user(user_id)
+
+            result.duration_seconds = round(time.monotonic() - started, 3)
+            logger.info(f"HEMIS roster sync finished: {result.model_dump()}")
+            return result
+
+    async def fetch(self) -> list[dict]:
+        """Roster items, one per student_id_number."""
+        first = await self.client.roster_page(1, self.page_size)
+        page_count = first.get("pagination", {}).get("pageCount", 1)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_page(page: int) -> list[dict]:
+            async with semaphore:
+                return (await self.client.roster_page(page, self.page_size))["items"]
+
+        pages = await asyncio.gather(
+            *(fetch_page(page) for page in range(2, page_count + 1))
+        )
+
+        # ON CONFLICT cannot touch the same row twice in one statement
+        records = {}
+        for items in [first["items"], *pages]:
+            for item in items:
+                if item.get("student_id_number"):
+                    records[str(item["student_id_number"])] = item
+        return list(records.values())
+
+    async def upsert(
+        self, session: AsyncSession, records: list[dict], result: RosterSyncResponse
+    ) -> list[int]:
+        """
+        Upserts one batch and adds the counts to result. Returns existing
+        users that were given the Student role, whose cached permissions
+        are now stale.
+        """
+        extract = hemis_service._extract_name
+        faculty_of_group = {}
+        for item in records:
+            faculty_name = extract(item.get("faculty")) or "Unknown"
+            group_name = extract(item.get("group")) or "Unknown"
+            faculty_of_group.setdefault(group_name, faculty_name)
+
+        # Faculties
+        faculty_names = set(faculty_of_group.values())
+        stmt = (
+            insert(Faculty)
+            .values([{"name": name} for name in faculty_names])
+            .on_conflict_do_nothing(index_elements=[Faculty.name])
+            .returning(Faculty.id)
+        )
+        result.faculties_created += len((await session.execute(stmt)).all())
+        faculty_ids = dict(
+            (
+                await session.execute(
+                    select(Faculty.name, Faculty.id).where(
+                        Faculty.name.in_(faculty_names)
+                    )
+                )
+            ).all()
+        )
+
+        # Groups, linked to the faculty they were first seen with, like
+        # get_or_create_group
+        stmt = (
+            insert(Group)
+            .values(
+                [
+                    {"name": group_name, "faculty_id": faculty_ids[faculty_name]}
+                    for group_name, faculty_name in faculty_of_group.items()
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[Group.name])
+            .returning(Group.id)
+        )
+        result.groups_created += len((await session.execute(stmt)).all())
+        group_ids = dict(
+            (
+                await session.execute(
+                    select(Group.name, Group.id).where(Group.name.in_(faculty_of_group))
+                )
+            ).all()
+        )
+
+        # Users
+        usernames = [str(item["student_id_number"]) for item in records]
+        stmt = (
+            insert(User)
+            .values([{"username": username, "password": ""} for username in usernames])
+            .on_conflict_do_nothing(index_elements=[User.username])
+            .returning(User.id)
+        )
+        created_ids = set((await session.execute(stmt)).scalars().all())
+        result.users_created += len(created_ids)
+        user_ids = dict(
+            (
+                await session.execute(
+                    select(User.username, User.id).where(User.username.in_(usernames))
+                )
+            ).all()
+        )
+
+        # Student role, user_roles has no unique key to conflict on
+        student_role = await hemis_service.get_or_create_student_role(session)
+        has_role = set(
+            (
+                await session.execute(
+                    select(UserRole.user_id).where(
+                        UserRole.role_id == student_role.id,
+                        UserRole.user_id.in_(list(user_ids.values())),
+                    )
+                )
+            ).scalars().all()
+        )
+        missing = [user_id for user_id in user_ids.values() if user_id not in has_role]
+        if missing:
+            await session.execute(
+                insert(UserRole).values(
+                    [
+                        {"user_id": user_id, "role_id": student_role.id}
+                        for user_id in missing
+                    ]
+                )
+            )
+
+        # Students
+        rows = []
+        for item in records:
+            group_name = extract(item.get("group")) or "Unknown"
+            faculty_name = extract(item.get("faculty")) or "Unknown"
+            profile = hemis_service.student_profile(
+                item, group_ids[group_name], faculty_name
+            )
+            rows.append(
+                {
+                    "user_id": user_ids[str(item["student_id_number"])],
+                    "phone": item.get("phone", ""),
+                    "university": item.get("university", ""),
+                    "avg_gpa": 0.0,
+                    **profile,
+                }
+            )
+        # Columns save_user_data keeps in sync with HEMIS
+        profile_columns = list(profile)
+        stmt = insert(Student).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Student.user_id],
+            set_={
+                **{column: stmt.excluded[column] for column in profile_columns},
+                "updated_at": func.now(),
+            },
+            # Only rows HEMIS actually changed are rewritten
+            where=or_(
+                *(
+                    Student.__table__.c[column].is_distinct_from(stmt.excluded[column])
+                    for column in profile_columns
+                )
+            ),
+        ).returning(Student.id)
+        result.students_upserted += len((await session.execute(stmt)).all())
+
+        return [user_id for user_id in missing if user_id not in created_ids]
+
+
+roster_sync = RosterSync(
+    client=hemis_client,
+    page_size=settings.hemis.roster_page_size,
+    concurrency=settings.hemis.roster_concurrency,
+    batch_size=settings.hemis.roster_batch_size,
+)
@@ -1,10 +1,12 @@
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.db_helper import db_helper
 from fastapi_limiter.depends import RateLimiter
+from dependence.role_checker import PermissionRequired
 
-from .schemas import HemisLoginRequest, HemisLoginResponse
+from .roster import roster_sync
+from .schemas import HemisLoginRequest, HemisLoginResponse, RosterSyncStatus
 from .service import hemis_service
 
 router = APIRouter(prefix="/hemis", tags=["Hemis"])
@@ -15,3 +17,25 @@ async def hemis_login(
     session: AsyncSession = Depends(db_helper.session_getter)
 ):
     return await hemis_service.hemis_login(session=session, data=data)
+
+
+@router.post(
+    "/roster/sync",
+    response_model=RosterSyncStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def sync_roster(
+    _: PermissionRequired = Depends(PermissionRequired("sync:hemis_roster")),
+):
+    """
+    Import every student of the HEMIS roster ahead of the login wave.
+    Runs in the background; poll GET /hemis/roster/sync for the outcome.
+    """
+    return await roster_sync.start()
+
+
+@router.get("/roster/sync", response_model=RosterSyncStatus)
+async def get_roster_sync_status(
+    _: PermissionRequired = Depends(PermissionRequired("sync:hemis_roster")),
+):
+    return await roster_sync.get_status()
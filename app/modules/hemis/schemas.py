@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -9,4 +12,20 @@ class HemisLoginRequest(BaseModel):
 class HemisLoginResponse(BaseModel):
     type: str = "Bearer"
     access_token: str
-    refresh_token: str
\ No newline at end of file
+    refresh_token: str
+
+class RosterSyncResponse(BaseModel):
+    fetched: int  # distinct students in the roster
+    faculties_created: int
+    groups_created: int
+    users_created: int
+    students_upserted: int  # inserted or changed
+    duration_seconds: float
+
+
+class RosterSyncStatus(BaseModel):
+    status: str  # idle | running | done | failed
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[RosterSyncResponse] = None
+    detail: Optional[str] = None
@@ -1,78 +1,135 @@
 
-import httpx
+import hashlib
+import hmac
+import json
+import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, date
+from typing import AsyncIterator, Optional
 
+from redis.exceptions import LockError, RedisError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from fastapi import HTTPException, status
 
 from core.config import settings
-from core.utils.password_hash import hash_password, verify_password
+from core.utils.password_hash import password_hasher
+from core.utils.single_flight import SingleFlight
+from app.core.cache import get_redis
 from app.models.user.model import User
 from app.models.student.model import Student
 from app.models.group.model import Group
 from app.models.faculty.model import Faculty
 from app.models.role.model import Role
 from modules.user.service import auth_service
+from dependence.permission_cache import permission_cache
+from .client import hemis_client
 from .schemas import HemisLoginRequest, HemisLoginResponse
 
+logger = logging.getLogger(__name__)
+
+
 class HemisLoginService:
+    def __init__(self):
+        # Identical logins in flight in this worker share one HEMIS exchange
+        self._logins = SingleFlight()
+
     async def hemis_login(self, session: AsyncSession, data: HemisLoginRequest) -> HemisLoginResponse:
         # 1. Search in local database
-        stmt = select(User).where(User.username == data.login).options(selectinload(User.roles))
+        response = await self.login_locally(session, data)
+        if response:
+            return response
+
+        # 2. If not found or invalid password, request Hemis
+        digest = self._credentials_digest(data)
+        return await self._logins.run(
+            (data.login, digest), lambda: self._locked_request_to_hemis(session, data, digest)
+        )
+
+    async def login_locally(self, session: AsyncSession, data: HemisLoginRequest) -> Optional[HemisLoginResponse]:
+        stmt = (
+            select(User)
+            .where(User.username == data.login)
+            .options(selectinload(User.roles))
+            .execution_options(populate_existing=True)
+        )
         result = await session.execute(stmt)
         user = result.scalar_one_or_none()
 
         if user and user.password:
-             if verify_password(data.password, user.password):
-                 access_token = auth_service.create_access_token({"user_id": user.id})
+             if await password_hasher.verify(data.password, user.password):
+                 access_token = await auth_service.issue_access_token(session, user.id)
                  refresh_token = auth_service.create_refresh_token({"user_id": user.id})
                  return HemisLoginResponse(access_token=access_token, refresh_token=refresh_token)
-        
-        # 2. If not found or invalid password, request Hemis
-        return await self.request_to_hemis(session, data)
+        return None
 
-    async def request_to_hemis(self, session: AsyncSession, data: HemisLoginRequest) -> HemisLoginResponse:
+    async def _locked_request_to_hemis(
+        self, session: AsyncSession, data: HemisLoginRequest, digest: str
+    ) -> HemisLoginResponse:
+        async with self.upstream_lock(data.login, digest) as waited:
+            if waited:
+                # Another worker just ran this login; it stored the password
+                response = await self.login_locally(session, data)
+                if response:
+                    return response
+            return await self.request_to_hemis(session, data)
+
+    @staticmethod
+    def _credentials_digest(data: HemisLoginRequest) -> str:
+        # Keyed, so lock names in Redis say nothing about the password
+        return hmac.new(
+            settings.jwt.access_token_secret.encode(),
+            f"{data.login}\0{data.password}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+
+    @asynccontextmanager
+    async def upstream_lock(self, username: str, digest: str) -> AsyncIterator[bool]:
+        """
+        Redis lock around one HEMIS login across workers. Yields whether
+        another worker held it first. Without Redis, or if the holder
+        takes longer than login_lock_wait_seconds, the caller goes ahead
+        unlocked rather than failing the login.
+        """
+        redis = get_redis()
+        if redis is None:
+            yield False
+            return
+
+        lock = redis.lock(
+            f"{settings.redis.prefix}:hemis_login:{username}:{digest}",
+            timeout=settings.hemis.login_lock_seconds,
+            sleep=0.05,
+            blocking_timeout=settings.hemis.login_lock_wait_seconds,
+        )
+        acquired = waited = False
         try:
-            async with httpx.AsyncClient() as client:
-                # Login
-                login_resp = await client.post(
-                    settings.hemis.login_url, 
-                    json={"login": data.login, "password": data.password},
-                    headers={"Accept": "application/json"}
-                )
-                
-                if login_resp.status_code != 200:
-                    raise HTTPException(status_code=400, detail="Hemis login failed")
-                
-                login_data = login_resp.json()
-                if not login_data.get("success"):
-                     raise HTTPException(status_code=400, detail="Hemis login returned unsuccessful")
-                
-                token = login_data["data"]["token"]
-
-                # Me Endpoint
-                me_resp = await client.get(
-                    settings.hemis.me_url,
-                    headers={"Authorization": f"Bearer {token}"}
-                )
-
-                if me_resp.status_code != 200:
-                    raise HTTPException(status_code=400, detail="Hemis ME endpoint failed")
-                
-                me_result = me_resp.json()
-                if not me_result.get("success"):
-                     raise HTTPException(status_code=400, detail="Hemis ME returned unsuccessful")
-
-                me_data = me_result["data"]
-        except httpx.RequestError as e:
-             raise HTTPException(status_code=503, detail=f"Hemis service unavailable: {str(e)}")
-        
+            acquired = await lock.acquire(blocking=False)
+            if not acquired:
+                waited = True
+                acquired = await lock.acquire()
+                if not acquired:
+                    logger.warning(f"Gave up waiting for HEMIS login of {username}")
+        except RedisError as e:
+            logger.warning(f"HEMIS login lock unavailable: {e}")
+
+        try:
+            yield waited
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except (LockError, RedisError) as e:
+                    # Expired meanwhile, nothing to release
+                    logger.warning(f"Failed to release HEMIS login lock: {e}")
+
+    async def request_to_hemis(self, session: AsyncSession, data: HemisLoginRequest) -> HemisLoginResponse:
+        me_data = await hemis_client.fetch_profile(data.login, data.password)
+
         # Save Data
         user = await self.save_user_data(session, data.login, data.password, me_data)
         
-        access_token = auth_service.create_access_token({"user_id": user.id})
+        access_token = await auth_service.issue_access_token(session, user.id)
         refresh_token = auth_service.create_refresh_token({"user_id": user.id})
 
         return HemisLoginResponse(access_token=access_token, refresh_token=refresh_token)
@@ -85,7 +142,40 @@ class HemisLoginService:
             return data
         return ""
 
+    @staticmethod
+    def profile_fingerprint(me_data: dict) -> str:
+        """
+        Keyed hash of a HEMIS `me` payload. Equal payloads give equal
+        fingerprints regardless of key order.
+        """
+        payload = json.dumps(me_data, sort_keys=True, separators=(",", ":"), default=str)
+        return hmac.new(
+            settings.jwt.access_token_secret.encode(), payload.encode(), hashlib.sha256
+        ).hexdigest()
+
     async def save_user_data(self, session: AsyncSession, username: str, password: str, me_data: dict) -> User:
+        fingerprint = self.profile_fingerprint(me_data)
+
+        stmt = select(User).where(User.username == username).options(selectinload(User.roles))
+        result = await session.execute(stmt)
+        user = result.scalar_one_or_none()
+
+        # We only get here when the local password check failed, so the
+        # password itself is new and has to be hashed either way
+        hashed_pw = await password_hasher.hash(password)
+
+        if (
+            user
+            and user.hemis_fingerprint == fingerprint
+            # Cheap to check, and an admin may have removed either since
+            and any(role.name == "Student" for role in user.roles)
+            and await session.scalar(select(Student.id).where(Student.user_id == user.id))
+        ):
+            # Same HEMIS profile as last time, nothing else to write
+            user.password = hashed_pw
+            await session.commit()
+            return user
+
         # Save Faculty
         faculty_name = self._extract_name(me_data.get("faculty")) or "Unknown"
         faculty = await self.get_or_create_faculty(session, faculty_name)
@@ -96,120 +186,98 @@ class HemisLoginService:
         # Ensure group is linked to the faculty
         group = await self.get_or_create_group(session, group_name, faculty.id)
 
-        # Save User (or Update)
-        stmt = select(User).where(User.username == username).options(selectinload(User.roles))
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-
-        hashed_pw = hash_password(password)
-        
-        student_role_stmt = select(Role).where(Role.name == "Student")
-        role_res = await session.execute(student_role_stmt)
-        student_role = role_res.scalar_one_or_none()
-        
-        if not student_role:
-             # Create role if it doesn't exist (safety fallback)
-             student_role = Role(name="Student")
-             session.add(student_role)
-             await session.flush() # flush to get ID
+        student_role = None
+        if not user or not any(role.name == "Student" for role in user.roles):
+            student_role = await self.get_or_create_student_role(session)
 
+        roles_changed = False
         if not user:
             user = User(username=username, password=hashed_pw)
-            if student_role:
-                user.roles.append(student_role)
+            user.roles.append(student_role)
             session.add(user)
         else:
             user.password = hashed_pw # Update password
             # Update role
-            if student_role and student_role not in user.roles:
+            if student_role:
                 user.roles.append(student_role)
+                roles_changed = True
+        user.hemis_fingerprint = fingerprint
         
         await session.flush() 
-        await session.refresh(user)
 
         # Save Student Profile
         stmt_student = select(Student).where(Student.user_id == user.id)
         current_student_res = await session.execute(stmt_student)
         student = current_student_res.scalar_one_or_none()
         
-        birth_timestamp = me_data.get("birth_date", 0)
-        # Handle timestamp conversion safely
-        try:
-            birth_date = datetime.fromtimestamp(birth_timestamp).date() if birth_timestamp else date(1970, 1, 1)
-        except (OSError, OverflowError, ValueError):
-            birth_date = date(1970, 1, 1)
-
-        # Extract complex fields
-        gender_val = self._extract_name(me_data.get("gender"))
-        student_status_val = self._extract_name(me_data.get("studentStatus"))
-        education_form_val = self._extract_name(me_data.get("educationForm"))
-        education_type_val = self._extract_name(me_data.get("educationType"))
-        payment_form_val = self._extract_name(me_data.get("paymentForm"))
-        education_lang_val = self._extract_name(me_data.get("educationLang"))
-        level_val = self._extract_name(me_data.get("level"))
-        semester_val = self._extract_name(me_data.get("semester"))
-        specialty_val = self._extract_name(me_data.get("specialty"))
-        
-        # Extract name parts
-        full_name = me_data.get("full_name", "")
-        name_parts = full_name.split()
-        last_name = name_parts[0] if len(name_parts) > 0 else ""
-        first_name = name_parts[1] if len(name_parts) > 1 else ""
-        third_name = " ".join(name_parts[2:]) if len(name_parts) > 2 else ""
+        profile = self.student_profile(me_data, group.id, faculty.name)
         
         if not student:
             student = Student(
                 user_id=user.id,
-                full_name=full_name,
-                first_name=first_name,
-                last_name=last_name,
-                third_name=third_name,
-                student_id_number=me_data.get("student_id_number", ""),
-                image_path=me_data.get("image", ""),
-                birth_date=birth_date,
                 phone=me_data.get("phone", ""), 
-                gender=gender_val, 
                 university=me_data.get("university", ""),
-                specialty=specialty_val,
-                student_status=student_status_val,
-                education_form=education_form_val,
-                education_type=education_type_val,
-                payment_form=payment_form_val,
-                education_lang=education_lang_val,
-                faculty=faculty.name, # Save string name
-                level=level_val,
-                semester=semester_val,
-                address=me_data.get("address", ""),
-                avg_gpa=0.0
+                avg_gpa=0.0,
+                **profile,
             )
-            student.group_id = group.id
             session.add(student)
         else:
-            # Update existing student
-            student.full_name = full_name
-            student.first_name = first_name
-            student.last_name = last_name
-            student.third_name = third_name
-            student.student_id_number = me_data.get("student_id_number", "")
-            student.image_path = me_data.get("image", "")
-            student.birth_date = birth_date
-            student.group_id = group.id
-            student.faculty = faculty.name
-            student.student_status = student_status_val
-            student.address = me_data.get("address", "")
-            student.gender = gender_val
-            student.specialty = specialty_val
-            student.education_form = education_form_val
-            student.education_type = education_type_val
-            student.payment_form = payment_form_val
-            student.education_lang = education_lang_val
-            student.level = level_val
-            student.semester = semester_val
+            # Update existing student, only the fields HEMIS actually changed
+            for field, value in profile.items():
+                if getattr(student, field) != value:
+                    setattr(student, field, value)
 
         await session.commit()
-        await session.refresh(user)
+        if roles_changed:
+            await permission_cache.invalidate_user(user.id)
         return user
 
+    def student_profile(self, me_data: dict, group_id: int, faculty_name: str) -> dict:
+        """Student columns HEMIS owns, taken from a `me` shaped payload."""
+        birth_timestamp = me_data.get("birth_date", 0)
+        # Handle timestamp conversion safely
+        try:
+            birth_date = datetime.fromtimestamp(birth_timestamp).date() if birth_timestamp else date(1970, 1, 1)
+        except (OSError, OverflowError, ValueError):
+            birth_date = date(1970, 1, 1)
+
+        # Extract name parts
+        full_name = me_data.get("full_name", "")
+        name_parts = full_name.split()
+
+        return {
+            "full_name": full_name,
+            "last_name": name_parts[0] if len(name_parts) > 0 else "",
+            "first_name": name_parts[1] if len(name_parts) > 1 else "",
+            "third_name": " ".join(name_parts[2:]) if len(name_parts) > 2 else "",
+            "student_id_number": me_data.get("student_id_number", ""),
+            "image_path": me_data.get("image", ""),
+            "birth_date": birth_date,
+            "group_id": group_id,
+            "faculty": faculty_name, # Save string name
+            "student_status": self._extract_name(me_data.get("studentStatus")),
+            "address": me_data.get("address", ""),
+            "gender": self._extract_name(me_data.get("gender")),
+            "specialty": self._extract_name(me_data.get("specialty")),
+            "education_form": self._extract_name(me_data.get("educationForm")),
+            "education_type": self._extract_name(me_data.get("educationType")),
+            "payment_form": self._extract_name(me_data.get("paymentForm")),
+            "education_lang": self._extract_name(me_data.get("educationLang")),
+            "level": self._extract_name(me_data.get("level")),
+            "semester": self._extract_name(me_data.get("semester")),
+        }
+
+    async def get_or_create_student_role(self, session: AsyncSession) -> Role:
+        stmt = select(Role).where(Role.name == "Student")
+        result = await session.execute(stmt)
+        student_role = result.scalar_one_or_none()
+        if not student_role:
+            # Create role if it doesn't exist (safety fallback)
+            student_role = Role(name="Student")
+            session.add(student_role)
+            await session.flush() # flush to get ID
+        return student_role
+
     async def get_or_create_faculty(self, session: AsyncSession, name: str) -> Faculty:
         stmt = select(Faculty).where(Faculty.name == name)
         result = await session.execute(stmt)
@@ -3,6 +3,8 @@ from app.models.permission.model import Permission
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from dependence.permission_cache import permission_cache
+
 from .schemas import (
     PermissionCreateRequest,
     PermissionListRequest,
@@ -100,6 +102,7 @@ class PermissionRepository:
 
         await session.commit()
         await session.refresh(permission)
+        await permission_cache.invalidate_all()
         return permission
 
     async def delete_permission(
@@ -116,6 +119,7 @@ class PermissionRepository:
 
         await session.delete(permission)
         await session.commit()
+        await permission_cache.invalidate_all()
 
 
 get_permission_repository = PermissionRepository()
@@ -1,5 +1,6 @@
 from fastapi import HTTPException, status
 from app.models.question.model import Question
+from app.models.quiz_questions.model import QuizQuestion
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,6 +10,7 @@ from .schemas import (
     QuestionListResponse,
 )
 from core.config import settings
+from app.modules.quiz_process.paper import quiz_paper_cache
 
 
 class QuestionRepository:
@@ -106,8 +108,10 @@ class QuestionRepository:
         question.option_c = data.option_c
         question.option_d = data.option_d
 
+        quiz_ids = await self._linked_quiz_ids(session, question_id)
         await session.commit()
         await session.refresh(question)
+        await quiz_paper_cache.invalidate(*quiz_ids)
         return question
 
     async def delete_question(
@@ -122,8 +126,20 @@ class QuestionRepository:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Question not found"
             )
 
+        quiz_ids = await self._linked_quiz_ids(session, question_id)
         await session.delete(question)
         await session.commit()
+        await quiz_paper_cache.invalidate(*quiz_ids)
+
+    async def _linked_quiz_ids(
+        self, session: AsyncSession, question_id: int
+    ) -> list[int]:
+        # Quizzes whose cached paper contains this question
+        stmt = select(QuizQuestion.quiz_id).where(
+            QuizQuestion.question_id == question_id
+        )
+        result = await session.execute(stmt)
+        return list(set(result.scalars().all()))
 
 
     async def upload_image(self, file) -> str:
@@ -12,6 +12,7 @@ from .schemas import (
     QuizListResponse,
 )
 from core.config import settings
+from app.modules.quiz_process.paper import quiz_paper_cache
 
 
 from app.models.group_teachers.model import GroupTeacher
@@ -76,6 +77,7 @@ class QuizRepository:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error",
             )
+        await quiz_paper_cache.invalidate(new_quiz.id)
         return new_quiz
 
     async def get_quiz(
@@ -146,6 +148,8 @@ class QuizRepository:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found"
             )
         
+        was_active = quiz.is_active
+
         quiz.title = data.title
         quiz.question_number = data.question_number
         quiz.duration = data.duration
@@ -157,6 +161,10 @@ class QuizRepository:
 
         await session.commit()
         await session.refresh(quiz)
+        await quiz_paper_cache.invalidate(quiz.id)
+        if quiz.is_active and not was_active:
+            # Render the paper variants before students start asking for them
+            await quiz_paper_cache.prepare_variants(session, quiz.id)
         return quiz
 
     async def delete_quiz(
@@ -173,6 +181,7 @@ class QuizRepository:
 
         await session.delete(quiz)
         await session.commit()
+        await quiz_paper_cache.invalidate(quiz_id)
 
 
     async def upload_image(self, file) -> str:
@@ -0,0 +1,179 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, status
+
+from core.config import settings
+
+from .schemas import AdmissionMetricsResponse, QuizAdmissionStats
+
+
+class _QuizGate:
+    def __init__(self):
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self, max_wait: float) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        # Reserve the token even if it is not there yet and sleep until it is,
+        # so callers are released in arrival order at the configured rate
+        wait = (1 - self.tokens) / self.rate
+        if wait > max_wait:
+            return False
+
+        self.tokens -= 1
+        if self.tokens < 0:
+            try:
+                await asyncio.sleep(-self.tokens / self.rate)
+            except asyncio.CancelledError:
+                # Client went away; give the reserved token back
+                self.tokens += 1
+                raise
+        return True
+
+
+class AdmissionController:
+    """
+    Waiting room in front of start_quiz.
+
+    At most `concurrency` papers per quiz are built at once; further
+    students wait in a FIFO queue of up to `queue_size`, and admitted
+    requests are paced to `rate` per second across all quizzes. A full
+    queue or a wait longer than `max_wait` is answered with 503, the
+    student's queue position and a Retry-After hint.
+
+    State is per worker process, like the connection pool it protects.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        queue_size: int,
+        max_wait: float,
+        rate: float,
+        burst: int,
+    ):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self._bucket = _TokenBucket(rate, burst)
+        self._gates: dict[int, _QuizGate] = {}
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._total_wait = 0.0
+
+    @asynccontextmanager
+    async def admit(self, quiz_id: int):
+        gate = self._gates.setdefault(quiz_id, _QuizGate())
+        started = time.monotonic()
+
+        if gate.active < self.concurrency and not gate.waiters:
+            gate.active += 1
+        else:
+            await self._wait_for_slot(quiz_id, gate)
+
+        try:
+            remaining = self.max_wait - (time.monotonic() - started)
+            if not await self._bucket.acquire(remaining):
+                self.timed_out += 1
+                raise self._busy(
+                    len(gate.waiters) + 1, "Too many students are starting quizzes"
+                )
+            self.admitted += 1
+            self._total_wait += time.monotonic() - started
+            yield
+        finally:
+            self._release(quiz_id, gate)
+
+    async def _wait_for_slot(self, quiz_id: int, gate: _QuizGate) -> None:
+        position = len(gate.waiters) + 1
+        if position > self.queue_size:
+            self.rejected += 1
+            raise self._busy(position, "The waiting room is full")
+
+        slot = asyncio.get_running_loop().create_future()
+        gate.waiters.append(slot)
+        try:
+            await asyncio.wait({slot}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            # Client went away; a slot handed over meanwhile goes to the next one
+            if slot.done():
+                self._release(quiz_id, gate)
+            else:
+                slot.cancel()
+                gate.waiters.remove(slot)
+            raise
+
+        if not slot.done():
+            slot.cancel()
+            gate.waiters.remove(slot)
+            self.timed_out += 1
+            raise self._busy(position, "Too many students are starting this quiz")
+
+    def _release(self, quiz_id: int, gate: _QuizGate) -> None:
+        # Hand the slot straight to the next waiter so nobody can jump the queue
+        while gate.waiters:
+            slot = gate.waiters.popleft()
+            if not slot.done():
+                slot.set_result(None)
+                return
+
+        gate.active -= 1
+        self._drop_if_idle(quiz_id, gate)
+
+    def _drop_if_idle(self, quiz_id: int, gate: _QuizGate) -> None:
+        if gate.active == 0 and not gate.waiters:
+            self._gates.pop(quiz_id, None)
+
+    def _busy(self, position: int, message: str) -> HTTPException:
+        retry_after = max(1, math.ceil(position / self._bucket.rate))
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={
+                "message": message,
+                "position": position,
+                "retry_after": retry_after,
+            },
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def metrics(self) -> AdmissionMetricsResponse:
+        return AdmissionMetricsResponse(
+            admitted=self.admitted,
+            rejected=self.rejected,
+            timed_out=self.timed_out,
+            average_wait_seconds=(
+                self._total_wait / self.admitted if self.admitted else 0.0
+            ),
+            quizzes=[
+                QuizAdmissionStats(
+                    quiz_id=quiz_id, active=gate.active, waiting=len(gate.waiters)
+                )
+                for quiz_id, gate in self._gates.items()
+            ],
+        )
+
+
+admission_controller = AdmissionController(
+    concurrency=settings.quiz_process.admission_concurrency,
+    queue_size=settings.quiz_process.admission_queue_size,
+    max_wait=settings.quiz_process.admission_max_wait_seconds,
+    rate=settings.quiz_process.admission_rate,
+    burst=settings.quiz_process.admission_burst,
+)
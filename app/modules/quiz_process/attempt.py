@@ -0,0 +1,262 @@
+import hashlib
+import logging
+import time
+import uuid
+from typing import Optional
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from app.core.cache import get_redis
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def answer_hash(question_id: int, answer: str) -> str:
+    """Compact, non-reversible key for one (question, answer) pair."""
+    digest = hashlib.blake2b(f"{question_id}:{answer}".encode(), digest_size=8)
+    return digest.hexdigest()
+
+
+class QuizAttempt(BaseModel):
+    attempt_id: str
+    quiz_id: int
+    user_id: int
+    subject_id: Optional[int]
+    group_id: Optional[int]
+    # attempt_no and seed reproduce the paper (see QuizPaper.sample)
+    attempt_no: int
+    seed: int
+    question_ids: list[int]
+    # question_id -> answer_hash of the correct option
+    answer_key: dict[int, str]
+    started_at: float
+    deadline: float
+
+    def is_correct(self, question_id: int, answer: str) -> bool:
+        return self.answer_key.get(question_id) == answer_hash(question_id, answer)
+
+    def is_over(self) -> bool:
+        """Past the deadline and the grace period allowed for submitting."""
+        return time.time() > self.deadline + settings.quiz_process.attempt_grace_seconds
+
+
+class QuizAttemptStore:
+    """
+    Keeps the server-side state of a started quiz in Redis so that
+    end_quiz can grade without reading the questions table.
+    """
+
+    def _key(self, quiz_id: int, user_id: int) -> str:
+        return f"{settings.redis.prefix}:quiz_attempt:{quiz_id}:{user_id}"
+
+    def _answers_key(self, quiz_id: int, user_id: int) -> str:
+        return f"{settings.redis.prefix}:quiz_attempt:{quiz_id}:{user_id}:answers"
+
+    def _finalized_key(self, quiz_id: int, user_id: int) -> str:
+        return f"{settings.redis.prefix}:quiz_attempt:{quiz_id}:{user_id}:finalized"
+
+    @property
+    def deadlines_key(self) -> str:
+        """Sorted set of open attempts ("quiz_id:user_id") scored by deadline."""
+        return f"{settings.redis.prefix}:quiz_attempt_deadlines"
+
+    def _expires_at(self, attempt: QuizAttempt) -> int:
+        # Outlives the grace period so the sweeper can still finalize it
+        return (
+            int(attempt.deadline)
+            + settings.quiz_process.attempt_grace_seconds
+            + settings.quiz_process.attempt_tombstone_seconds
+        )
+
+    @property
+    def available(self) -> bool:
+        """False without Redis, when attempts are not tracked at all."""
+        return get_redis() is not None
+
+    def new_attempt(
+        self,
+        quiz_id: int,
+        user_id: int,
+        duration: int,
+        subject_id: Optional[int],
+        group_id: Optional[int],
+        attempt_no: int,
+        seed: int,
+        question_ids: list[int],
+        answer_key: dict[int, str],
+    ) -> QuizAttempt:
+        # Quiz.duration is in minutes
+        started_at = time.time()
+        return QuizAttempt(
+            attempt_id=uuid.uuid4().hex,
+            quiz_id=quiz_id,
+            user_id=user_id,
+            subject_id=subject_id,
+            group_id=group_id,
+            attempt_no=attempt_no,
+            seed=seed,
+            question_ids=question_ids,
+            answer_key=answer_key,
+            started_at=started_at,
+            deadline=started_at + duration * 60,
+        )
+
+    async def save(self, attempt: QuizAttempt) -> None:
+        """
+        Raises RedisError: without a stored attempt the sitting could not
+        be submitted, so the paper must not be handed out.
+        """
+        redis = get_redis()
+        if redis is None:
+            return
+
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.set(
+                self._key(attempt.quiz_id, attempt.user_id),
+                attempt.model_dump_json(),
+                exat=self._expires_at(attempt),
+            )
+            pipe.zadd(
+                self.deadlines_key,
+                {f"{attempt.quiz_id}:{attempt.user_id}": attempt.deadline},
+            )
+            # A new attempt, the previous one no longer blocks end_quiz
+            pipe.delete(self._finalized_key(attempt.quiz_id, attempt.user_id))
+            await pipe.execute()
+
+    async def get(self, quiz_id: int, user_id: int) -> Optional[QuizAttempt]:
+        """
+        None when there is no open attempt or no Redis at all. Raises
+        RedisError when Redis is unreachable, which must not pass for
+        "no attempt".
+        """
+        redis = get_redis()
+        if redis is None:
+            return None
+
+        raw = await redis.get(self._key(quiz_id, user_id))
+        if raw is None:
+            return None
+        return QuizAttempt.model_validate_json(raw)
+
+    async def save_answer(
+        self, attempt: QuizAttempt, question_id: int, answer: str
+    ) -> int:
+        """Stores one autosaved answer, returns how many questions are answered."""
+        redis = get_redis()
+        key = self._answers_key(attempt.quiz_id, attempt.user_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, str(question_id), answer)
+            # Lives exactly as long as the attempt itself
+            pipe.expireat(key, self._expires_at(attempt))
+            pipe.hlen(key)
+            _, _, answered = await pipe.execute()
+        return answered
+
+    async def get_answers(self, quiz_id: int, user_id: int) -> dict[int, str]:
+        redis = get_redis()
+        if redis is None:
+            return {}
+
+        try:
+            raw = await redis.hgetall(self._answers_key(quiz_id, user_id))
+        except RedisError as e:
+            logger.warning(f"Failed to read saved answers: {e}")
+            return {}
+        return {int(question_id): answer for question_id, answer in raw.items()}
+
+    async def claim(self, quiz_id: int, user_id: int) -> bool:
+        """
+        Takes the attempt off the deadline index. Only one of end_quiz and
+        the sweeper gets True for the same attempt.
+        """
+        redis = get_redis()
+        if redis is None:
+            return True
+
+        try:
+            return bool(await redis.zrem(self.deadlines_key, f"{quiz_id}:{user_id}"))
+        except RedisError as e:
+            logger.warning(f"Failed to claim quiz attempt: {e}")
+            return True
+
+    async def unclaim(self, attempt: QuizAttempt) -> None:
+        """Puts a claimed attempt back, e.g. when saving its result failed."""
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.zadd(
+                self.deadlines_key,
+                {f"{attempt.quiz_id}:{attempt.user_id}": attempt.deadline},
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to unclaim quiz attempt: {e}")
+
+    async def hold(self, attempt: QuizAttempt, seconds: int) -> None:
+        """Keeps a claimed attempt `seconds` longer, e.g. while it awaits grading."""
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            quiz_id, user_id = attempt.quiz_id, attempt.user_id
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.expire(self._key(quiz_id, user_id), seconds)
+                pipe.expire(self._answers_key(quiz_id, user_id), seconds)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to extend quiz attempt: {e}")
+
+    async def due(self, before: float, limit: int) -> list[tuple[int, int]]:
+        """(quiz_id, user_id) of attempts whose deadline is before `before`."""
+        redis = get_redis()
+        if redis is None:
+            return []
+
+        members = await redis.zrangebyscore(
+            self.deadlines_key, "-inf", before, start=0, num=limit
+        )
+        return [tuple(map(int, member.split(":"))) for member in members]
+
+    async def is_finalized(self, quiz_id: int, user_id: int) -> bool:
+        """Whether the user's last attempt at the quiz already has its result."""
+        redis = get_redis()
+        if redis is None:
+            return False
+
+        try:
+            return bool(await redis.exists(self._finalized_key(quiz_id, user_id)))
+        except RedisError as e:
+            logger.warning(f"Failed to read finalized quiz attempt: {e}")
+            return False
+
+    async def delete(self, quiz_id: int, user_id: int) -> None:
+        """
+        Drops a finalized attempt, leaving a tombstone that outlives the
+        grace period so a late end_quiz is refused.
+        """
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(
+                    self._key(quiz_id, user_id), self._answers_key(quiz_id, user_id)
+                )
+                pipe.zrem(self.deadlines_key, f"{quiz_id}:{user_id}")
+                pipe.set(
+                    self._finalized_key(quiz_id, user_id),
+                    "1",
+                    ex=settings.quiz_process.attempt_tombstone_seconds,
+                )
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to delete quiz attempt: {e}")
+
+
+quiz_attempt_store = QuizAttemptStore()
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from core.config import settings
+from core.db_helper import db_helper
+
+from .schemas import GradedSubmission
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionBatcher:
+    """
+    Group commit for graded submissions.
+
+    Callers of save() that arrive within window_ms of each other are
+    written by a single save(batch) call, i.e. one transaction and one
+    multi-row INSERT per table. Each caller's future resolves once that
+    shared commit is done, so the caller still sees a synchronous save.
+    """
+
+    def __init__(
+        self,
+        save: Callable[[list[GradedSubmission]], Awaitable[None]],
+        window_ms: int,
+        max_batch: int,
+    ):
+        self._save = save
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: list[tuple[GradedSubmission, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def save(self, submission: GradedSubmission) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((submission, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_now)
+
+        await future
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(
+        self, batch: list[tuple[GradedSubmission, asyncio.Future]]
+    ) -> None:
+        try:
+            await self._save([submission for submission, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0][1], e)
+                return
+            logger.warning(
+                f"Group commit of {len(batch)} submissions failed, "
+                f"retrying one by one: {e}"
+            )
+            # One bad submission must not fail everybody else's
+            for submission, future in batch:
+                try:
+                    await self._save([submission])
+                    self._resolve(future)
+                except Exception as single_error:
+                    self._resolve(future, single_error)
+            return
+
+        for _, future in batch:
+            self._resolve(future)
+
+    def _resolve(self, future: asyncio.Future, error: Exception | None = None) -> None:
+        if future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+
+async def _save_in_own_session(submissions: list[GradedSubmission]) -> None:
+    from .repository import get_quiz_process_repository
+
+    async with db_helper.session_factory() as session:
+        await get_quiz_process_repository.save_submissions(session, submissions)
+
+
+submission_batcher = SubmissionBatcher(
+    save=_save_in_own_session,
+    window_ms=settings.quiz_process.group_commit_window_ms,
+    max_batch=settings.quiz_process.group_commit_max_batch,
+)
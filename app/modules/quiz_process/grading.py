@@ -0,0 +1,305 @@
+import asyncio
+import logging
+import os
+import socket
+from typing import Optional
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from redis.exceptions import RedisError, ResponseError
+
+from app.core.cache import get_redis
+from app.models.user.model import User
+from core.config import settings
+from core.db_helper import db_helper
+
+from .attempt import quiz_attempt_store
+from .repository import get_quiz_process_repository
+from .schemas import (
+    EndQuizAcceptedResponse,
+    EndQuizRequest,
+    EndQuizResponse,
+    GradedSubmission,
+)
+
+logger = logging.getLogger(__name__)
+
+CONSUMER_GROUP = "graders"
+# Entries a crashed worker left unacknowledged are re-claimed after this long
+CLAIM_IDLE_MS = 60_000
+
+
+class SubmissionStatus(BaseModel):
+    status: str  # pending | done | failed
+    user_id: int
+    result: Optional[EndQuizResponse] = None
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class QuizSubmissionQueue:
+    """
+    Durable Redis stream of end_quiz submissions, plus a per-attempt
+    status key that the polling endpoint reads.
+    """
+
+    @property
+    def stream_key(self) -> str:
+        return f"{settings.redis.prefix}:quiz_submissions"
+
+    def _status_key(self, attempt_id: str) -> str:
+        return f"{settings.redis.prefix}:quiz_submission:{attempt_id}"
+
+    async def submit(self, data: EndQuizRequest, user: User) -> EndQuizAcceptedResponse:
+        redis = get_redis()
+        if redis is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Grading queue is unavailable",
+            )
+
+        attempt = await get_quiz_process_repository.get_attempt(data.quiz_id, user.id)
+        if not attempt and await quiz_attempt_store.is_finalized(data.quiz_id, user.id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Quiz attempt was already submitted",
+            )
+        if not attempt:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No active attempt for this quiz",
+            )
+        if attempt.is_over():
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Quiz time is over"
+            )
+
+        # Same check the grader does, but before anything is queued
+        issued = set(attempt.question_ids)
+        for ans in data.answers:
+            if ans.question_id not in issued:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid question_id: {ans.question_id}"
+                )
+        attempt_id = attempt.attempt_id
+        pending = SubmissionStatus(status="pending", user_id=user.id)
+        try:
+            # Queued for grading, so the sweeper must leave it alone, and the
+            # grader still needs it after the deadline
+            if not await quiz_attempt_store.claim(data.quiz_id, user.id):
+                current = await self.get_status(attempt_id)
+                if current is None:
+                    # Not queued by us: the sweeper is finalizing it
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Quiz attempt is already being finalized",
+                    )
+                if current.status != "failed":
+                    # A double submit of an attempt already queued
+                    return EndQuizAcceptedResponse(
+                        attempt_id=attempt_id, status=current.status
+                    )
+            await quiz_attempt_store.hold(
+                attempt, settings.quiz_process.grading_result_ttl_seconds
+            )
+
+            # nx: a double submit of the same attempt is queued only once
+            queued = await redis.set(
+                self._status_key(attempt_id),
+                pending.model_dump_json(),
+                nx=True,
+                ex=settings.quiz_process.grading_result_ttl_seconds,
+            )
+            if not queued:
+                current = await self.get_status(attempt_id)
+                if current and current.status != "failed":
+                    return EndQuizAcceptedResponse(
+                        attempt_id=attempt_id, status=current.status
+                    )
+                await self.set_status(attempt_id, pending)
+
+            await redis.xadd(
+                self.stream_key,
+                {
+                    "attempt_id": attempt_id,
+                    "user_id": user.id,
+                    "payload": data.model_dump_json(),
+                },
+            )
+        except RedisError as e:
+            logger.error(f"Failed to enqueue submission {attempt_id}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Grading queue is unavailable",
+            )
+
+        return EndQuizAcceptedResponse(attempt_id=attempt_id)
+
+    async def get_status(self, attempt_id: str) -> Optional[SubmissionStatus]:
+        redis = get_redis()
+        if redis is None:
+            return None
+
+        raw = await redis.get(self._status_key(attempt_id))
+        if raw is None:
+            return None
+        return SubmissionStatus.model_validate_json(raw)
+
+    async def set_status(
+        self, attempt_id: str, submission_status: SubmissionStatus
+    ) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+
+        await redis.set(
+            self._status_key(attempt_id),
+            submission_status.model_dump_json(),
+            ex=settings.quiz_process.grading_result_ttl_seconds,
+        )
+
+
+class GradingWorkerPool:
+    """
+    Background consumers of the submission stream. Each worker grades
+    and persists up to batch_size submissions per transaction.
+    """
+
+    def __init__(self, size: int, batch_size: int):
+        self.size = size
+        self.batch_size = batch_size
+        self.consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        redis = get_redis()
+        if redis is None:
+            logger.warning("Redis is not initialised, grading workers not started")
+            return
+
+        try:
+            await redis.xgroup_create(
+                quiz_submission_queue.stream_key, CONSUMER_GROUP, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        for i in range(self.size):
+            consumer = f"{self.consumer_prefix}-{i}"
+            self._tasks.append(asyncio.create_task(self._run(consumer)))
+        logger.info(f"Started {self.size} grading workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        logger.info("Stopped grading workers")
+
+    async def _run(self, consumer: str) -> None:
+        stream = quiz_submission_queue.stream_key
+        while True:
+            try:
+                redis = get_redis()
+                claimed = await redis.xautoclaim(
+                    stream,
+                    CONSUMER_GROUP,
+                    consumer,
+                    min_idle_time=CLAIM_IDLE_MS,
+                    start_id="0-0",
+                    count=self.batch_size,
+                )
+                entries = [entry for entry in claimed[1] if entry[1]]
+
+                if not entries:
+                    response = await redis.xreadgroup(
+                        CONSUMER_GROUP,
+                        consumer,
+                        {stream: ">"},
+                        count=self.batch_size,
+                        block=1000,
+                    )
+                    entries = response[0][1] if response else []
+
+                if entries:
+                    await self.process_batch(entries)
+                    entry_ids = [entry_id for entry_id, _ in entries]
+                    await redis.xack(stream, CONSUMER_GROUP, *entry_ids)
+                    await redis.xdel(stream, *entry_ids)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Grading worker {consumer} failed: {e}")
+                await asyncio.sleep(1)
+
+    async def process_batch(self, entries: list) -> None:
+        repository = get_quiz_process_repository
+        graded: list[tuple[str, GradedSubmission]] = []
+
+        async with db_helper.session_factory() as session:
+            for _, fields in entries:
+                attempt_id = fields["attempt_id"]
+                user_id = int(fields["user_id"])
+
+                current = await quiz_submission_queue.get_status(attempt_id)
+                if current and current.status == "done":
+                    # Redelivered after the result was already stored
+                    continue
+
+                data = EndQuizRequest.model_validate_json(fields["payload"])
+                try:
+                    submission = await repository.grade_submission(
+                        session, data, user_id
+                    )
+                except HTTPException as e:
+                    await self._fail(attempt_id, user_id, e)
+                    continue
+                graded.append((attempt_id, submission))
+
+            if not graded:
+                return
+
+            try:
+                await repository.save_submissions(session, [s for _, s in graded])
+                saved = graded
+            except HTTPException:
+                # Save one by one so a single bad row does not fail the batch
+                saved = []
+                for attempt_id, submission in graded:
+                    try:
+                        await repository.save_submissions(session, [submission])
+                        saved.append((attempt_id, submission))
+                    except HTTPException as e:
+                        await self._fail(attempt_id, submission.user_id, e)
+
+        for attempt_id, submission in saved:
+            await quiz_submission_queue.set_status(
+                attempt_id,
+                SubmissionStatus(
+                    status="done",
+                    user_id=submission.user_id,
+                    result=submission.to_response(),
+                ),
+            )
+            await quiz_attempt_store.delete(submission.quiz_id, submission.user_id)
+
+    async def _fail(self, attempt_id: str, user_id: int, error: HTTPException) -> None:
+        await quiz_submission_queue.set_status(
+            attempt_id,
+            SubmissionStatus(
+                status="failed",
+                user_id=user_id,
+                status_code=error.status_code,
+                detail=str(error.detail),
+            ),
+        )
+
+
+quiz_submission_queue = QuizSubmissionQueue()
+
+grading_workers = GradingWorkerPool(
+    size=settings.quiz_process.grading_workers,
+    batch_size=settings.quiz_process.grading_batch_size,
+)
@@ -0,0 +1,344 @@
+import hashlib
+import logging
+import random
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.cache import get_redis
+from app.models.quiz.model import Quiz
+from app.models.quiz_questions.model import QuizQuestion
+from core.config import settings
+
+from .attempt import answer_hash
+from .schemas import QuestionDTO, StartQuizResponse
+
+logger = logging.getLogger(__name__)
+
+
+def _seed(key: str) -> int:
+    # Fits a signed BIGINT so it can be stored on Result
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") >> 1
+
+
+def paper_seed(quiz_id: int, user_id: int, attempt_no: int) -> int:
+    """Seed of one sitting."""
+    return _seed(f"{quiz_id}:{user_id}:{attempt_no}")
+
+
+def variant_seed(quiz_id: int, index: int) -> int:
+    """Seed of the index-th pre-rendered variant of a quiz."""
+    return _seed(f"{quiz_id}:variant:{index}")
+
+
+class PaperQuestion(BaseModel):
+    id: int
+    text: str
+    option_a: str
+    option_b: str
+    option_c: str
+    option_d: str
+
+    model_config = ConfigDict(frozen=True)
+
+    def to_dict(self, randomize_options: bool = True, seed: Optional[int] = None):
+        """
+        Same shape as Question.to_dict (option A is the correct one).
+        With a seed the option order depends only on (seed, question id).
+        """
+        options = [self.option_a, self.option_b, self.option_c, self.option_d]
+        if randomize_options:
+            rng = random if seed is None else random.Random(f"{seed}:{self.id}")
+            rng.shuffle(options)
+
+        return {
+            "id": self.id,
+            "text": self.text,
+            "options": options,
+        }
+
+
+class QuizPaper(BaseModel):
+    """Immutable snapshot of a quiz and its question pool."""
+
+    quiz_id: int
+    title: str
+    duration: int
+    question_number: int
+    pin: str
+    is_active: bool
+    group_id: Optional[int]
+    subject_id: Optional[int]
+    questions: tuple[PaperQuestion, ...]
+
+    model_config = ConfigDict(frozen=True)
+
+    def sample(self, seed: int) -> list[PaperQuestion]:
+        """The question_number questions handed out for this seed, in order."""
+        questions = list(self.questions)
+        random.Random(seed).shuffle(questions)
+        return questions[:self.question_number]
+
+    def select(self, question_ids: list[int]) -> list[PaperQuestion]:
+        """Questions of an earlier sample, skipping ones since removed from the pool."""
+        by_id = {q.id: q for q in self.questions}
+        return [by_id[qid] for qid in question_ids if qid in by_id]
+
+    def render(
+        self, seed: int, questions: Optional[list[PaperQuestion]] = None
+    ) -> "PaperVariant":
+        """Serializes the paper for seed, or for an explicit list of questions."""
+        if questions is None:
+            questions = self.sample(seed)
+
+        question_dtos = []
+        for q in questions:
+            q_dict = q.to_dict(randomize_options=True, seed=seed)
+            opts = q_dict["options"]
+            question_dtos.append(
+                QuestionDTO(
+                    id=q_dict["id"],
+                    text=q_dict["text"],
+                    option_a=opts[0],
+                    option_b=opts[1],
+                    option_c=opts[2],
+                    option_d=opts[3],
+                )
+            )
+
+        response = StartQuizResponse(
+            quiz_id=self.quiz_id,
+            title=self.title,
+            duration=self.duration,
+            questions=question_dtos,
+        )
+        return PaperVariant(
+            seed=seed,
+            question_ids=[q.id for q in questions],
+            answer_key={q.id: answer_hash(q.id, q.option_a) for q in questions},
+            body=response.model_dump_json(),
+        )
+
+
+class PaperVariant(BaseModel):
+    """A rendered paper: the StartQuizResponse JSON plus what grading needs."""
+
+    seed: int
+    question_ids: list[int]
+    answer_key: dict[int, str]
+    body: str
+
+    model_config = ConfigDict(frozen=True)
+
+
+class QuizPaperCache:
+    """
+    Two-level cache (in-process LRU + Redis) of QuizPaper snapshots.
+
+    Papers are keyed by quiz id and a version token kept in Redis.
+    Invalidation just replaces the token, so every worker misses on
+    its next lookup and the old entries expire on their own.
+
+    Each paper version can also have `variants` pre-rendered papers,
+    so handing one out is a lookup instead of a shuffle and a dump. The
+    price is that attempts share those few papers; with variants=0
+    (the default) every attempt is rendered from its own seed.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int, variants: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.variants = variants
+        self._memory: OrderedDict[tuple[int, str], QuizPaper] = OrderedDict()
+        self._variants: dict[tuple[int, str], dict[int, PaperVariant]] = {}
+
+    def _version_key(self, quiz_id: int) -> str:
+        return f"{settings.redis.prefix}:quiz_paper:{quiz_id}:version"
+
+    def _paper_key(self, quiz_id: int, version: str) -> str:
+        return f"{settings.redis.prefix}:quiz_paper:{quiz_id}:{version}"
+
+    def _variants_key(self, quiz_id: int, version: str) -> str:
+        return f"{settings.redis.prefix}:quiz_paper:{quiz_id}:{version}:variants"
+
+    async def get_paper(
+        self, session: AsyncSession, quiz_id: int
+    ) -> Optional[QuizPaper]:
+        redis = get_redis()
+        if redis is None:
+            return await self.build_paper(session, quiz_id)
+
+        try:
+            version = await self._get_version(redis, quiz_id)
+
+            paper = self._memory.get((quiz_id, version))
+            if paper is not None:
+                self._memory.move_to_end((quiz_id, version))
+                return paper
+
+            raw = await redis.get(self._paper_key(quiz_id, version))
+            if raw is not None:
+                paper = QuizPaper.model_validate_json(raw)
+            else:
+                paper = await self.build_paper(session, quiz_id)
+                if paper is None:
+                    return None
+                await redis.set(
+                    self._paper_key(quiz_id, version),
+                    paper.model_dump_json(),
+                    ex=self.ttl_seconds,
+                )
+        except RedisError as e:
+            logger.warning(f"Quiz paper cache unavailable, reading from DB: {e}")
+            return await self.build_paper(session, quiz_id)
+
+        self._remember((quiz_id, version), paper)
+        return paper
+
+    async def invalidate(self, *quiz_ids: int) -> None:
+        if not quiz_ids:
+            return
+
+        for key in [k for k in self._memory if k[0] in quiz_ids]:
+            del self._memory[key]
+        for key in [k for k in self._variants if k[0] in quiz_ids]:
+            del self._variants[key]
+
+        redis = get_redis()
+        if redis is None:
+            return
+
+        try:
+            await redis.mset(
+                {self._version_key(quiz_id): uuid.uuid4().hex for quiz_id in quiz_ids}
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to invalidate quiz papers {quiz_ids}: {e}")
+
+    async def get_variant(self, paper: QuizPaper, seed: int) -> PaperVariant:
+        """The pre-rendered variant that seed maps to, rendered lazily if missing."""
+        if self.variants <= 0:
+            return paper.render(seed)
+
+        index = seed % self.variants
+        redis = get_redis()
+        if redis is None:
+            return paper.render(variant_seed(paper.quiz_id, index))
+
+        try:
+            version = await self._get_version(redis, paper.quiz_id)
+            local = self._variants.get((paper.quiz_id, version))
+            if local is not None and index in local:
+                return local[index]
+
+            key = self._variants_key(paper.quiz_id, version)
+            raw = await redis.hget(key, str(index))
+            if raw is not None:
+                variant = PaperVariant.model_validate_json(raw)
+            else:
+                variant = paper.render(variant_seed(paper.quiz_id, index))
+                await redis.hset(key, str(index), variant.model_dump_json())
+                await redis.expire(key, self.ttl_seconds)
+        except RedisError as e:
+            logger.warning(f"Paper variants unavailable, rendering on demand: {e}")
+            return paper.render(variant_seed(paper.quiz_id, index))
+
+        if (paper.quiz_id, version) in self._memory:
+            self._variants.setdefault((paper.quiz_id, version), {})[index] = variant
+        return variant
+
+    async def prepare_variants(self, session: AsyncSession, quiz_id: int) -> None:
+        """Renders every variant of the current paper up front."""
+        redis = get_redis()
+        if self.variants <= 0 or redis is None:
+            return
+
+        paper = await self.get_paper(session, quiz_id)
+        if paper is None:
+            return
+
+        variants = {
+            index: paper.render(variant_seed(quiz_id, index))
+            for index in range(self.variants)
+        }
+        try:
+            version = await self._get_version(redis, quiz_id)
+            key = self._variants_key(quiz_id, version)
+            await redis.hset(
+                key,
+                mapping={str(i): v.model_dump_json() for i, v in variants.items()},
+            )
+            await redis.expire(key, self.ttl_seconds)
+        except RedisError as e:
+            logger.warning(f"Failed to store variants of quiz {quiz_id}: {e}")
+            return
+
+        if (quiz_id, version) in self._memory:
+            self._variants[(quiz_id, version)] = variants
+
+    async def build_paper(
+        self, session: AsyncSession, quiz_id: int
+    ) -> Optional[QuizPaper]:
+        stmt = (
+            select(Quiz)
+            .options(selectinload(Quiz.quiz_questions).selectinload(QuizQuestion.question))
+            .where(Quiz.id == quiz_id)
+        )
+        result = await session.execute(stmt)
+        quiz = result.scalar_one_or_none()
+
+        if not quiz:
+            return None
+
+        return QuizPaper(
+            quiz_id=quiz.id,
+            title=quiz.title,
+            duration=quiz.duration,
+            question_number=quiz.question_number,
+            pin=quiz.pin,
+            is_active=quiz.is_active,
+            group_id=quiz.group_id,
+            subject_id=quiz.subject_id,
+            questions=tuple(
+                PaperQuestion(
+                    id=qq.question.id,
+                    text=qq.question.text,
+                    option_a=qq.question.option_a,
+                    option_b=qq.question.option_b,
+                    option_c=qq.question.option_c,
+                    option_d=qq.question.option_d,
+                )
+                # Sorted so that a seed picks the same sample on every worker
+                for qq in sorted(quiz.quiz_questions, key=lambda qq: qq.question_id)
+                if qq.question
+            ),
+        )
+
+    async def _get_version(self, redis, quiz_id: int) -> str:
+        version = await redis.get(self._version_key(quiz_id))
+        if version is None:
+            # nx: concurrent first readers must agree on a single token
+            await redis.set(self._version_key(quiz_id), uuid.uuid4().hex, nx=True)
+            version = await redis.get(self._version_key(quiz_id))
+        return version
+
+    def _remember(self, key: tuple[int, str], paper: QuizPaper) -> None:
+        self._memory[key] = paper
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            evicted, _ = self._memory.popitem(last=False)
+            self._variants.pop(evicted, None)
+
+
+quiz_paper_cache = QuizPaperCache(
+    max_size=settings.quiz_process.paper_cache_size,
+    ttl_seconds=settings.quiz_process.paper_cache_ttl_seconds,
+    variants=settings.quiz_process.paper_variants,
+)
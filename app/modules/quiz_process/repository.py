@@ -1,38 +1,47 @@
-from fastapi import HTTPException, status
-from sqlalchemy import select
+import logging
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.models.quiz.model import Quiz
 from app.models.question.model import Question
 from app.models.results.model import Result
 from app.models.quiz_questions.model import QuizQuestion
-from app.models.quiz_questions.model import QuizQuestion
 from app.models.user_answers.model import UserAnswers
 from app.models.student.model import Student
 from app.models.user.model import User
+from app.modules.statistics import rollup as stats_rollup
+from app.modules.statistics.item_analysis import item_analysis
+from app.modules.statistics.leaderboard import leaderboard, submitted_at_epoch
+from core.config import settings
 
+from .attempt import QuizAttempt, quiz_attempt_store
+from .batcher import submission_batcher
+from .paper import paper_seed, quiz_paper_cache
 from .schemas import (
     StartQuizRequest,
-    StartQuizResponse,
+    AnswerDTO,
     EndQuizRequest,
     EndQuizResponse,
-    QuestionDTO,
+    GradedAnswer,
+    GradedSubmission,
+    SaveAnswerRequest,
+    SaveAnswerResponse,
 )
-import random
+
+logger = logging.getLogger(__name__)
 
 class QuizProcessRepository:
     async def start_quiz(
         self, session: AsyncSession, data: StartQuizRequest, user: User
-    ) -> StartQuizResponse:
-        # Fetch quiz with questions
-        stmt = (
-            select(Quiz)
-            .options(selectinload(Quiz.quiz_questions).selectinload(QuizQuestion.question))
-            .where(Quiz.id == data.quiz_id)
-        )
-        result = await session.execute(stmt)
-        quiz = result.scalar_one_or_none()
+    ) -> Response:
+        # Quiz metadata and question pool come from the shared paper cache
+        quiz = await quiz_paper_cache.get_paper(session, data.quiz_id)
 
         if not quiz:
             raise HTTPException(
@@ -80,148 +89,388 @@ class QuizProcessRepository:
                  pass
 
 
-        # Prepare questions with shuffled options
-        question_dtos = []
-        # Accessing questions via quiz_questions association
-        # quiz.quiz_questions is a list of QuizQuestion objects
-        # each has a .question attribute
-        
-        # We might want to limit the number of questions if quiz.question_number is set
-        # But for now, let's take all or slice? 
-        # The user didn't specify random selection logic from pool, so let's assume all linked questions or slice.
-        # Let's shuffle the questions themselves too?
-        
-        quiz_questions = [qq.question for qq in quiz.quiz_questions if qq.question]
-        
-        # Determine how many questions to show
-        num_questions = quiz.question_number
-        if len(quiz_questions) > num_questions:
-            random.shuffle(quiz_questions)
-            quiz_questions = quiz_questions[:num_questions]
+        # The paper is a pure function of a seed. A new attempt takes the
+        # pre-rendered variant its (quiz_id, user_id, attempt number) seed
+        # maps to; a reload while the attempt is open gets the same questions
+        # in the same order, and a result can be reviewed from its stored seed.
+        attempt = await self.get_attempt(quiz.quiz_id, user.id)
+        if attempt and not attempt.is_over():
+            paper = quiz.render(attempt.seed, quiz.select(attempt.question_ids))
         else:
-            random.shuffle(quiz_questions)
+            if attempt:
+                # Over but never finalized; its autosaved answers must not
+                # carry over into the new attempt
+                await quiz_attempt_store.delete(quiz.quiz_id, user.id)
+            attempt_no = await self._next_attempt_no(session, quiz.quiz_id, user.id)
+            seed = paper_seed(quiz.quiz_id, user.id, attempt_no)
+            paper = await quiz_paper_cache.get_variant(quiz, seed)
 
-        for q in quiz_questions:
-            q_dict = q.to_dict(randomize_options=True)
-            opts = q_dict["options"]
-            
-            question_dtos.append(
-                QuestionDTO(
-                    id=q_dict["id"],
-                    text=q_dict["text"],
-                    option_a=opts[0],
-                    option_b=opts[1],
-                    option_c=opts[2],
-                    option_d=opts[3],
-                )
+            # Remember what was handed out so end_quiz can grade without the DB
+            attempt = quiz_attempt_store.new_attempt(
+                quiz_id=quiz.quiz_id,
+                user_id=user.id,
+                duration=quiz.duration,
+                subject_id=quiz.subject_id,
+                group_id=quiz.group_id,
+                attempt_no=attempt_no,
+                seed=paper.seed,
+                question_ids=paper.question_ids,
+                answer_key=paper.answer_key,
             )
+            try:
+                await quiz_attempt_store.save(attempt)
+            except RedisError as e:
+                logger.error(f"Failed to store quiz attempt: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Quiz attempt could not be started",
+                )
 
-        return StartQuizResponse(
-            quiz_id=quiz.id,
-            title=quiz.title,
-            duration=quiz.duration,
-            questions=question_dtos
-        )
+        # Already serialized StartQuizResponse
+        return Response(content=paper.body, media_type="application/json")
 
     async def end_quiz(
         self, session: AsyncSession, data: EndQuizRequest, user: User
     ) -> EndQuizResponse:
-        # Fetch quiz to get subject/group info if needed, or just for verification
-        stmt = select(Quiz).where(Quiz.id == data.quiz_id)
-        result = await session.execute(stmt)
-        quiz = result.scalar_one_or_none()
-        
-        if not quiz:
+        attempt = await self.get_attempt(data.quiz_id, user.id)
+        if attempt is None and await quiz_attempt_store.is_finalized(data.quiz_id, user.id):
+            # e.g. the sweeper finalized it after the deadline
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found"
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Quiz attempt was already submitted",
             )
+        if attempt and attempt.is_over():
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Quiz time is over"
+            )
+        submission = await self.grade_submission(session, data, user.id, attempt)
 
-        correct_count = 0
-        wrong_count = 0
-        
-        # Efficiently fetch all relevant questions to check answers
-        question_ids = [ans.question_id for ans in data.answers]
-        if not question_ids:
-             # No answers submitted?
-             pass
-             
-        # Fetch questions
-        q_stmt = select(Question).where(Question.id.in_(question_ids))
-        q_result = await session.execute(q_stmt)
-        questions_map = {q.id: q for q in q_result.scalars().all()}
-        
-        # Validate that all question IDs exist
-        # If any question_id from answers is not in questions_map, it's invalid
-        for ans in data.answers:
-            if ans.question_id not in questions_map:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid question_id: {ans.question_id}"
-                )
+        # The sweeper may be finalizing the same attempt after its deadline
+        if attempt and not await quiz_attempt_store.claim(data.quiz_id, user.id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Quiz attempt is already being finalized",
+            )
 
-        for ans in data.answers:
-            question = questions_map.get(ans.question_id)
-            is_correct = False
-            if question:
-                # Option A is always correct
-                if ans.answer == question.option_a:
-                    correct_count += 1
-                    is_correct = True
-                else:
-                    wrong_count += 1
+        try:
+            if settings.quiz_process.group_commit:
+                await submission_batcher.save(submission)
             else:
-                # Question not found? Count as wrong?
-                wrong_count += 1
-            
-            # Save user answer
-            user_answer = UserAnswers(
-                user_id=user.id,
-                quiz_id=data.quiz_id,
-                question_id=ans.question_id,
-                answer=ans.answer,
-                is_correct=is_correct
+                await self.save_submissions(session, [submission])
+        except Exception:
+            if attempt:
+                await quiz_attempt_store.unclaim(attempt)
+            raise
+        await quiz_attempt_store.delete(data.quiz_id, user.id)
+        return submission.to_response()
+
+    async def save_answer(
+        self, data: SaveAnswerRequest, user: User
+    ) -> SaveAnswerResponse:
+        # Redis only: autosave must stay cheap for the whole exam
+        attempt = await self.get_attempt(data.quiz_id, user.id)
+        if not attempt:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No active attempt for this quiz",
             )
-            session.add(user_answer)
-        
-        total_questions = len(data.answers) # Or strictly correct + wrong
-        
+
+        if data.question_id not in attempt.question_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid question_id: {data.question_id}"
+            )
+
+        if time.time() > attempt.deadline:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Quiz time is over"
+            )
+
+        try:
+            answered = await quiz_attempt_store.save_answer(
+                attempt, data.question_id, data.answer
+            )
+        except RedisError as e:
+            logger.error(f"Failed to autosave answer: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Answer could not be saved",
+            )
+
+        return SaveAnswerResponse(
+            quiz_id=data.quiz_id, question_id=data.question_id, answered=answered
+        )
+
+    async def get_attempt(self, quiz_id: int, user_id: int) -> Optional[QuizAttempt]:
+        try:
+            return await quiz_attempt_store.get(quiz_id, user_id)
+        except RedisError as e:
+            # Not a missing attempt: answering 404 would lose the sitting
+            logger.error(f"Failed to read quiz attempt: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Quiz attempts are unavailable",
+            )
+
+    async def _next_attempt_no(
+        self, session: AsyncSession, quiz_id: int, user_id: int
+    ) -> int:
+        stmt = select(func.count(Result.id)).where(
+            Result.quiz_id == quiz_id, Result.user_id == user_id
+        )
+        return (await session.scalar(stmt) or 0) + 1
+
+    async def grade_submission(
+        self,
+        session: AsyncSession,
+        data: EndQuizRequest,
+        user_id: int,
+        attempt: Optional[QuizAttempt] = None,
+    ) -> GradedSubmission:
+        # One answer per question, the last one sent wins; otherwise a
+        # correct answer sent N times would count N times
+        answers = {ans.question_id: ans for ans in data.answers}
+        data = data.model_copy(update={"answers": list(answers.values())})
+
+        # Grade from the attempt recorded by start_quiz. Only without Redis,
+        # where no attempt is ever recorded, fall back to the quiz's questions
+        if attempt is None:
+            attempt = await self.get_attempt(data.quiz_id, user_id)
+        if attempt is None and quiz_attempt_store.available:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No active attempt for this quiz",
+            )
+
+        seed = attempt_id = None
+        if attempt:
+            subject_id = attempt.subject_id
+            group_id = attempt.group_id
+            seed = attempt.seed
+            attempt_id = attempt.attempt_id
+            data = await self._merge_saved_answers(attempt, data)
+            graded = self._grade_from_attempt(attempt, data)
+        else:
+            stmt = select(Quiz).where(Quiz.id == data.quiz_id)
+            result = await session.execute(stmt)
+            quiz = result.scalar_one_or_none()
+
+            if not quiz:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found"
+                )
+            if not quiz.is_active:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Quiz is not active"
+                )
+
+            subject_id = quiz.subject_id
+            # Same as start_quiz records on the attempt
+            group_id = quiz.group_id
+            graded = await self._grade_from_db(session, data)
+
+        correct_count = sum(1 for _, is_correct in graded if is_correct)
+        # Out of the whole paper: an unanswered question counts as wrong
+        if attempt:
+            total_questions = len(attempt.question_ids)
+        else:
+            total_questions = len(data.answers)
+        wrong_count = total_questions - correct_count
+
         # Calculate grade (0-100)
         grade = 0
         if total_questions > 0:
             grade = int((correct_count / total_questions) * 100)
-            
-        # Create Result
-        # Assuming user_id is passed or handled via auth in router (for now relying on request data)
-        # Note: Result model expects integer for grade
-        
-        result = Result(
-            user_id=user.id, # Use authenticated user ID
-            quiz_id=quiz.id,
-            subject_id=quiz.subject_id,
-            group_id=quiz.group_id, # This takes group from quiz, but maybe should take from user? 
-                                    # Result model has group_id. Let's use quiz.group_id for now as context.
+
+        return GradedSubmission(
+            user_id=user_id, # Use authenticated user ID
+            quiz_id=data.quiz_id,
+            subject_id=subject_id,
+            group_id=group_id,
+            answers=[
+                GradedAnswer(
+                    question_id=ans.question_id,
+                    answer=ans.answer,
+                    is_correct=is_correct,
+                )
+                for ans, is_correct in graded
+            ],
+            total_questions=total_questions,
             correct_answers=correct_count,
             wrong_answers=wrong_count,
-            grade=grade
+            grade=grade,
+            seed=seed,
+            attempt_id=attempt_id,
         )
-        session.add(result)
-        
+
+    async def save_submissions(
+        self, session: AsyncSession, submissions: list[GradedSubmission]
+    ) -> list[int]:
+        """
+        Persists graded submissions in one transaction: one multi-row
+        INSERT ... RETURNING for the results and one for all the answers,
+        whatever the number of submissions or questions, plus the
+        statistics rollup deltas. Their item analyses are queued for a
+        refresh and the grades put on the leaderboards.
+
+        Saving is idempotent per attempt: a submission whose attempt_id
+        already has a result (a redelivered queue entry, say) is skipped
+        along with its answers. Returns the new Result ids.
+        """
+        if not submissions:
+            return []
+        # The same attempt may come twice in one batch, e.g. redelivered
+        submissions = list(
+            {s.attempt_id or id(s): s for s in submissions}.values()
+        )
+
+        # Note: Result model expects integer for grade
+        result_stmt = (
+            insert(Result)
+            .values([
+                {
+                    "user_id": s.user_id,
+                    "quiz_id": s.quiz_id,
+                    "subject_id": s.subject_id,
+                    "group_id": s.group_id,
+                    "correct_answers": s.correct_answers,
+                    "wrong_answers": s.wrong_answers,
+                    "grade": s.grade,
+                    "seed": s.seed,
+                    "attempt_id": s.attempt_id,
+                }
+                for s in submissions
+            ])
+            .on_conflict_do_nothing(index_elements=[Result.attempt_id])
+            .returning(
+                Result.id,
+                Result.attempt_id,
+                submitted_at_epoch().label("submitted_at"),
+            )
+        )
+
         try:
+            result = (await session.execute(result_stmt)).all()
+            result_ids = [row.id for row in result]
+
+            # Submissions without an attempt never conflict
+            inserted = {row.attempt_id for row in result}
+            submissions = [
+                s for s in submissions if s.attempt_id is None or s.attempt_id in inserted
+            ]
+            answer_rows = [
+                {
+                    "user_id": s.user_id,
+                    "quiz_id": s.quiz_id,
+                    "question_id": ans.question_id,
+                    "answer": ans.answer,
+                    "is_correct": ans.is_correct,
+                    "attempt_id": s.attempt_id,
+                }
+                for s in submissions
+                for ans in s.answers
+            ]
+            rollup_rows = [
+                {
+                    "user_id": s.user_id,
+                    "quiz_id": s.quiz_id,
+                    "subject_id": s.subject_id,
+                    "group_id": s.group_id,
+                    "grade": s.grade,
+                }
+                for s in submissions
+            ]
+
+            if answer_rows:
+                await session.execute(insert(UserAnswers).values(answer_rows))
+            await session.run_sync(
+                lambda sync_session: stats_rollup.add_results(
+                    sync_session.connection(), rollup_rows
+                )
+            )
             await session.commit()
-            await session.refresh(result)
-        except Exception as e:
+        except Exception:
             await session.rollback()
-            print(f"Error saving result: {e}") # Debug print
+            logger.exception("Failed to save quiz results")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Database error while saving result: {e}",
+                detail="Database error while saving result",
             )
 
-        return EndQuizResponse(
-            total_questions=total_questions,
-            correct_answers=correct_count,
-            wrong_answers=wrong_count,
-            grade=float(grade)
+        if not result:
+            return []
+        await item_analysis.mark_dirty(rollup_rows)
+        # One transaction, one created_at
+        await leaderboard.add(
+            [{**row, "submitted_at": result[0].submitted_at} for row in rollup_rows]
+        )
+        return result_ids
+
+    async def _merge_saved_answers(
+        self, attempt: QuizAttempt, data: EndQuizRequest
+    ) -> EndQuizRequest:
+        saved = await quiz_attempt_store.get_answers(attempt.quiz_id, attempt.user_id)
+        if not saved:
+            return data
+
+        # Answers sent with end_quiz win over the autosaved ones
+        submitted = {ans.question_id: ans for ans in data.answers}
+        answers = [
+            AnswerDTO(question_id=question_id, answer=saved[question_id])
+            for question_id in attempt.question_ids
+            if question_id in saved and question_id not in submitted
+        ]
+        return data.model_copy(update={"answers": answers + data.answers})
+
+    def _grade_from_attempt(
+        self, attempt: QuizAttempt, data: EndQuizRequest
+    ) -> list[tuple[AnswerDTO, bool]]:
+        issued = set(attempt.question_ids)
+
+        # Only questions handed out by start_quiz may be answered
+        for ans in data.answers:
+            if ans.question_id not in issued:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid question_id: {ans.question_id}"
+                )
+
+        return [
+            (ans, attempt.is_correct(ans.question_id, ans.answer))
+            for ans in data.answers
+        ]
+
+    async def _grade_from_db(
+        self, session: AsyncSession, data: EndQuizRequest
+    ) -> list[tuple[AnswerDTO, bool]]:
+        # Efficiently fetch all relevant questions to check answers,
+        # restricted to the quiz's own pool
+        question_ids = [ans.question_id for ans in data.answers]
+
+        q_stmt = (
+            select(Question)
+            .join(QuizQuestion, QuizQuestion.question_id == Question.id)
+            .where(
+                QuizQuestion.quiz_id == data.quiz_id,
+                Question.id.in_(question_ids),
+            )
         )
+        q_result = await session.execute(q_stmt)
+        questions_map = {q.id: q for q in q_result.scalars().all()}
+        
+        # Validate that all question IDs belong to the quiz
+        # If any question_id from answers is not in questions_map, it's invalid
+        for ans in data.answers:
+            if ans.question_id not in questions_map:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid question_id: {ans.question_id}"
+                )
+
+        # Option A is always correct
+        return [
+            (ans, ans.answer == questions_map[ans.question_id].option_a)
+            for ans in data.answers
+        ]
 
 get_quiz_process_repository = QuizProcessRepository()
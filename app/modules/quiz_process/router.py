@@ -1,16 +1,24 @@
+from core.config import settings
 from core.db_helper import db_helper
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from dependence.role_checker import PermissionRequired
 from app.models.user.model import User
 from fastapi_limiter.depends import RateLimiter
 
+from .admission import admission_controller
+from .grading import quiz_submission_queue
 from .repository import get_quiz_process_repository
 from .schemas import (
+    AdmissionMetricsResponse,
     StartQuizRequest,
     StartQuizResponse,
+    EndQuizAcceptedResponse,
     EndQuizRequest,
     EndQuizResponse,
+    SaveAnswerRequest,
+    SaveAnswerResponse,
 )
 # from app.core.cache import clear_cache
 from app.modules.result.router import list_results
@@ -35,13 +43,36 @@ async def start_quiz(
     session: AsyncSession = Depends(db_helper.session_getter),
     current_user: User = Depends(PermissionRequired("quiz_process:start_quiz")),
 ):
-    return await get_quiz_process_repository.start_quiz(session=session, data=data, user=current_user)
+    # Queue bursts here instead of in the DB connection pool
+    async with admission_controller.admit(data.quiz_id):
+        return await get_quiz_process_repository.start_quiz(session=session, data=data, user=current_user)
+
+
+@router.get("/admission", response_model=AdmissionMetricsResponse)
+async def get_admission_metrics(
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    return admission_controller.metrics()
+
+
+@router.post(
+    "/answer",
+    response_model=SaveAnswerResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(RateLimiter(times=120, seconds=60))]
+)
+async def save_answer(
+    data: SaveAnswerRequest,
+    current_user: User = Depends(PermissionRequired("quiz_process:answer")),
+):
+    return await get_quiz_process_repository.save_answer(data=data, user=current_user)
 
 
 @router.post(
     "/end_quiz", 
     response_model=EndQuizResponse, 
     status_code=status.HTTP_200_OK,
+    responses={status.HTTP_202_ACCEPTED: {"model": EndQuizAcceptedResponse}},
     dependencies=[Depends(RateLimiter(times=5, seconds=60))]
 )
 async def end_quiz(
@@ -49,4 +80,42 @@ async def end_quiz(
     session: AsyncSession = Depends(db_helper.session_getter),
     current_user: User = Depends(PermissionRequired("quiz_process:end_quiz")),
 ):
+    if settings.quiz_process.async_grading:
+        # Graded by the background workers, poll GET /end_quiz/{attempt_id}
+        accepted = await quiz_submission_queue.submit(data=data, user=current_user)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED, content=accepted.model_dump()
+        )
     return await get_quiz_process_repository.end_quiz(session=session, data=data, user=current_user)
+
+
+@router.get(
+    "/end_quiz/{attempt_id}",
+    response_model=EndQuizResponse,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_202_ACCEPTED: {"model": EndQuizAcceptedResponse}},
+)
+async def get_end_quiz_result(
+    attempt_id: str,
+    current_user: User = Depends(PermissionRequired("quiz_process:end_quiz")),
+):
+    submission = await quiz_submission_queue.get_status(attempt_id)
+
+    if not submission or submission.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Submission not found"
+        )
+
+    if submission.status == "failed":
+        raise HTTPException(
+            status_code=submission.status_code or status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=submission.detail,
+        )
+
+    if submission.status != "done":
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=EndQuizAcceptedResponse(attempt_id=attempt_id).model_dump(),
+        )
+
+    return submission.result
@@ -26,10 +26,64 @@ class AnswerDTO(BaseModel):
 class EndQuizRequest(BaseModel):
     quiz_id: int
     user_id: Optional[int] = None 
-    answers: list[AnswerDTO]
+    # Merged over the answers autosaved through /quiz_process/answer
+    answers: list[AnswerDTO] = []
+
+class SaveAnswerRequest(BaseModel):
+    quiz_id: int
+    question_id: int
+    answer: str
+
+class SaveAnswerResponse(BaseModel):
+    quiz_id: int
+    question_id: int
+    answered: int
 
 class EndQuizResponse(BaseModel):
     total_questions: int
     correct_answers: int
     wrong_answers: int
     grade: float
+
+class GradedAnswer(BaseModel):
+    question_id: int
+    answer: str
+    is_correct: bool
+
+class GradedSubmission(BaseModel):
+    user_id: int
+    quiz_id: int
+    subject_id: Optional[int]
+    group_id: Optional[int]
+    answers: list[GradedAnswer]
+    total_questions: int
+    correct_answers: int
+    wrong_answers: int
+    grade: int
+    # Paper seed and id of the attempt, None when graded without one
+    seed: Optional[int] = None
+    attempt_id: Optional[str] = None
+
+    def to_response(self) -> EndQuizResponse:
+        return EndQuizResponse(
+            total_questions=self.total_questions,
+            correct_answers=self.correct_answers,
+            wrong_answers=self.wrong_answers,
+            grade=float(self.grade)
+        )
+
+class EndQuizAcceptedResponse(BaseModel):
+    attempt_id: str
+    status: str = "pending"
+
+class QuizAdmissionStats(BaseModel):
+    quiz_id: int
+    active: int
+    waiting: int
+
+class AdmissionMetricsResponse(BaseModel):
+    admitted: int
+    rejected: int
+    timed_out: int
+    average_wait_seconds: float
+    quizzes: list[QuizAdmissionStats]
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+
+from fastapi import HTTPException
+
+from core.config import settings
+from core.db_helper import db_helper
+
+from .attempt import QuizAttempt, quiz_attempt_store
+from .repository import get_quiz_process_repository
+from .schemas import EndQuizRequest, GradedSubmission
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptSweeper:
+    """
+    Background task that finalizes attempts nobody submitted.
+
+    Every `interval` seconds it takes at most `batch_size` attempts whose
+    deadline passed more than `delay` seconds ago off the deadline index,
+    grades them from their autosaved answers and stores the results in
+    one transaction. A backlog is therefore worked off at a bounded rate
+    instead of all at once.
+    """
+
+    def __init__(self, interval: float, delay: int, batch_size: int):
+        self.interval = interval
+        self.delay = delay
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info("Started quiz attempt sweeper")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Stopped quiz attempt sweeper")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                finalized = await self.sweep_once()
+                if finalized:
+                    logger.info(f"Finalized {finalized} expired quiz attempts")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Quiz attempt sweeper failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def sweep_once(self) -> int:
+        due = await quiz_attempt_store.due(time.time() - self.delay, self.batch_size)
+
+        attempts: list[QuizAttempt] = []
+        for quiz_id, user_id in due:
+            # Read before claiming: a failed read leaves it on the index
+            attempt = await quiz_attempt_store.get(quiz_id, user_id)
+            # Another worker or a late end_quiz may have got there first
+            if not await quiz_attempt_store.claim(quiz_id, user_id):
+                continue
+            if attempt is None:
+                logger.warning(
+                    f"Quiz attempt {quiz_id}:{user_id} expired before it was finalized"
+                )
+                continue
+            attempts.append(attempt)
+
+        if not attempts:
+            return 0
+
+        saved = await self._finalize(attempts)
+        for submission in saved:
+            await quiz_attempt_store.delete(submission.quiz_id, submission.user_id)
+        return len(saved)
+
+    async def _finalize(self, attempts: list[QuizAttempt]) -> list[GradedSubmission]:
+        repository = get_quiz_process_repository
+        graded: list[tuple[QuizAttempt, GradedSubmission]] = []
+
+        async with db_helper.session_factory() as session:
+            for attempt in attempts:
+                data = EndQuizRequest(quiz_id=attempt.quiz_id)
+                try:
+                    submission = await repository.grade_submission(
+                        session, data, attempt.user_id, attempt
+                    )
+                except HTTPException as e:
+                    logger.warning(
+                        f"Could not grade expired attempt {attempt.attempt_id}: "
+                        f"{e.detail}"
+                    )
+                    continue
+                graded.append((attempt, submission))
+
+            if not graded:
+                return []
+
+            try:
+                await repository.save_submissions(session, [s for _, s in graded])
+                return [s for _, s in graded]
+            except HTTPException:
+                pass
+
+            # Save one by one so a single bad row does not hold back the batch
+            saved = []
+            for attempt, submission in graded:
+                try:
+                    await repository.save_submissions(session, [submission])
+                    saved.append(submission)
+                except HTTPException as e:
+                    logger.error(
+                        f"Failed to finalize attempt {attempt.attempt_id}: {e.detail}"
+                    )
+                    # Back on the index, the next sweep retries it
+                    await quiz_attempt_store.unclaim(attempt)
+            return saved
+
+
+attempt_sweeper = AttemptSweeper(
+    interval=settings.quiz_process.sweeper_interval_seconds,
+    delay=settings.quiz_process.sweeper_delay_seconds,
+    batch_size=settings.quiz_process.sweeper_batch_size,
+)
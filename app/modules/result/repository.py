@@ -1,5 +1,14 @@
+from typing import AsyncIterator
+
 from fastapi import HTTPException, status
+from app.models.faculty.model import Faculty
+from app.models.group.model import Group
+from app.models.quiz.model import Quiz
 from app.models.results.model import Result
+from app.models.student.model import Student
+from app.models.subject.model import Subject
+from app.models.user.model import User
+from core.db_helper import db_helper
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -76,5 +85,74 @@ class ResultRepository:
         await session.delete(obj)
         await session.commit()
 
+    EXPORT_HEADER = (
+        "Result ID",
+        "Date",
+        "User ID",
+        "Username",
+        "Full name",
+        "Quiz",
+        "Subject",
+        "Group",
+        "Faculty",
+        "Correct",
+        "Wrong",
+        "Grade",
+    )
+    # Rows fetched from the server-side cursor at a time
+    EXPORT_BATCH_SIZE = 2000
+
+    async def check_export_scope(
+        self, session: AsyncSession, scope: str, scope_id: int
+    ) -> None:
+        model = {"quiz": Quiz, "group": Group, "faculty": Faculty}[scope]
+        if not await session.get(model, scope_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{scope.capitalize()} not found",
+            )
+
+    async def export_rows(self, scope: str, scope_id: int) -> AsyncIterator[tuple]:
+        """
+        Results of a quiz, group or faculty as EXPORT_HEADER rows, oldest
+        first, read through a server-side cursor. Runs in its own session,
+        since the response is still streaming after the request's session
+        is closed.
+        """
+        stmt = (
+            select(
+                Result.id,
+                Result.created_at,
+                Result.user_id,
+                User.username,
+                Student.full_name,
+                Quiz.title,
+                Subject.name,
+                Group.name,
+                Faculty.name,
+                Result.correct_answers,
+                Result.wrong_answers,
+                Result.grade,
+            )
+            .outerjoin(User, User.id == Result.user_id)
+            .outerjoin(Student, Student.user_id == Result.user_id)
+            .outerjoin(Quiz, Quiz.id == Result.quiz_id)
+            .outerjoin(Subject, Subject.id == Result.subject_id)
+            .outerjoin(Group, Group.id == Result.group_id)
+            .outerjoin(Faculty, Faculty.id == Group.faculty_id)
+            .order_by(Result.id)
+        )
+        if scope == "faculty":
+            stmt = stmt.where(Group.faculty_id == scope_id)
+        else:
+            stmt = stmt.where(getattr(Result, f"{scope}_id") == scope_id)
+
+        async with db_helper.session_factory() as session:
+            rows = await session.stream(
+                stmt.execution_options(yield_per=self.EXPORT_BATCH_SIZE)
+            )
+            async for row in rows:
+                yield tuple(row)
+
 
 get_result_repository = ResultRepository()
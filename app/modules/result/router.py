@@ -1,6 +1,9 @@
+from typing import Optional
+
 from core.db_helper import db_helper
+from core.utils.export import ExportFormat, export_response
 from dependence.role_checker import PermissionRequired
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 # from fastapi_cache.decorator import cache
 from fastapi_limiter.depends import RateLimiter
@@ -19,6 +22,40 @@ router = APIRouter(
 )
 
 
+@router.get("/export")
+async def export_results(
+    quiz_id: Optional[int] = Query(None),
+    group_id: Optional[int] = Query(None),
+    faculty_id: Optional[int] = Query(None),
+    format: ExportFormat = Query("xlsx"),
+    session: AsyncSession = Depends(db_helper.session_getter),
+    _: PermissionRequired = Depends(PermissionRequired("read:result")),
+):
+    scopes = {
+        scope: scope_id
+        for scope, scope_id in (
+            ("quiz", quiz_id), ("group", group_id), ("faculty", faculty_id)
+        )
+        if scope_id is not None
+    }
+    if len(scopes) != 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass exactly one of quiz_id, group_id and faculty_id",
+        )
+    [(scope, scope_id)] = scopes.items()
+
+    await get_result_repository.check_export_scope(
+        session=session, scope=scope, scope_id=scope_id
+    )
+    return export_response(
+        header=get_result_repository.EXPORT_HEADER,
+        rows=get_result_repository.export_rows(scope=scope, scope_id=scope_id),
+        fmt=format,
+        filename=f"results_{scope}_{scope_id}",
+    )
+
+
 @router.get("/{result_id}", response_model=ResultResponse)
 # @cache(expire=60, key_builder=custom_key_builder)
 async def get_result(
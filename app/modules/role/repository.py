@@ -5,6 +5,8 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from dependence.permission_cache import permission_cache
+
 from .schemas import RoleCreateRequest, RoleListRequest, RoleListResponse, RolePermissionAssignRequest
 
 
@@ -87,6 +89,8 @@ class RoleRepository:
 
         await session.commit()
         await session.refresh(role)
+        # The Admin check goes by role name
+        await permission_cache.invalidate_all()
         return role
 
     async def delete_role(self, session: AsyncSession, role_id: int) -> None:
@@ -101,6 +105,7 @@ class RoleRepository:
 
         await session.delete(role)
         await session.commit()
+        await permission_cache.invalidate_all()
 
     async def assign_permissions(
         self, session: AsyncSession, data: RolePermissionAssignRequest
@@ -142,6 +147,7 @@ class RoleRepository:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error while assigning permissions"
             )
+        await permission_cache.invalidate_all()
 
 
 get_role_repository = RoleRepository()
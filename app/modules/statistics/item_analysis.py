@@ -0,0 +1,371 @@
+"""
+Item analysis of questions per quiz and per subject: difficulty
+(p-value), discrimination index, point-biserial correlation and how
+often each option was chosen.
+
+The figures are computed from user_answers with pandas group-bys, one
+vectorized pass per scope, and cached in Redis. A request reads the
+cache; only the first request for a scope loads its answers. Submitting
+results marks their quiz and subject dirty, and the background refresher
+recomputes dirty scopes that are cached, so user_answers is read once
+per refresh interval at most rather than on every request.
+"""
+import asyncio
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+from sqlalchemy import ColumnElement, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.models.question.model import Question
+from app.models.quiz.model import Quiz
+from app.models.results.model import Result
+from app.models.subject.model import Subject
+from app.models.user_answers.model import UserAnswers
+from core.config import settings
+from core.db_helper import db_helper
+
+from .schemas import ItemAnalysisResponse
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("quiz", "subject")
+
+# Option letters; "other" is an answer matching none of the options
+CHOICES = ("a", "b", "c", "d", "other")
+
+# Share of attempts in each of the upper and lower groups of the
+# discrimination index
+EXTREME_GROUP_SHARE = 0.27
+
+ATTEMPT_KEY = "attempt_id"
+
+
+def attempt_key(model) -> ColumnElement[str]:
+    """
+    Attempt a user_answers or results row belongs to. Rows stored before
+    answers carried the attempt fall back to (user_id, quiz_id,
+    created_at): save_submissions writes both in one transaction, so
+    they share created_at.
+    """
+    return func.coalesce(
+        model.attempt_id,
+        func.concat_ws(":", model.user_id, model.quiz_id, model.created_at),
+    ).label(ATTEMPT_KEY)
+
+
+def analyze(
+    answers: pd.DataFrame, results: pd.DataFrame, questions: pd.DataFrame
+) -> tuple[int, list[dict]]:
+    """
+    Item statistics per question.
+
+    answers: ATTEMPT_KEY, question_id, answer, is_correct.
+    results: ATTEMPT_KEY, grade; the attempt's score, falling back to
+    the share of its answers that are correct.
+    questions: id, text, option_a..option_d.
+
+    Returns the number of attempts and one dict per question.
+    """
+    if answers.empty:
+        return 0, []
+
+    answers = answers.assign(
+        is_correct=answers["is_correct"].fillna(False).astype(int)
+    )
+
+    # One row per attempt with its score
+    scores = (
+        answers.groupby(ATTEMPT_KEY)["is_correct"]
+        .mean()
+        .mul(100)
+        .rename("score")
+        .reset_index()
+    )
+    grades = results.drop_duplicates(ATTEMPT_KEY)
+    scores = scores.merge(grades, on=ATTEMPT_KEY, how="left")
+    scores["score"] = scores["grade"].fillna(scores["score"]).astype(float)
+
+    # Upper and lower groups by score, ties broken by position
+    attempts = len(scores)
+    group_size = max(1, math.ceil(EXTREME_GROUP_SHARE * attempts))
+    order = scores["score"].rank(method="first")
+    scores["band"] = np.select(
+        [order <= group_size, order > attempts - group_size],
+        ["lower", "upper"],
+        "middle",
+    )
+
+    answers = answers.merge(scores[[ATTEMPT_KEY, "score", "band"]], on=ATTEMPT_KEY)
+    answers["score_sq"] = answers["score"] ** 2
+
+    by_question = answers.groupby("question_id")
+    stats = by_question.agg(
+        responses=("is_correct", "size"),
+        p_value=("is_correct", "mean"),
+        score_mean=("score", "mean"),
+        score_sq_mean=("score_sq", "mean"),
+    )
+
+    # Point-biserial: (M1 - M0) / s * sqrt(p * q) over the question's respondents
+    variance = stats["score_sq_mean"] - stats["score_mean"] ** 2
+    score_std = np.sqrt(variance.clip(lower=0))
+    means = (
+        answers.groupby(["question_id", "is_correct"])["score"]
+        .mean()
+        .unstack()
+        .reindex(columns=[0, 1])
+    )
+    p = stats["p_value"]
+    stats["point_biserial"] = (
+        (means[1] - means[0]) / score_std.replace(0, np.nan) * np.sqrt(p * (1 - p))
+    )
+
+    # Discrimination: p-value in the upper group minus in the lower group
+    bands = (
+        answers[answers["band"] != "middle"]
+        .groupby(["question_id", "band"])["is_correct"]
+        .mean()
+        .unstack()
+        .reindex(index=stats.index, columns=["lower", "upper"])
+    )
+    stats["discrimination"] = bands["upper"] - bands["lower"]
+
+    # Option chosen, by comparing the answer text with the options
+    options = answers.merge(
+        questions, left_on="question_id", right_on="id", how="left"
+    )
+    choice = np.select(
+        [options["answer"] == options[f"option_{c}"] for c in CHOICES[:4]],
+        CHOICES[:4],
+        CHOICES[4],
+    )
+    distractors = (
+        options.assign(choice=choice)
+        .groupby(["question_id", "choice"])
+        .size()
+        .unstack(fill_value=0)
+        .reindex(index=stats.index, columns=list(CHOICES), fill_value=0)
+    )
+
+    text = questions.set_index("id")["text"].reindex(stats.index)
+
+    def nullable(value) -> Optional[float]:
+        return None if pd.isna(value) else round(float(value), 4)
+
+    items = [
+        {
+            "question_id": int(question_id),
+            "text": None if pd.isna(text[question_id]) else text[question_id],
+            "responses": int(row.responses),
+            "p_value": round(float(row.p_value), 4),
+            "discrimination": nullable(row.discrimination),
+            "point_biserial": nullable(row.point_biserial),
+            "distractors": {
+                c: int(n) for c, n in distractors.loc[question_id].items()
+            },
+        }
+        for question_id, row in stats.iterrows()
+    ]
+    return attempts, items
+
+
+class ItemAnalysis:
+    """
+    Per-scope item statistics cached in Redis.
+
+    Scopes touched by new results are added to a Redis set; every
+    `interval` seconds the refresher pops them (SPOP, so each is taken
+    by one worker) and recomputes those that are cached. Scopes nobody
+    asked for are not computed until they are.
+    """
+
+    def __init__(self, interval: float, ttl: int, batch_size: int):
+        self.interval = interval
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    def _key(self, scope: str, scope_id: int) -> str:
+        return f"{settings.redis.prefix}:statistics:items:{scope}:{scope_id}"
+
+    @property
+    def _dirty_key(self) -> str:
+        return f"{settings.redis.prefix}:statistics:items:dirty"
+
+    async def get(
+        self, session: AsyncSession, scope: str, scope_id: int
+    ) -> ItemAnalysisResponse:
+        redis = get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(self._key(scope, scope_id))
+            except RedisError as e:
+                logger.warning(f"Failed to read item analysis: {e}")
+                raw = None
+            if raw:
+                return ItemAnalysisResponse.model_validate_json(raw)
+
+        model = {"quiz": Quiz, "subject": Subject}[scope]
+        if not await session.get(model, scope_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{scope.capitalize()} not found",
+            )
+        analysis = await self.compute(session, scope, scope_id)
+        await self._store(analysis)
+        return analysis
+
+    async def compute(
+        self, session: AsyncSession, scope: str, scope_id: int
+    ) -> ItemAnalysisResponse:
+        if scope == "quiz":
+            answer_filter = [UserAnswers.quiz_id == scope_id]
+            result_filter = Result.quiz_id == scope_id
+            question_filter = Question.id.in_(
+                select(UserAnswers.question_id).where(UserAnswers.quiz_id == scope_id)
+            )
+        else:
+            answer_filter = [Question.subject_id == scope_id]
+            result_filter = Result.subject_id == scope_id
+            question_filter = Question.subject_id == scope_id
+
+        answer_stmt = (
+            select(
+                attempt_key(UserAnswers),
+                UserAnswers.question_id,
+                UserAnswers.answer,
+                UserAnswers.is_correct,
+            )
+            .join(Question, Question.id == UserAnswers.question_id)
+            .where(*answer_filter)
+        )
+        result_stmt = select(attempt_key(Result), Result.grade).where(result_filter)
+        question_stmt = select(
+            Question.id,
+            Question.text,
+            Question.option_a,
+            Question.option_b,
+            Question.option_c,
+            Question.option_d,
+        ).where(question_filter)
+
+        frames = []
+        for stmt in (answer_stmt, result_stmt, question_stmt):
+            rows = await session.execute(stmt)
+            frames.append(pd.DataFrame(rows.all(), columns=list(rows.keys())))
+
+        # Off the event loop, the group-bys take a while on large scopes
+        attempts, questions = await asyncio.to_thread(analyze, *frames)
+        return ItemAnalysisResponse(
+            scope=scope,
+            scope_id=scope_id,
+            attempts=attempts,
+            as_of=datetime.now(timezone.utc),
+            questions=questions,
+        )
+
+    async def _store(self, analysis: ItemAnalysisResponse) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                self._key(analysis.scope, analysis.scope_id),
+                analysis.model_dump_json(),
+                ex=self.ttl,
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to cache item analysis: {e}")
+
+    async def mark_dirty(self, results: Iterable[dict]) -> None:
+        """Queues the quizzes and subjects of new results (dicts with their ids)."""
+        members = set()
+        for r in results:
+            for scope in SCOPES:
+                if r.get(f"{scope}_id") is not None:
+                    members.add(f"{scope}:{r[f'{scope}_id']}")
+        redis = get_redis()
+        if redis is None or not members:
+            return
+        try:
+            await redis.sadd(self._dirty_key, *members)
+        except RedisError as e:
+            logger.warning(f"Failed to queue item analysis refresh: {e}")
+
+    async def refresh(self) -> int:
+        """
+        Recomputes the cached scopes among the next batch of dirty ones.
+        Returns the number of scopes taken off the queue.
+        """
+        redis = get_redis()
+        if redis is None:
+            return 0
+        try:
+            members = await redis.spop(self._dirty_key, self.batch_size)
+        except RedisError as e:
+            logger.warning(f"Failed to read dirty item analysis scopes: {e}")
+            return 0
+
+        members = members or []
+        pending = list(members)
+        try:
+            while pending:
+                scope, scope_id = pending[0].split(":")
+                scope_id = int(scope_id)
+                try:
+                    cached = await redis.exists(self._key(scope, scope_id))
+                except RedisError as e:
+                    logger.warning(f"Failed to check item analysis cache: {e}")
+                    cached = False
+                if cached:
+                    async with db_helper.session_factory() as session:
+                        analysis = await self.compute(session, scope, scope_id)
+                    await self._store(analysis)
+                pending.pop(0)
+        finally:
+            # A failed compute must not lose the scopes not refreshed yet
+            if pending:
+                try:
+                    await redis.sadd(self._dirty_key, *pending)
+                except RedisError as e:
+                    logger.warning(f"Failed to requeue item analysis scopes: {e}")
+        return len(members)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info("Started item analysis refresher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Stopped item analysis refresher")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Keep going while a backlog is left
+                while await self.refresh() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Item analysis refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+item_analysis = ItemAnalysis(
+    interval=settings.statistics.item_analysis_seconds,
+    ttl=settings.statistics.item_analysis_ttl_seconds,
+    batch_size=settings.statistics.item_analysis_batch_size,
+)
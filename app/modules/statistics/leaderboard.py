@@ -0,0 +1,279 @@
+"""
+Leaderboards per quiz, group and subject in Redis sorted sets.
+
+Each set holds a student's best grade in the scope. The score packs the
+grade and the submission time so ties go to whoever got there first:
+
+    score = grade * 2**32 + (2**32 - 1 - unix_seconds)
+
+which stays an exact double for grades up to 100. Submissions are added
+with ZADD GT after their results are committed, so a set only moves up.
+Top-N is ZREVRANGE and a student's rank ZREVRANK, both O(log N).
+
+Deleted results stay on the board until the sets are rebuilt from the
+results table: `python app/leaderboard_rebuild.py`.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, status
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from app.models.results.model import Result
+from app.models.student.model import Student
+from app.models.user.model import User
+from core.config import settings
+
+from .schemas import LeaderboardEntry, LeaderboardRankResponse, LeaderboardResponse
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("quiz", "group", "subject")
+
+_TIME_SPAN = 2**32
+
+
+def submitted_at_epoch(created_at=Result.created_at):
+    """
+    SQL expression for the unix time of a created_at column. The columns
+    hold naive timestamps in the database session's time zone (they
+    default to now()), so they are read in that zone, not assumed UTC.
+    """
+    return func.extract(
+        "epoch", func.timezone(func.current_setting("TimeZone"), created_at)
+    )
+
+
+def pack(grade: int, submitted_at: float) -> float:
+    """submitted_at in unix seconds, from submitted_at_epoch."""
+    return grade * _TIME_SPAN + (_TIME_SPAN - 1 - int(submitted_at))
+
+
+def unpack(score: float) -> tuple[int, datetime]:
+    grade, rest = divmod(int(score), _TIME_SPAN)
+    submitted_at = datetime.fromtimestamp(_TIME_SPAN - 1 - rest, timezone.utc)
+    return grade, submitted_at
+
+
+class Leaderboard:
+    def __init__(self, rebuild_batch_size: int):
+        self.rebuild_batch_size = rebuild_batch_size
+
+    def _key(self, scope: str, scope_id: int) -> str:
+        return f"{settings.redis.prefix}:leaderboard:{scope}:{scope_id}"
+
+    def _rebuild_key(self, scope: str, scope_id: int) -> str:
+        return f"{settings.redis.prefix}:leaderboard-rebuild:{scope}:{scope_id}"
+
+    def _redis(self) -> Redis:
+        redis = get_redis()
+        if redis is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Leaderboards are unavailable",
+            )
+        return redis
+
+    async def add(self, results: Iterable[dict], redis: Optional[Redis] = None) -> None:
+        """
+        Puts committed results (dicts with user_id, quiz_id, group_id,
+        subject_id, grade and submitted_at, see submitted_at_epoch) on
+        their boards.
+        """
+        redis = redis or get_redis()
+        if redis is None:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for r in results:
+                if r["user_id"] is None:
+                    continue
+                score = pack(r["grade"], r["submitted_at"])
+                for scope in SCOPES:
+                    if r[f"{scope}_id"] is not None:
+                        pipe.zadd(
+                            self._key(scope, r[f"{scope}_id"]),
+                            {str(r["user_id"]): score},
+                            gt=True,
+                        )
+            await pipe.execute()
+        except RedisError as e:
+            # The next rebuild puts them back
+            logger.warning(f"Failed to update leaderboards: {e}")
+
+    async def top(
+        self, session: AsyncSession, scope: str, scope_id: int, limit: int
+    ) -> LeaderboardResponse:
+        redis = self._redis()
+        key = self._key(scope, scope_id)
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.zcard(key)
+            pipe.zrevrange(key, 0, limit - 1, withscores=True)
+            size, entries = await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to read leaderboard: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Leaderboards are unavailable",
+            )
+
+        # Names of the N users shown, by primary key
+        user_ids = [int(member) for member, _ in entries]
+        names = {}
+        if user_ids:
+            stmt = (
+                select(User.id, User.username, Student.full_name)
+                .outerjoin(Student, Student.user_id == User.id)
+                .where(User.id.in_(user_ids))
+            )
+            names = {row.id: row for row in (await session.execute(stmt)).all()}
+
+        board = []
+        for position, (member, score) in enumerate(entries, start=1):
+            grade, submitted_at = unpack(score)
+            user = names.get(int(member))
+            board.append(
+                LeaderboardEntry(
+                    rank=position,
+                    user_id=int(member),
+                    username=user.username if user else None,
+                    full_name=user.full_name if user else None,
+                    grade=grade,
+                    submitted_at=submitted_at,
+                )
+            )
+        return LeaderboardResponse(
+            scope=scope, scope_id=scope_id, size=size, entries=board
+        )
+
+    async def rank(
+        self, scope: str, scope_id: int, user_id: int
+    ) -> LeaderboardRankResponse:
+        redis = self._redis()
+        key = self._key(scope, scope_id)
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.zrevrank(key, str(user_id))
+            pipe.zscore(key, str(user_id))
+            pipe.zcard(key)
+            position, score, size = await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to read leaderboard: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Leaderboards are unavailable",
+            )
+        if position is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User is not on this leaderboard",
+            )
+
+        grade, submitted_at = unpack(score)
+        return LeaderboardRankResponse(
+            scope=scope,
+            scope_id=scope_id,
+            user_id=user_id,
+            rank=position + 1,
+            size=size,
+            grade=grade,
+            submitted_at=submitted_at,
+        )
+
+    async def rebuild(self, session: AsyncSession, redis: Redis) -> dict[str, int]:
+        """
+        Repopulates every board from results, each student's best grade
+        and earliest time for it. Boards are built under temporary keys
+        and renamed into place, boards without results are dropped, and
+        results committed meanwhile are added again at the end. Returns
+        the number of boards per scope.
+        """
+        # Database clock, like created_at; the margin covers transactions
+        # that started earlier but commit after the boards are read
+        started = await session.scalar(
+            select(func.localtimestamp() - timedelta(minutes=1))
+        )
+        counts = {}
+        for scope in SCOPES:
+            counts[scope] = await self._rebuild_scope(session, redis, scope)
+
+        # Submissions that landed in a board before it was renamed over
+        stmt = select(
+            Result.user_id,
+            Result.quiz_id,
+            Result.group_id,
+            Result.subject_id,
+            Result.grade,
+            submitted_at_epoch().label("submitted_at"),
+        ).where(Result.created_at >= started)
+        late = [row._asdict() for row in (await session.execute(stmt)).all()]
+        await self.add(late, redis=redis)
+        return counts
+
+    async def _rebuild_scope(
+        self, session: AsyncSession, redis: Redis, scope: str
+    ) -> int:
+        column = getattr(Result, f"{scope}_id")
+        stmt = (
+            select(column, Result.user_id, Result.grade, submitted_at_epoch())
+            .where(column.is_not(None), Result.user_id.is_not(None))
+            .distinct(column, Result.user_id)
+            .order_by(column, Result.user_id, Result.grade.desc(), Result.created_at)
+        )
+
+        built = set()
+        current = None
+        pipe = redis.pipeline(transaction=False)
+        pending = 0
+
+        async def publish(scope_id: int) -> None:
+            nonlocal pending
+            pipe.rename(self._rebuild_key(scope, scope_id), self._key(scope, scope_id))
+            await pipe.execute()
+            pending = 0
+            built.add(self._key(scope, scope_id))
+
+        result = await session.stream(
+            stmt.execution_options(yield_per=self.rebuild_batch_size)
+        )
+        async for scope_id, user_id, grade, submitted_at in result:
+            if scope_id != current:
+                if current is not None:
+                    await publish(current)
+                current = scope_id
+                pipe.delete(self._rebuild_key(scope, scope_id))
+            pipe.zadd(
+                self._rebuild_key(scope, scope_id),
+                {str(user_id): pack(grade, submitted_at)},
+            )
+            pending += 1
+            if pending >= self.rebuild_batch_size:
+                await pipe.execute()
+                pending = 0
+        if current is not None:
+            await publish(current)
+
+        # Boards whose results are all gone
+        stale = [
+            key
+            async for key in redis.scan_iter(
+                match=f"{settings.redis.prefix}:leaderboard:{scope}:*", count=1000
+            )
+            if key not in built
+        ]
+        if stale:
+            await redis.delete(*stale)
+
+        logger.info(f"Rebuilt {len(built)} {scope} leaderboards, dropped {len(stale)}")
+        return len(built)
+
+
+leaderboard = Leaderboard(
+    rebuild_batch_size=settings.statistics.leaderboard_rebuild_batch_size
+)
@@ -6,9 +6,17 @@ from app.models.kafedra.model import Kafedra
 from app.models.faculty.model import Faculty
 from app.models.group.model import Group
 from app.models.teacher.model import Teacher
-from sqlalchemy import func, select, distinct
+from app.models.stats_rollup.model import StatsRollup
+from app.models.grade_histogram.model import GradeHistogram
+from app.models.subject.model import Subject
+from app.models.trend_rollup.model import TrendRollup
+from sqlalchemy import DateTime, and_, func, literal, select, distinct
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+import math
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
+
+from core.db_helper import db_helper
 
 from .schemas import (
     GeneralStatisticsResponse,
@@ -18,32 +26,45 @@ from .schemas import (
     GroupStatisticsResponse,
     TeacherStatisticsResponse,
     FacultyGroupStat,
+    GradeDistributionResponse,
+    TrendPoint,
+    TrendsResponse,
 )
+# Keeps trend_rollups in step with edited and deleted results
+from . import trends  # noqa: F401
 
 
 class StatisticsRepository:
+    async def _rollup(
+        self, session: AsyncSession, scope: str, scope_id: int
+    ) -> Optional[StatsRollup]:
+        # Pre-aggregated by modules/statistics/rollup.py as results are written
+        stmt = select(StatsRollup).where(
+            StatsRollup.scope == scope, StatsRollup.scope_id == scope_id
+        )
+        return (await session.execute(stmt)).scalar_one_or_none()
+
+    @staticmethod
+    def _average(count: Optional[int], grade_sum: Optional[int]) -> float:
+        return grade_sum / count if count else 0.0
+
     async def get_general_stats(
         self, session: AsyncSession
     ) -> GeneralStatisticsResponse:
-        # Total students tested (unique users in results)
-        students_stmt = select(func.count(distinct(Result.user_id)))
-        students_res = await session.execute(students_stmt)
-        total_students = students_res.scalar() or 0
-
-        # Total quizzes taken (total count of results)
-        total_stmt = select(func.count(Result.id))
-        total_res = await session.execute(total_stmt)
-        total_quizzes = total_res.scalar() or 0
-
-        # System average grade
-        avg_stmt = select(func.avg(Result.grade))
-        avg_res = await session.execute(avg_stmt)
-        avg_grade = avg_res.scalar() or 0.0
+        # Unique users tested, results and average grade in one scan.
+        # Served through general_stats_snapshot, see snapshot.py
+        stats_stmt = select(
+            func.count(distinct(Result.user_id)).label("total_students"),
+            func.count(Result.id).label("total_quizzes"),
+            func.avg(Result.grade).label("avg_grade"),
+        )
+        stats = (await session.execute(stats_stmt)).one()
 
         return GeneralStatisticsResponse(
-            total_students_tested=total_students,
-            total_quizzes_taken=total_quizzes,
-            system_average_grade=float(avg_grade)
+            total_students_tested=stats.total_students or 0,
+            total_quizzes_taken=stats.total_quizzes or 0,
+            system_average_grade=float(stats.avg_grade or 0.0),
+            as_of=datetime.now(timezone.utc),
         )
 
     async def get_quiz_stats(
@@ -57,24 +78,15 @@ class StatisticsRepository:
         if not quiz:
             raise HTTPException(status_code=404, detail="Quiz not found")
 
-        # Aggregate stats
-        stats_stmt = select(
-            func.count(Result.id).label("times_taken"),
-            func.avg(Result.grade).label("avg_grade"),
-            func.max(Result.grade).label("max_grade"),
-            func.min(Result.grade).label("min_grade")
-        ).where(Result.quiz_id == quiz_id)
-        
-        res = await session.execute(stats_stmt)
-        stats = res.one()
+        stats = await self._rollup(session, "quiz", quiz_id)
 
         return QuizStatisticsResponse(
             quiz_id=quiz.id,
             title=quiz.title,
-            times_taken=stats.times_taken or 0,
-            average_grade=float(stats.avg_grade or 0.0),
-            highest_grade=stats.max_grade or 0,
-            lowest_grade=stats.min_grade or 0
+            times_taken=stats.count if stats else 0,
+            average_grade=self._average(stats.count, stats.grade_sum) if stats else 0.0,
+            highest_grade=stats.grade_max if stats else 0,
+            lowest_grade=stats.grade_min if stats else 0
         )
 
     async def get_user_stats(
@@ -87,19 +99,13 @@ class StatisticsRepository:
         if not user:
              raise HTTPException(status_code=404, detail="User not found")
              
-        stats_stmt = select(
-            func.count(Result.id).label("quizzes_taken"),
-            func.avg(Result.grade).label("avg_grade")
-        ).where(Result.user_id == user_id)
-        
-        res = await session.execute(stats_stmt)
-        stats = res.one()
+        stats = await self._rollup(session, "user", user_id)
 
         return UserStatisticsResponse(
             user_id=user.id,
             full_name=user.username, # Basic fallback, usually construct from profile if available or join teacher/student tables
-            quizzes_taken=stats.quizzes_taken or 0,
-            average_grade=float(stats.avg_grade or 0.0)
+            quizzes_taken=stats.count if stats else 0,
+            average_grade=self._average(stats.count, stats.grade_sum) if stats else 0.0
         )
 
     async def get_faculty_stats(
@@ -110,47 +116,31 @@ class StatisticsRepository:
         if not faculty:
             raise HTTPException(status_code=404, detail="Faculty not found")
 
-        # Result -> Group -> Faculty
-        # We need stats per group
-        stats_stmt = select(
-            Group.id,
-            Group.name,
-            func.count(Result.id).label("total_results"),
-            func.avg(Result.grade).label("avg_grade")
-        ).outerjoin(Result, Result.group_id == Group.id).where(Group.faculty_id == faculty_id).group_by(Group.id)
-        
+        # One rollup row per group of the faculty, plus the faculty's own
+        stats_stmt = (
+            select(Group.id, Group.name, StatsRollup.count, StatsRollup.grade_sum)
+            .outerjoin(
+                StatsRollup,
+                and_(StatsRollup.scope == "group", StatsRollup.scope_id == Group.id),
+            )
+            .where(Group.faculty_id == faculty_id)
+            .order_by(Group.id)
+        )
         group_stats_res = (await session.execute(stats_stmt)).all()
-        
-        groups_data = []
-        total_quizzes = 0
-        total_grade_sum = 0
-        total_groups_with_results = 0
-
-        for g_id, g_name, count, avg in group_stats_res:
-            count = count or 0
-            avg = float(avg or 0.0)
-            
-            groups_data.append(FacultyGroupStat(
+
+        groups_data = [
+            FacultyGroupStat(
                 group_id=g_id,
                 name=g_name,
-                total_quizzes_taken=count,
-                average_grade=avg
-            ))
-            
-            total_quizzes += count
-            if count > 0:
-                total_grade_sum += avg # Sum of averages? Or weighted average?
-                # Usually system average is avg of all results.
-                # Let's recalculate total average from raw results or weighted.
-                # Actually, simpler to just query total stats separately or aggregate here.
-                # If we sum averages and divide by count of groups we get avg of avgs.
-                # If we want true average of all results: 
-                # (avg1 * count1 + avg2 * count2) / total_count
-        
-        # Calculate true faculty average
-        # Re-query or calculate from groups
-        weighted_sum = sum(g.average_grade * g.total_quizzes_taken for g in groups_data)
-        faculty_avg = weighted_sum / total_quizzes if total_quizzes > 0 else 0.0
+                total_quizzes_taken=count or 0,
+                average_grade=self._average(count, grade_sum)
+            )
+            for g_id, g_name, count, grade_sum in group_stats_res
+        ]
+
+        stats = await self._rollup(session, "faculty", faculty_id)
+        total_quizzes = stats.count if stats else 0
+        faculty_avg = self._average(stats.count, stats.grade_sum) if stats else 0.0
 
         return FacultyStatisticsResponse(
             faculty_id=faculty.id,
@@ -160,6 +150,58 @@ class StatisticsRepository:
             groups=groups_data
         )
 
+    FACULTY_EXPORT_HEADER = (
+        "Faculty ID",
+        "Faculty",
+        "Group ID",
+        "Group",
+        "Quizzes taken",
+        "Average grade",
+    )
+
+    async def check_faculty(self, session: AsyncSession, faculty_id: int) -> None:
+        if not await session.get(Faculty, faculty_id):
+            raise HTTPException(status_code=404, detail="Faculty not found")
+
+    async def faculty_export_rows(
+        self, faculty_id: Optional[int] = None
+    ) -> AsyncIterator[tuple]:
+        """
+        get_faculty_stats for every faculty (or one), a row per group, read
+        through a server-side cursor in a session of its own that outlives
+        the request's.
+        """
+        stmt = (
+            select(
+                Faculty.id,
+                Faculty.name,
+                Group.id,
+                Group.name,
+                StatsRollup.count,
+                StatsRollup.grade_sum,
+            )
+            .join(Group, Group.faculty_id == Faculty.id)
+            .outerjoin(
+                StatsRollup,
+                and_(StatsRollup.scope == "group", StatsRollup.scope_id == Group.id),
+            )
+            .order_by(Faculty.id, Group.id)
+        )
+        if faculty_id is not None:
+            stmt = stmt.where(Faculty.id == faculty_id)
+
+        async with db_helper.session_factory() as session:
+            rows = await session.stream(stmt.execution_options(yield_per=1000))
+            async for f_id, f_name, g_id, g_name, count, grade_sum in rows:
+                yield (
+                    f_id,
+                    f_name,
+                    g_id,
+                    g_name,
+                    count or 0,
+                    round(self._average(count, grade_sum), 2),
+                )
+
     async def get_group_stats(
         self, session: AsyncSession, group_id: int
     ) -> GroupStatisticsResponse:
@@ -168,18 +210,13 @@ class StatisticsRepository:
         if not group:
             raise HTTPException(status_code=404, detail="Group not found")
 
-        stats_stmt = select(
-            func.count(Result.id).label("total_results"),
-            func.avg(Result.grade).label("avg_grade")
-        ).where(Result.group_id == group_id)
-        
-        stats = (await session.execute(stats_stmt)).one()
+        stats = await self._rollup(session, "group", group_id)
 
         return GroupStatisticsResponse(
             group_id=group.id,
             name=group.name,
-            total_quizzes_taken=stats.total_results or 0,
-            average_grade=float(stats.avg_grade or 0.0)
+            total_quizzes_taken=stats.count if stats else 0,
+            average_grade=self._average(stats.count, stats.grade_sum) if stats else 0.0
         )
 
     async def get_teacher_stats(
@@ -190,23 +227,135 @@ class StatisticsRepository:
         if not teacher:
             raise HTTPException(status_code=404, detail="Teacher not found")
 
-        # Result -> Quiz -> User -> Teacher
-        stats_stmt = select(
-            func.count(Result.id).label("total_results"),
-            func.avg(Result.grade).label("avg_grade"),
-            func.count(distinct(Quiz.id)).label("quizzes_created")
-        ).join(Result.quiz).join(Quiz.user).join(User.teacher).where(Teacher.id == teacher_id)
-        
-        stats = (await session.execute(stats_stmt)).one()
+        stats = await self._rollup(session, "teacher", teacher_id)
+
+        # The teacher's quizzes that have results, one rollup row each
+        quizzes_stmt = (
+            select(func.count(StatsRollup.id))
+            .join(Quiz, and_(StatsRollup.scope == "quiz", StatsRollup.scope_id == Quiz.id))
+            .where(Quiz.user_id == teacher.user_id)
+        )
+        quizzes_created = (await session.execute(quizzes_stmt)).scalar() or 0
         
         # We need teacher name, assume related user is loaded or accessible via refresh if needed
         # Or simplistic concatenation if columns exist
         return TeacherStatisticsResponse(
             teacher_id=teacher.id,
             full_name=f"{teacher.first_name} {teacher.last_name}",
-            total_quizzes_created=stats.quizzes_created or 0,
-            total_results=stats.total_results or 0,
-            average_grade=float(stats.avg_grade or 0.0)
+            total_quizzes_created=quizzes_created,
+            total_results=stats.count if stats else 0,
+            average_grade=self._average(stats.count, stats.grade_sum) if stats else 0.0
+        )
+
+    async def get_grade_distribution(
+        self, session: AsyncSession, scope: str, scope_id: int
+    ) -> GradeDistributionResponse:
+        model = {"quiz": Quiz, "group": Group, "subject": Subject}[scope]
+        if not await session.get(model, scope_id):
+            raise HTTPException(status_code=404, detail=f"{scope.capitalize()} not found")
+
+        # At most 101 rows, kept up to date by modules/statistics/rollup.py
+        stmt = select(GradeHistogram.grade, GradeHistogram.count).where(
+            GradeHistogram.scope == scope, GradeHistogram.scope_id == scope_id
         )
+        histogram = [0] * 101
+        for grade, count in (await session.execute(stmt)).all():
+            histogram[min(max(grade, 0), 100)] += count
+
+        total = sum(histogram)
+
+        def percentile(p: float) -> Optional[int]:
+            if not total:
+                return None
+            rank = max(1, math.ceil(p * total))
+            seen = 0
+            for grade, count in enumerate(histogram):
+                seen += count
+                if seen >= rank:
+                    return grade
+
+        return GradeDistributionResponse(
+            scope=scope,
+            scope_id=scope_id,
+            count=total,
+            median=percentile(0.5),
+            p10=percentile(0.1),
+            p90=percentile(0.9),
+            histogram=histogram,
+        )
+
+
+    async def get_trends(
+        self,
+        session: AsyncSession,
+        scope: str,
+        scope_id: int,
+        bucket: str,
+        start: Optional[datetime],
+        end: Optional[datetime],
+    ) -> TrendsResponse:
+        model = {"quiz": Quiz, "group": Group, "faculty": Faculty}[scope]
+        if not await session.get(model, scope_id):
+            raise HTTPException(status_code=404, detail=f"{scope.capitalize()} not found")
+
+        # The hourly rows hold the database's local time, like created_at,
+        # so bounds with a time zone are converted and "now" is its clock
+        async def local(moment: Optional[datetime]) -> Optional[datetime]:
+            if moment is None or moment.tzinfo is None:
+                return moment
+            return await session.scalar(
+                select(
+                    func.timezone(
+                        func.current_setting("TimeZone"),
+                        literal(moment, DateTime(timezone=True)),
+                    )
+                )
+            )
+
+        end = await local(end) or await session.scalar(select(func.localtimestamp()))
+        start = await local(start) or end - timedelta(days=30)
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start must be before end",
+            )
+
+        # Hourly rows from modules/statistics/trends.py, summed per day if asked
+        column = TrendRollup.hour
+        if bucket == "day":
+            column = func.date_trunc("day", TrendRollup.hour)
+        stmt = (
+            select(
+                column.label("bucket"),
+                func.sum(TrendRollup.count).label("count"),
+                func.sum(TrendRollup.grade_sum).label("grade_sum"),
+            )
+            .where(
+                TrendRollup.scope == scope,
+                TrendRollup.scope_id == scope_id,
+                TrendRollup.hour >= start,
+                TrendRollup.hour < end,
+            )
+            .group_by(column)
+            .order_by(column)
+        )
+        rows = (await session.execute(stmt)).all()
+
+        return TrendsResponse(
+            scope=scope,
+            scope_id=scope_id,
+            bucket=bucket,
+            start=start,
+            end=end,
+            points=[
+                TrendPoint(
+                    bucket=row.bucket,
+                    count=row.count,
+                    average_grade=self._average(row.count, row.grade_sum),
+                )
+                for row in rows
+            ],
+        )
+
 
 get_statistics_repository = StatisticsRepository()
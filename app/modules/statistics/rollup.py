@@ -0,0 +1,272 @@
+"""
+Incrementally maintained grade aggregates per quiz, group, faculty,
+subject, teacher and user (stats_rollups), so the statistics endpoints
+read one row instead of scanning results, and grade histograms per
+quiz, group and subject (grade_histograms, one row per grade) for the
+distribution endpoints.
+
+New results are added as deltas in the transaction that writes them:
+save_submissions calls add_results for its multi-row insert, and the
+mapper events below cover results written through the ORM (admin panel,
+tests). Deleting or editing a result recomputes the affected rows from
+results, since min and max cannot be taken back incrementally.
+
+The faculty is the result group's faculty and the teacher the quiz
+author's teacher profile, both as of when the result is written.
+"""
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import Connection, delete, event, func, inspect, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.grade_histogram.model import GradeHistogram
+from app.models.group.model import Group
+from app.models.quiz.model import Quiz
+from app.models.results.model import Result
+from app.models.stats_rollup.model import StatsRollup
+from app.models.teacher.model import Teacher
+
+SCOPES = ("quiz", "group", "faculty", "subject", "teacher", "user")
+HISTOGRAM_SCOPES = ("quiz", "group", "subject")
+
+# Result columns that decide which rows a result counts in, and how
+_TRACKED = ("user_id", "quiz_id", "subject_id", "group_id", "grade")
+
+ScopeKey = tuple[str, int]
+
+
+def _scope_keys(
+    connection: Connection, results: list[dict]
+) -> dict[int, list[ScopeKey]]:
+    """Rollup rows each result (by position) counts in."""
+    group_ids = {r["group_id"] for r in results if r["group_id"] is not None}
+    quiz_ids = {r["quiz_id"] for r in results if r["quiz_id"] is not None}
+
+    faculty_of = {}
+    if group_ids:
+        faculty_of = dict(
+            connection.execute(
+                select(Group.id, Group.faculty_id).where(Group.id.in_(group_ids))
+            ).all()
+        )
+    teacher_of = {}
+    if quiz_ids:
+        teacher_of = dict(
+            connection.execute(
+                select(Quiz.id, Teacher.id)
+                .join(Teacher, Teacher.user_id == Quiz.user_id)
+                .where(Quiz.id.in_(quiz_ids))
+            ).all()
+        )
+
+    keys = {}
+    for i, r in enumerate(results):
+        candidates = [
+            ("quiz", r["quiz_id"]),
+            ("group", r["group_id"]),
+            ("faculty", faculty_of.get(r["group_id"])),
+            ("subject", r["subject_id"]),
+            ("teacher", teacher_of.get(r["quiz_id"])),
+            ("user", r["user_id"]),
+        ]
+        keys[i] = [
+            (scope, scope_id) for scope, scope_id in candidates if scope_id is not None
+        ]
+    return keys
+
+
+def add_results(connection: Connection, results: list[dict]) -> None:
+    """
+    Adds new results (dicts with the _TRACKED columns) to their rollup
+    rows with a single INSERT ... ON CONFLICT.
+    """
+    if not results:
+        return
+
+    deltas: dict[ScopeKey, dict] = {}
+    histogram: dict[tuple[str, int, int], int] = defaultdict(int)
+    for i, keys in _scope_keys(connection, results).items():
+        grade = results[i]["grade"]
+        for key in keys:
+            if key[0] in HISTOGRAM_SCOPES:
+                histogram[(*key, grade)] += 1
+            delta = deltas.get(key)
+            if delta is None:
+                deltas[key] = {
+                    "scope": key[0],
+                    "scope_id": key[1],
+                    "count": 1,
+                    "grade_sum": grade,
+                    "grade_min": grade,
+                    "grade_max": grade,
+                }
+            else:
+                delta["count"] += 1
+                delta["grade_sum"] += grade
+                delta["grade_min"] = min(delta["grade_min"], grade)
+                delta["grade_max"] = max(delta["grade_max"], grade)
+
+    if not deltas:
+        return
+
+    # Same row order in every transaction, so concurrent submits cannot deadlock
+    stmt = insert(StatsRollup).values([deltas[key] for key in sorted(deltas)])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StatsRollup.scope, StatsRollup.scope_id],
+        set_={
+            "count": StatsRollup.count + stmt.excluded.count,
+            "grade_sum": StatsRollup.grade_sum + stmt.excluded.grade_sum,
+            "grade_min": func.least(StatsRollup.grade_min, stmt.excluded.grade_min),
+            "grade_max": func.greatest(StatsRollup.grade_max, stmt.excluded.grade_max),
+            "updated_at": func.now(),
+        },
+    )
+    connection.execute(stmt)
+
+    if not histogram:
+        return
+    stmt = insert(GradeHistogram).values(
+        [
+            {"scope": scope, "scope_id": scope_id, "grade": grade, "count": count}
+            for (scope, scope_id, grade), count in sorted(histogram.items())
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            GradeHistogram.scope, GradeHistogram.scope_id, GradeHistogram.grade
+        ],
+        set_={
+            "count": GradeHistogram.count + stmt.excluded.count,
+            "updated_at": func.now(),
+        },
+    )
+    connection.execute(stmt)
+
+
+def scope_source(scope: str):
+    """Select over results joined as needed, and the scope id column."""
+    if scope == "faculty":
+        scope_column = Group.faculty_id
+        base = select(Result).join(Group, Group.id == Result.group_id)
+    elif scope == "teacher":
+        scope_column = Teacher.id
+        base = (
+            select(Result)
+            .join(Quiz, Quiz.id == Result.quiz_id)
+            .join(Teacher, Teacher.user_id == Quiz.user_id)
+        )
+    else:
+        scope_column = getattr(Result, f"{scope}_id")
+        base = select(Result)
+    return base, scope_column
+
+
+def _aggregate(scope: str, scope_ids: list[int]):
+    """(scope, scope_id, count, sum, min, max) of results per scope_id."""
+    base, scope_column = scope_source(scope)
+    return (
+        base.with_only_columns(
+            literal(scope),
+            scope_column,
+            func.count(Result.id),
+            func.sum(Result.grade),
+            func.min(Result.grade),
+            func.max(Result.grade),
+        )
+        .where(scope_column.in_(scope_ids))
+        .group_by(scope_column)
+    )
+
+
+def refresh(connection: Connection, keys: Iterable[ScopeKey]) -> None:
+    """Recomputes the given rollup rows from results."""
+    by_scope = defaultdict(set)
+    for scope, scope_id in keys:
+        by_scope[scope].add(scope_id)
+
+    for scope in sorted(by_scope):
+        scope_ids = sorted(by_scope[scope])
+        # Rows whose last result is gone must disappear
+        connection.execute(
+            delete(StatsRollup).where(
+                tuple_(StatsRollup.scope, StatsRollup.scope_id).in_(
+                    [(scope, scope_id) for scope_id in scope_ids]
+                )
+            )
+        )
+        stmt = insert(StatsRollup).from_select(
+            ["scope", "scope_id", "count", "grade_sum", "grade_min", "grade_max"],
+            _aggregate(scope, scope_ids),
+        )
+        # A result committed meanwhile may have re-created a row; our
+        # aggregate already includes it
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[StatsRollup.scope, StatsRollup.scope_id],
+            set_={
+                "count": stmt.excluded.count,
+                "grade_sum": stmt.excluded.grade_sum,
+                "grade_min": stmt.excluded.grade_min,
+                "grade_max": stmt.excluded.grade_max,
+                "updated_at": func.now(),
+            },
+        )
+        connection.execute(stmt)
+
+        if scope in HISTOGRAM_SCOPES:
+            _refresh_histograms(connection, scope, scope_ids)
+
+
+def _refresh_histograms(
+    connection: Connection, scope: str, scope_ids: list[int]
+) -> None:
+    connection.execute(
+        delete(GradeHistogram).where(
+            GradeHistogram.scope == scope, GradeHistogram.scope_id.in_(scope_ids)
+        )
+    )
+    base, scope_column = scope_source(scope)
+    stmt = insert(GradeHistogram).from_select(
+        ["scope", "scope_id", "grade", "count"],
+        base.with_only_columns(
+            literal(scope), scope_column, Result.grade, func.count(Result.id)
+        )
+        .where(scope_column.in_(scope_ids))
+        .group_by(scope_column, Result.grade),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            GradeHistogram.scope, GradeHistogram.scope_id, GradeHistogram.grade
+        ],
+        set_={"count": stmt.excluded.count, "updated_at": func.now()},
+    )
+    connection.execute(stmt)
+
+
+def _columns(result: Result) -> dict:
+    return {column: getattr(result, column) for column in _TRACKED}
+
+
+@event.listens_for(Result, "after_insert")
+def _result_inserted(mapper, connection, target: Result) -> None:
+    add_results(connection, [_columns(target)])
+
+
+@event.listens_for(Result, "after_update")
+def _result_updated(mapper, connection, target: Result) -> None:
+    state = inspect(target)
+    old = {}
+    for column in _TRACKED:
+        history = state.attrs[column].history
+        old[column] = history.deleted[0] if history.deleted else getattr(target, column)
+
+    new = _columns(target)
+    if old == new:
+        return
+    keys = _scope_keys(connection, [old, new])
+    refresh(connection, keys[0] + keys[1])
+
+
+@event.listens_for(Result, "after_delete")
+def _result_deleted(mapper, connection, target: Result) -> None:
+    refresh(connection, _scope_keys(connection, [_columns(target)])[0])
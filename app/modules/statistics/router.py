@@ -1,10 +1,18 @@
 from core.db_helper import db_helper
 from dependence.role_checker import PermissionRequired
-from fastapi import APIRouter, Depends, status
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 # from fastapi_cache.decorator import cache
 
+from core.utils.export import ExportFormat, export_response
+
 from .repository import get_statistics_repository
+from .item_analysis import item_analysis
+from .leaderboard import leaderboard
+from .snapshot import general_stats_snapshot
 from .schemas import (
     GeneralStatisticsResponse,
     QuizStatisticsResponse,
@@ -12,6 +20,11 @@ from .schemas import (
     FacultyStatisticsResponse,
     GroupStatisticsResponse,
     TeacherStatisticsResponse,
+    GradeDistributionResponse,
+    ItemAnalysisResponse,
+    LeaderboardRankResponse,
+    LeaderboardResponse,
+    TrendsResponse,
 )
 
 router = APIRouter(
@@ -26,7 +39,7 @@ async def get_general_statistics(
     session: AsyncSession = Depends(db_helper.session_getter),
     _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
 ):
-    return await get_statistics_repository.get_general_stats(session=session)
+    return await general_stats_snapshot.get(session=session)
 
 
 @router.get("/quiz/{quiz_id}", response_model=QuizStatisticsResponse)
@@ -41,6 +54,17 @@ async def get_quiz_statistics(
     )
 
 
+@router.get("/quiz/{quiz_id}/distribution", response_model=GradeDistributionResponse)
+async def get_quiz_grade_distribution(
+    quiz_id: int,
+    session: AsyncSession = Depends(db_helper.session_getter),
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    return await get_statistics_repository.get_grade_distribution(
+        session=session, scope="quiz", scope_id=quiz_id
+    )
+
+
 @router.get("/user/{user_id}", response_model=UserStatisticsResponse)
 # @cache(expire=60)
 async def get_user_statistics(
@@ -53,6 +77,27 @@ async def get_user_statistics(
     )
 
 
+@router.get("/faculty/export")
+async def export_faculty_statistics(
+    faculty_id: Optional[int] = Query(None, description="Defaults to every faculty"),
+    format: ExportFormat = Query("xlsx"),
+    session: AsyncSession = Depends(db_helper.session_getter),
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    filename = "faculty_statistics"
+    if faculty_id is not None:
+        await get_statistics_repository.check_faculty(
+            session=session, faculty_id=faculty_id
+        )
+        filename = f"faculty_statistics_{faculty_id}"
+    return export_response(
+        header=get_statistics_repository.FACULTY_EXPORT_HEADER,
+        rows=get_statistics_repository.faculty_export_rows(faculty_id=faculty_id),
+        fmt=format,
+        filename=filename,
+    )
+
+
 @router.get("/faculty/{faculty_id}", response_model=FacultyStatisticsResponse)
 async def get_faculty_statistics(
     faculty_id: int,
@@ -75,6 +120,28 @@ async def get_group_statistics(
     )
 
 
+@router.get("/group/{group_id}/distribution", response_model=GradeDistributionResponse)
+async def get_group_grade_distribution(
+    group_id: int,
+    session: AsyncSession = Depends(db_helper.session_getter),
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    return await get_statistics_repository.get_grade_distribution(
+        session=session, scope="group", scope_id=group_id
+    )
+
+
+@router.get("/subject/{subject_id}/distribution", response_model=GradeDistributionResponse)
+async def get_subject_grade_distribution(
+    subject_id: int,
+    session: AsyncSession = Depends(db_helper.session_getter),
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    return await get_statistics_repository.get_grade_distribution(
+        session=session, scope="subject", scope_id=subject_id
+    )
+
+
 @router.get("/teacher/{teacher_id}", response_model=TeacherStatisticsResponse)
 async def get_teacher_statistics(
     teacher_id: int,
@@ -84,3 +151,66 @@ async def get_teacher_statistics(
     return await get_statistics_repository.get_teacher_stats(
         session=session, teacher_id=teacher_id
     )
+
+
+@router.get("/question", response_model=ItemAnalysisResponse)
+async def get_question_statistics(
+    quiz_id: Optional[int] = Query(None),
+    subject_id: Optional[int] = Query(None),
+    session: AsyncSession = Depends(db_helper.session_getter),
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    if (quiz_id is None) == (subject_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pass exactly one of quiz_id and subject_id",
+        )
+    if quiz_id is not None:
+        return await item_analysis.get(session=session, scope="quiz", scope_id=quiz_id)
+    return await item_analysis.get(session=session, scope="subject", scope_id=subject_id)
+
+
+@router.get("/leaderboard/{scope}/{scope_id}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    scope: Literal["quiz", "group", "subject"],
+    scope_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(db_helper.session_getter),
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    return await leaderboard.top(
+        session=session, scope=scope, scope_id=scope_id, limit=limit
+    )
+
+
+@router.get(
+    "/leaderboard/{scope}/{scope_id}/rank/{user_id}",
+    response_model=LeaderboardRankResponse,
+)
+async def get_leaderboard_rank(
+    scope: Literal["quiz", "group", "subject"],
+    scope_id: int,
+    user_id: int,
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    return await leaderboard.rank(scope=scope, scope_id=scope_id, user_id=user_id)
+
+
+@router.get("/trends/{scope}/{scope_id}", response_model=TrendsResponse)
+async def get_trends(
+    scope: Literal["quiz", "group", "faculty"],
+    scope_id: int,
+    bucket: Literal["hour", "day"] = Query("day"),
+    start: Optional[datetime] = Query(None, description="Defaults to 30 days before end"),
+    end: Optional[datetime] = Query(None, description="Defaults to now"),
+    session: AsyncSession = Depends(db_helper.session_getter),
+    _: PermissionRequired = Depends(PermissionRequired("read:statistics")),
+):
+    return await get_statistics_repository.get_trends(
+        session=session,
+        scope=scope,
+        scope_id=scope_id,
+        bucket=bucket,
+        start=start,
+        end=end,
+    )
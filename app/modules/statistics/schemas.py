@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
@@ -5,6 +6,8 @@ class GeneralStatisticsResponse(BaseModel):
     total_students_tested: int
     total_quizzes_taken: int
     system_average_grade: float
+    # When the figures were computed; they may lag behind by the refresh interval
+    as_of: datetime
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -63,3 +66,92 @@ class TeacherStatisticsResponse(BaseModel):
     average_grade: float
     
     model_config = ConfigDict(from_attributes=True)
+
+
+class GradeDistributionResponse(BaseModel):
+    scope: str  # quiz, group or subject
+    scope_id: int
+    count: int
+    # Nearest-rank percentiles, None without results
+    median: Optional[int]
+    p10: Optional[int]
+    p90: Optional[int]
+    # histogram[g] = number of results with grade g, g = 0..100
+    histogram: list[int]
+
+
+class DistractorCounts(BaseModel):
+    # Times each option was chosen; option a is the correct one
+    a: int
+    b: int
+    c: int
+    d: int
+    # Answers matching none of the options
+    other: int
+
+
+class QuestionAnalysis(BaseModel):
+    question_id: int
+    text: Optional[str]
+    responses: int
+    # Share of correct answers (difficulty)
+    p_value: float
+    # p-value in the top 27% of attempts by score minus in the bottom 27%
+    discrimination: Optional[float]
+    # Correlation between answering correctly and the attempt's score
+    point_biserial: Optional[float]
+    distractors: DistractorCounts
+
+
+class ItemAnalysisResponse(BaseModel):
+    scope: str  # quiz or subject
+    scope_id: int
+    attempts: int
+    # When the figures were computed; new results show up with the next refresh
+    as_of: datetime
+    questions: list[QuestionAnalysis]
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: Optional[str]
+    full_name: Optional[str]
+    # Best grade, and when it was first reached
+    grade: int
+    submitted_at: datetime
+
+
+class LeaderboardResponse(BaseModel):
+    scope: str  # quiz, group or subject
+    scope_id: int
+    # Students on the board
+    size: int
+    entries: list[LeaderboardEntry]
+
+
+class LeaderboardRankResponse(BaseModel):
+    scope: str
+    scope_id: int
+    user_id: int
+    rank: int
+    size: int
+    grade: int
+    submitted_at: datetime
+
+
+class TrendPoint(BaseModel):
+    # Start of the hour or day, UTC
+    bucket: datetime
+    count: int
+    average_grade: float
+
+
+class TrendsResponse(BaseModel):
+    scope: str  # quiz, group or faculty
+    scope_id: int
+    bucket: str  # hour or day
+    start: datetime
+    end: datetime
+    # Buckets without results are left out
+    points: list[TrendPoint]
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import get_redis
+from core.config import settings
+from core.db_helper import db_helper
+
+from .repository import get_statistics_repository
+from .schemas import GeneralStatisticsResponse
+
+logger = logging.getLogger(__name__)
+
+
+class GeneralStatsSnapshot:
+    """
+    /statistics/general served from memory.
+
+    Every `interval` seconds one worker (whoever takes the Redis refresh
+    lock first) runs the general aggregate and publishes it to Redis; the
+    other workers pick it up from there. Requests read the in-process
+    copy. A snapshot older than two intervals is not served: the request
+    then reads Redis or, failing that, computes the figures itself, which
+    is also what happens before the first refresh.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._snapshot: Optional[GeneralStatisticsResponse] = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def _key(self) -> str:
+        return f"{settings.redis.prefix}:statistics:general"
+
+    @property
+    def _lock_key(self) -> str:
+        return f"{settings.redis.prefix}:statistics:general:refresh"
+
+    def _fresh(self, snapshot: Optional[GeneralStatisticsResponse]) -> bool:
+        if snapshot is None:
+            return False
+        age = (datetime.now(timezone.utc) - snapshot.as_of).total_seconds()
+        return age <= 2 * self.interval
+
+    async def get(self, session: AsyncSession) -> GeneralStatisticsResponse:
+        if self._fresh(self._snapshot):
+            return self._snapshot
+
+        snapshot = await self._read_shared()
+        if not self._fresh(snapshot):
+            snapshot = await get_statistics_repository.get_general_stats(session)
+            await self._publish(snapshot)
+        self._snapshot = snapshot
+        return snapshot
+
+    async def refresh(self) -> None:
+        redis = get_redis()
+        if redis is not None:
+            try:
+                acquired = await redis.set(
+                    self._lock_key, "1", nx=True, px=max(1, int(self.interval * 1000))
+                )
+            except RedisError as e:
+                logger.warning(f"Statistics snapshot lock unavailable: {e}")
+                acquired = True
+            if not acquired:
+                # Another worker refreshes this round
+                snapshot = await self._read_shared()
+                if snapshot is not None:
+                    self._snapshot = snapshot
+                return
+
+        async with db_helper.session_factory() as session:
+            snapshot = await get_statistics_repository.get_general_stats(session)
+        self._snapshot = snapshot
+        await self._publish(snapshot)
+
+    async def _read_shared(self) -> Optional[GeneralStatisticsResponse]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self._key)
+        except RedisError as e:
+            logger.warning(f"Failed to read statistics snapshot: {e}")
+            return None
+        return GeneralStatisticsResponse.model_validate_json(raw) if raw else None
+
+    async def _publish(self, snapshot: GeneralStatisticsResponse) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                self._key,
+                snapshot.model_dump_json(),
+                px=max(1, int(2 * self.interval * 1000)),
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to publish statistics snapshot: {e}")
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info("Started general statistics snapshot refresher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Stopped general statistics snapshot refresher")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"General statistics refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+general_stats_snapshot = GeneralStatsSnapshot(
+    interval=settings.statistics.general_snapshot_seconds
+)
@@ -0,0 +1,169 @@
+"""
+Hourly result counts and grade sums per quiz, group and faculty
+(trend_rollups), for the trend endpoints.
+
+The refresher recomputes the last `lookback` seconds of hours from
+results every `interval` seconds, one worker at a time. The time-range
+scan goes through the BRIN index on results.created_at. Trends therefore
+lag behind by up to one interval. Deleting or editing a result
+recomputes its hour in the same transaction, through the mapper events
+below.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import Connection, delete, event, func, inspect, literal, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.cache import get_redis
+from app.models.results.model import Result
+from app.models.trend_rollup.model import TrendRollup
+from core.config import settings
+from core.db_helper import db_helper
+
+from .rollup import scope_source
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("quiz", "group", "faculty")
+
+# Result columns that decide which rows a result counts in
+_TRACKED = ("quiz_id", "group_id", "grade", "created_at")
+
+
+def _hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def refresh(
+    connection: Connection, start: datetime, end: Optional[datetime] = None
+) -> None:
+    """Recomputes the hourly rows from the hour of `start` up to `end`."""
+    start = _hour(start)
+    connection.execute(
+        delete(TrendRollup).where(
+            TrendRollup.hour >= start, *([TrendRollup.hour < end] if end else [])
+        )
+    )
+
+    hour = func.date_trunc("hour", Result.created_at)
+    for scope in SCOPES:
+        base, scope_column = scope_source(scope)
+        stmt = insert(TrendRollup).from_select(
+            ["scope", "scope_id", "hour", "count", "grade_sum"],
+            base.with_only_columns(
+                literal(scope),
+                scope_column,
+                hour,
+                func.count(Result.id),
+                func.sum(Result.grade),
+            )
+            .where(
+                scope_column.is_not(None),
+                Result.created_at >= start,
+                *([Result.created_at < end] if end else []),
+            )
+            .group_by(scope_column, hour),
+        )
+        # Another refresh of the same hours may have got there first
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TrendRollup.scope, TrendRollup.scope_id, TrendRollup.hour],
+            set_={
+                "count": stmt.excluded.count,
+                "grade_sum": stmt.excluded.grade_sum,
+                "updated_at": func.now(),
+            },
+        )
+        connection.execute(stmt)
+
+
+def _refresh_hours(connection: Connection, moments: set[datetime]) -> None:
+    for hour in sorted({_hour(moment) for moment in moments if moment is not None}):
+        refresh(connection, hour, hour + timedelta(hours=1))
+
+
+@event.listens_for(Result, "after_update")
+def _result_updated(mapper, connection, target: Result) -> None:
+    state = inspect(target)
+    if not any(state.attrs[column].history.has_changes() for column in _TRACKED):
+        return
+    history = state.attrs["created_at"].history
+    _refresh_hours(connection, {*history.deleted, target.created_at})
+
+
+@event.listens_for(Result, "after_delete")
+def _result_deleted(mapper, connection, target: Result) -> None:
+    _refresh_hours(connection, {target.created_at})
+
+
+class TrendRefresher:
+    def __init__(self, interval: float, lookback: float):
+        self.interval = interval
+        self.lookback = lookback
+        self._task: asyncio.Task | None = None
+
+    @property
+    def _lock_key(self) -> str:
+        return f"{settings.redis.prefix}:statistics:trends:refresh"
+
+    async def refresh(self) -> None:
+        redis = get_redis()
+        if redis is not None:
+            try:
+                acquired = await redis.set(
+                    self._lock_key, "1", nx=True, px=max(1, int(self.interval * 1000))
+                )
+            except RedisError as e:
+                logger.warning(f"Trend refresh lock unavailable: {e}")
+                acquired = True
+            if not acquired:
+                # Another worker refreshes this round
+                return
+
+        async with db_helper.session_factory() as session:
+            # Database clock, in the same terms as results.created_at
+            now = await session.scalar(select(func.localtimestamp()))
+            start = now - timedelta(seconds=self.lookback)
+            # After downtime, from the last hour recorded instead
+            last = await session.scalar(select(func.max(TrendRollup.hour)))
+            if last is None:
+                last = await session.scalar(select(func.min(Result.created_at)))
+            if last is None:
+                return
+            await session.run_sync(
+                lambda sync_session: refresh(
+                    sync_session.connection(), min(start, last)
+                )
+            )
+            await session.commit()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info("Started trend refresher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Stopped trend refresher")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Trend refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+trend_refresher = TrendRefresher(
+    interval=settings.statistics.trends_refresh_seconds,
+    lookback=settings.statistics.trends_lookback_seconds,
+)
@@ -5,6 +5,9 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from core.utils.password_hash import password_hasher
+from dependence.permission_cache import permission_cache
+
 from .schemas import (
     UserCreateRequest,
     UserListRequest,
@@ -39,9 +42,9 @@ class UserRepository:
                     detail="One or more roles not found",
                 )
 
-        # Создаем пользователя. Пароль уже захэширован 
-        # внутри UserCreateRequest (field_validator)
-        new_user = User(username=data.username, password=data.password, roles=roles)
+        # Создаем пользователя
+        hashed_password = await password_hasher.hash(data.password)
+        new_user = User(username=data.username, password=hashed_password, roles=roles)
 
         session.add(new_user)
         try:
@@ -136,6 +139,7 @@ class UserRepository:
 
         await session.delete(user)
         await session.commit()
+        await permission_cache.invalidate_user(user_id)
 
 
     async def assign_roles(
@@ -182,6 +186,7 @@ class UserRepository:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error while assigning roles"
             )
+        await permission_cache.invalidate_user(data.user_id)
 
 
 get_user_repository = UserRepository()
\ No newline at end of file
@@ -1,9 +1,10 @@
 from core.db_helper import db_helper
-from dependence.role_checker import PermissionRequired
+from dependence.role_checker import PermissionRequired, get_current_user_id
 from fastapi import APIRouter, Depends, Header, status
 from sqlalchemy.ext.asyncio import AsyncSession
 # from fastapi_cache.decorator import cache
 from fastapi_limiter.depends import RateLimiter
+from core.utils.password_hash import PasswordHasherMetrics, password_hasher
 
 from .repository import get_user_repository
 from .schemas import (
@@ -43,10 +44,18 @@ async def refresh(
 @router.get("/me", response_model=UserCreateResponse)
 # @cache(expire=60, key_builder=custom_key_builder)
 async def get_me(
-    authorization: str = Header(...),
+    user_id: int = Depends(get_current_user_id),
     session: AsyncSession = Depends(db_helper.session_getter),
 ):
-    return await auth_service.get_current_user(session=session, token=authorization)
+    return await auth_service.get_current_user(session=session, user_id=user_id)
+
+
+# Declared before /{user_id}, which would capture the path
+@router.get("/password_hashing", response_model=PasswordHasherMetrics)
+async def get_password_hashing_metrics(
+    _: PermissionRequired = Depends(PermissionRequired("read:user")),
+):
+    return password_hasher.metrics()
 
 
 @router.post(
@@ -1,6 +1,5 @@
 from datetime import datetime
 
-from core.utils.password_hash import hash_password
 from pydantic import BaseModel, ConfigDict, field_validator
 
 
@@ -30,7 +29,8 @@ class UserCreateRequest(BaseModel):
     def validate_password(cls, value: str) -> str:
         if not value.strip():
             raise ValueError("Password cannot be empty")
-        return hash_password(value.strip())
+        # Hashed by the repository, off the event loop
+        return value.strip()
 
 
 class UserUpdateRequest(BaseModel):
@@ -2,12 +2,13 @@ from datetime import datetime, timedelta, timezone
 
 import jwt
 from core.config import settings
-from core.utils.password_hash import verify_password
+from core.utils.password_hash import password_hasher
 from fastapi import HTTPException, status
 from app.models.user.model import User
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from dependence.permission_claims import build_permission_claims
 
 from .schemas import UserLoginRequest, UserLoginResponse
 
@@ -23,12 +24,13 @@ class UserService:
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username"
             )
 
-        if not verify_password(data.password, user.password):
+        # Users synced from the HEMIS roster have no password until their first HEMIS login
+        if not user.password or not await password_hasher.verify(data.password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password"
             )
 
-        access_token = self.create_access_token({"user_id": user.id})
+        access_token = await self.issue_access_token(session, user.id)
         refresh_token = self.create_refresh_token({"user_id": user.id})
 
         return UserLoginResponse(
@@ -48,17 +50,15 @@ class UserService:
                 detail="Invalid authentication credentials",
             )
 
-        access_token = self.create_access_token({"user_id": user.id})
+        access_token = await self.issue_access_token(session, user.id)
         refresh_token = self.create_refresh_token({"user_id": user.id})
 
         return UserLoginResponse(
             type="Bearer", access_token=access_token, refresh_token=refresh_token
         )
 
-    async def get_current_user(self, session: AsyncSession, token: str) -> User:
-        token = token.split(" ")[1]
-        payload = self.token_decode(token)
-        user = await self.get_user_by_id(session, payload["user_id"])
+    async def get_current_user(self, session: AsyncSession, user_id: int) -> User:
+        user = await self.get_user_by_id(session, user_id)
 
         if not user:
             raise HTTPException(
@@ -83,6 +83,11 @@ class UserService:
         )
         return encoded_jwt
 
+    async def issue_access_token(self, session: AsyncSession, user_id: int) -> str:
+        """Access token with the user's permissions embedded as claims."""
+        claims = await build_permission_claims(session, user_id)
+        return self.create_access_token({"user_id": user_id, **claims})
+
     def create_access_token(self, data: dict):
         delta = timedelta(minutes=settings.jwt.access_token_expires_minutes)
         return self._create_token(
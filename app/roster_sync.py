@@ -0,0 +1,43 @@
+"""
+Import the HEMIS student roster from the command line:
+
+    python app/roster_sync.py [--page-size N] [--concurrency N] [--batch-size N]
+
+Same job as POST /hemis/roster/sync, for cron or a deploy step.
+"""
+import argparse
+import asyncio
+
+import app.core.logging  # noqa: F401  Trigger logging/logfire configuration
+from app.core.db_helper import db_helper
+from app.modules.hemis.client import hemis_client
+from app.modules.hemis.roster import roster_sync
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.page_size:
+        roster_sync.page_size = args.page_size
+    if args.concurrency:
+        roster_sync.concurrency = args.concurrency
+    if args.batch_size:
+        roster_sync.batch_size = args.batch_size
+
+    await hemis_client.start()
+    try:
+        result = await roster_sync.run()
+        print(result.model_dump_json(indent=2))
+    finally:
+        await hemis_client.stop()
+        await db_helper.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the HEMIS student roster")
+    parser.add_argument("--page-size", type=int)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--batch-size", type=int)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
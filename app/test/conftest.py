@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 import pytest_asyncio
 from core.config import settings
 from core.db_helper import db_helper
@@ -7,6 +9,8 @@ from fastapi_limiter import FastAPILimiter
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from main import app
+from dependence.permission_cache import permission_cache
+from app.modules.statistics.snapshot import general_stats_snapshot
 from app.models.base import Base
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
@@ -46,6 +50,9 @@ async def clear_test_redis():
     test_redis = redis.from_url("redis://localhost:6379")
     await test_redis.flushdb() # Полностью очищаем базу перед тестом
     await test_redis.aclose()
+    # User ids repeat between tests, drop permissions cached in-process
+    permission_cache.clear()
+    general_stats_snapshot.clear()
     yield
 
 async_engine = create_async_engine(
@@ -214,3 +221,33 @@ async def test_teacher(auth_client, test_kafedra):
     response = await auth_client.post("/teacher/", json=payload)
     assert response.status_code == 201
     return response.json()
+
+
+@pytest_asyncio.fixture
+async def start_attempt(auth_client, async_db):
+    """Links questions to a quiz and starts it; end_quiz needs an open attempt"""
+    from app.models.quiz_questions.model import QuizQuestion
+
+    async def start(quiz_id: int, pin: str, question_ids: list[int]) -> dict:
+        async_db.add_all(
+            [QuizQuestion(quiz_id=quiz_id, question_id=q_id) for q_id in question_ids]
+        )
+        await async_db.commit()
+        response = await auth_client.post(
+            "/quiz_process/start_quiz", json={"quiz_id": quiz_id, "pin": pin}
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    return start
+
+
+@pytest_asyncio.fixture
+async def background_session(async_db, monkeypatch):
+    """Background jobs open their own sessions; hand them the test session"""
+
+    @asynccontextmanager
+    async def session_factory():
+        yield async_db
+
+    monkeypatch.setattr(db_helper, "session_factory", session_factory)
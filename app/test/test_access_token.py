@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+import jwt
+import pytest
+
+from core.config import settings
+from core.utils.access_token import VerifiedTokenCache
+from modules.user.service import auth_service
+
+
+def test_verified_token_is_decoded_once():
+    cache = VerifiedTokenCache(max_size=2)
+    token = auth_service.create_access_token({"user_id": 1})
+
+    first = cache.decode(token)
+    assert first["user_id"] == 1
+    # Served from the cache, not decoded again
+    assert cache.decode(token) is first
+
+
+def test_verified_token_cache_rejects_bad_tokens():
+    cache = VerifiedTokenCache(max_size=2)
+
+    expired = auth_service._create_token(
+        {"user_id": 1}, settings.jwt.access_token_secret, timedelta(seconds=-1)
+    )
+    with pytest.raises(jwt.ExpiredSignatureError):
+        cache.decode(expired)
+
+    token = auth_service.create_access_token({"user_id": 1})
+    with pytest.raises(jwt.PyJWTError):
+        cache.decode(token + "x")
+
+
+def test_verified_token_cache_is_bounded():
+    cache = VerifiedTokenCache(max_size=2)
+    tokens = [auth_service.create_access_token({"user_id": i}) for i in range(3)]
+    for token in tokens:
+        cache.decode(token)
+
+    assert len(cache._tokens) == 2
+
+
+@pytest.mark.asyncio
+async def test_me_uses_request_claims(auth_client, test_user):
+    response = await auth_client.get("/user/me")
+    assert response.status_code == 200
+    assert response.json()["username"] == test_user["username"]
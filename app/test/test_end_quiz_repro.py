@@ -52,8 +52,9 @@ async def setup_quiz_execution(auth_client, async_db, test_subject, test_user):
     }
 
 @pytest.mark.asyncio
-async def test_end_quiz_error_reproduction(setup_quiz_execution, auth_client):
+async def test_end_quiz_error_reproduction(setup_quiz_execution, auth_client, start_attempt):
     data = setup_quiz_execution
+    await start_attempt(data["quiz_id"], "1234", [])
     
     # End Quiz Payload
     end_payload = {
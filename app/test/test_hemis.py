@@ -59,3 +59,166 @@ async def test_hemis_login_external_success(async_client):
         assert response.status_code in [400, 401, 503]
         data = response.json()
         assert "detail" in data
+
+
+ME_DATA = {
+    "full_name": "Aliyev Vali Ganiyevich",
+    "student_id_number": "319231100999",
+    "faculty": {"name": "Fingerprint Faculty"},
+    "group": {"name": "FP-21"},
+    "level": {"name": "2-kurs"},
+    "birth_date": 1000000000,
+}
+
+
+@pytest.mark.asyncio
+async def test_hemis_save_user_data_skips_unchanged_profile(async_db):
+    from sqlalchemy import select
+    from app.models.student.model import Student
+    from app.modules.hemis.service import hemis_service
+
+    user = await hemis_service.save_user_data(async_db, "fp_student", "first", ME_DATA)
+    assert user.hemis_fingerprint == hemis_service.profile_fingerprint(ME_DATA)
+    student = (
+        await async_db.execute(select(Student).where(Student.user_id == user.id))
+    ).scalar_one()
+    updated_at = student.updated_at
+
+    # Same payload in a different key order: only the password is written
+    reordered = dict(reversed(list(ME_DATA.items())))
+    await hemis_service.save_user_data(async_db, "fp_student", "second", reordered)
+    await async_db.refresh(student)
+    assert student.updated_at == updated_at
+
+    # A real change goes through
+    changed = {**ME_DATA, "level": {"name": "3-kurs"}}
+    user = await hemis_service.save_user_data(async_db, "fp_student", "second", changed)
+    await async_db.refresh(student)
+    assert student.level == "3-kurs"
+    assert user.hemis_fingerprint == hemis_service.profile_fingerprint(changed)
+
+    # An unchanged profile still brings back a Student row deleted meanwhile
+    await async_db.delete(student)
+    await async_db.commit()
+    await hemis_service.save_user_data(async_db, "fp_student", "third", changed)
+    student = (
+        await async_db.execute(select(Student).where(Student.user_id == user.id))
+    ).scalar_one()
+    assert student.level == "3-kurs"
+
+
+def roster_client(students: list[dict]):
+    import httpx
+    from app.modules.hemis.client import CircuitBreaker, HemisClient
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        limit = int(request.url.params["limit"])
+        items = students[(page - 1) * limit : page * limit]
+        page_count = (len(students) + limit - 1) // limit
+        return httpx.Response(
+            200,
+            json={"success": True, "data": {"items": items, "pagination": {"pageCount": page_count}}},
+        )
+
+    return HemisClient(
+        login_url="https://hemis.test/auth/login",
+        me_url="https://hemis.test/account/me",
+        roster_url="https://hemis.test/data/student-list",
+        roster_token="service-token",
+        timeout=httpx.Timeout(1),
+        limits=httpx.Limits(),
+        retries=0,
+        retry_backoff=0,
+        breaker=CircuitBreaker(threshold=5, reset_seconds=30),
+        transport=httpx.MockTransport(handler),
+    )
+
+
+@pytest.mark.asyncio
+async def test_hemis_roster_sync_upserts_in_batches(async_db, background_session):
+    from sqlalchemy import func, select
+    from app.models.student.model import Student
+    from app.modules.hemis import roster
+
+    students = [
+        {**ME_DATA, "student_id_number": f"3192311{i:05d}", "full_name": f"Student {i} X"}
+        for i in range(5)
+    ]
+    students[4]["group"] = {"name": "FP-22"}
+
+    sync = roster.RosterSync(
+        client=roster_client(students), page_size=2, concurrency=2, batch_size=3
+    )
+
+    result = await sync.run()
+    assert (result.fetched, result.users_created, result.students_upserted) == (5, 5, 5)
+    assert (result.faculties_created, result.groups_created) == (1, 2)
+
+    # Nothing changed in HEMIS: nothing is written
+    result = await sync.run()
+    assert (result.users_created, result.students_upserted) == (0, 0)
+
+    students[0]["level"] = {"name": "3-kurs"}
+    result = await sync.run()
+    assert result.students_upserted == 1
+
+    count = await async_db.scalar(select(func.count(Student.id)))
+    assert count == 5
+
+    # The first HEMIS login of a synced student finds the records in place
+    response_user = await roster.hemis_service.save_user_data(
+        async_db, students[1]["student_id_number"], "secret", students[1]
+    )
+    assert await async_db.scalar(select(func.count(Student.id))) == 5
+    assert response_user.password
+
+
+@pytest.mark.asyncio
+async def test_hemis_upstream_lock_makes_other_workers_wait():
+    import asyncio
+    from app.modules.hemis.service import hemis_service
+
+    order = []
+
+    async def worker(name):
+        async with hemis_service.upstream_lock("lock_student", "digest") as waited:
+            order.append((name, waited))
+            await asyncio.sleep(0.1)
+
+    first = asyncio.create_task(worker("first"))
+    await asyncio.sleep(0.02)
+    await worker("second")
+    await first
+
+    assert order == [("first", False), ("second", True)]
+
+
+@pytest.mark.asyncio
+async def test_hemis_roster_sync_endpoint_runs_in_background(
+    auth_client, async_db, monkeypatch, background_session
+):
+    from app.modules.hemis import roster
+
+    students = [{**ME_DATA, "student_id_number": "319231199999"}]
+
+    sync = roster.RosterSync(
+        client=roster_client(students), page_size=10, concurrency=1, batch_size=10
+    )
+    monkeypatch.setattr(roster, "roster_sync", sync)
+    monkeypatch.setattr("app.modules.hemis.router.roster_sync", sync)
+
+    response = await auth_client.post("/hemis/roster/sync")
+    assert response.status_code == 202
+    assert response.json()["status"] == "running"
+
+    # A second request while it runs is refused
+    response = await auth_client.post("/hemis/roster/sync")
+    assert response.status_code == 409
+
+    await sync._task
+    response = await auth_client.get("/hemis/roster/sync")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "done"
+    assert data["result"]["users_created"] == 1
@@ -0,0 +1,120 @@
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.modules.hemis.client import CircuitBreaker, HemisClient
+
+LOGIN_URL = "https://hemis.test/auth/login"
+ME_URL = "https://hemis.test/account/me"
+
+
+def make_client(handler, retries=2, threshold=3, reset_seconds=30) -> HemisClient:
+    return HemisClient(
+        login_url=LOGIN_URL,
+        me_url=ME_URL,
+        timeout=httpx.Timeout(1),
+        limits=httpx.Limits(max_connections=5),
+        retries=retries,
+        retry_backoff=0,
+        breaker=CircuitBreaker(threshold=threshold, reset_seconds=reset_seconds),
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def hemis_stub(calls: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url == LOGIN_URL:
+            return httpx.Response(200, json={"success": True, "data": {"token": "t"}})
+        assert request.headers["Authorization"] == "Bearer t"
+        return httpx.Response(200, json={"success": True, "data": {"full_name": "A B"}})
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_hemis_client_reuses_one_pooled_client():
+    calls = []
+    client = make_client(hemis_stub(calls))
+
+    assert await client.fetch_profile("login", "secret") == {"full_name": "A B"}
+    pooled = client._client
+    await client.fetch_profile("login", "secret")
+
+    assert client._client is pooled
+    assert calls == ["/auth/login", "/account/me"] * 2
+    await client.stop()
+
+
+@pytest.mark.asyncio
+async def test_hemis_client_retries_transient_failures():
+    attempts = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        if attempts == 2:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"success": True, "data": {"token": "t"}})
+
+    client = make_client(handler, retries=2)
+
+    assert await client.login("login", "secret") == "t"
+    assert attempts == 3
+    assert client.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_hemis_client_does_not_retry_rejected_login():
+    attempts = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal attempts
+        attempts += 1
+        return httpx.Response(401, json={"success": False})
+
+    client = make_client(handler)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await client.login("login", "wrong")
+
+    assert exc_info.value.status_code == 400
+    assert attempts == 1
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_hemis_client_circuit_opens_and_recovers():
+    healthy = False
+    attempts = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal attempts
+        attempts += 1
+        if not healthy:
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, json={"success": True, "data": {"token": "t"}})
+
+    client = make_client(handler, retries=0, threshold=2, reset_seconds=0.05)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            await client.login("login", "secret")
+        assert exc_info.value.status_code == 503
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    # Open: refused without a request
+    with pytest.raises(HTTPException) as exc_info:
+        await client.login("login", "secret")
+    assert exc_info.value.status_code == 503
+    assert "Retry-After" in exc_info.value.headers
+    assert attempts == 2
+
+    # After the reset period one trial call goes through and closes the circuit
+    healthy = True
+    client.breaker._opened_at -= 1
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert await client.login("login", "secret") == "t"
+    assert client.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from core.utils.password_hash import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_round_trip():
+    hasher = PasswordHasher(workers=2, rounds=4)
+
+    hashed = await asyncio.gather(*(hasher.hash(f"secret-{i}") for i in range(4)))
+
+    assert await hasher.verify("secret-0", hashed[0])
+    assert not await hasher.verify("secret-1", hashed[0])
+    # Cost comes from the configuration
+    assert hashed[0].startswith("$2b$04$")
+
+    metrics = hasher.metrics()
+    assert metrics.completed == 6
+    assert metrics.pending == 0
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_created_user_password_is_hashed(async_client, async_db, test_role):
+    from sqlalchemy import select
+
+    from app.models.user.model import User
+
+    payload = {
+        "username": "hashed_user",
+        "password": "password123",
+        "roles": [{"name": "Admin"}],
+    }
+    response = await async_client.post("/user/", json=payload)
+    assert response.status_code == 201
+
+    stmt = select(User).where(User.username == "hashed_user")
+    user = (await async_db.execute(stmt)).scalar_one()
+    assert user.password != "password123"
+    assert user.password.startswith("$2b$")
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_metrics_endpoint(auth_client):
+    response = await auth_client.get("/user/password_hashing")
+    assert response.status_code == 200
+    assert response.json()["pending"] == 0
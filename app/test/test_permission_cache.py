@@ -0,0 +1,157 @@
+import jwt
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.models.permission.model import Permission
+from app.models.role.model import Role
+from core.config import settings
+from dependence.permission_claims import authorize_from_claims, permission_registry
+from main import app
+
+
+@pytest.mark.asyncio
+async def test_permission_changes_invalidate_cached_permissions(auth_client, async_db):
+    permission = Permission(name="read:statistics")
+    role = Role(name="Viewer")
+    async_db.add_all([permission, role])
+    await async_db.commit()
+
+    user_payload = {
+        "username": "viewer_user",
+        "password": "password123",
+        "roles": [{"name": "Viewer"}],
+    }
+    user_resp = await auth_client.post("/user/", json=user_payload)
+    assert user_resp.status_code == 201
+    viewer_id = user_resp.json()["id"]
+
+    viewer = AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+    login_resp = await viewer.post(
+        "/user/login",
+        json={"username": "viewer_user", "password": "password123"},
+    )
+    viewer.headers.update({"Authorization": login_resp.json()["access_token"]})
+
+    # Denied, and the empty permission set is now cached
+    response = await viewer.get("/statistics/general")
+    assert response.status_code == 403
+
+    # Granting the permission to the role is visible on the next request
+    assign_resp = await auth_client.post(
+        "/role/assign_permission",
+        json={"role_id": role.id, "permission_ids": [permission.id]},
+    )
+    assert assign_resp.status_code == 200
+
+    response = await viewer.get("/statistics/general")
+    assert response.status_code == 200
+
+    # So is taking the role away from the user
+    assign_resp = await auth_client.post(
+        "/user/assign_role", json={"user_id": viewer_id, "role_ids": []}
+    )
+    assert assign_resp.status_code == 200
+
+    response = await viewer.get("/statistics/general")
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_access_token_permission_claims_revoked_by_role_change(
+    auth_client, async_db, monkeypatch
+):
+    permission = Permission(name="read:statistics")
+    role = Role(name="Viewer", permissions=[permission])
+    async_db.add_all([permission, role])
+    await async_db.commit()
+    monkeypatch.setattr(
+        permission_registry, "_bits", {"read:statistics": permission.id}
+    )
+
+    user_payload = {
+        "username": "claims_user",
+        "password": "password123",
+        "roles": [{"name": "Viewer"}],
+    }
+    user_resp = await auth_client.post("/user/", json=user_payload)
+    viewer_id = user_resp.json()["id"]
+
+    viewer = AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+    login_resp = await viewer.post(
+        "/user/login",
+        json={"username": "claims_user", "password": "password123"},
+    )
+    token = login_resp.json()["access_token"]
+    viewer.headers.update({"Authorization": token})
+
+    claims = jwt.decode(
+        token, settings.jwt.access_token_secret, algorithms=[settings.jwt.algorithm]
+    )
+    assert claims["adm"] is False
+    assert int(claims["pm"], 16) >> permission.id & 1
+    assert await authorize_from_claims(claims, "read:statistics") is True
+
+    response = await viewer.get("/statistics/general")
+    assert response.status_code == 200
+
+    # A role change bumps the user's epoch, so the claims no longer count
+    assign_resp = await auth_client.post(
+        "/user/assign_role", json={"user_id": viewer_id, "role_ids": []}
+    )
+    assert assign_resp.status_code == 200
+    assert await authorize_from_claims(claims, "read:statistics") is None
+
+    response = await viewer.get("/statistics/general")
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_admin_panel_edits_invalidate_cached_permissions(auth_client, async_db):
+    from sqlalchemy import select
+
+    from app.models.role_permission.model import RolePermission
+    from app.models.role_permission.view import RolePermissionView
+    from app.models.user_role.model import UserRole
+    from app.models.user_role.view import UserRoleView
+
+    permission = Permission(name="read:statistics")
+    role = Role(name="Viewer")
+    async_db.add_all([permission, role])
+    await async_db.commit()
+
+    user_payload = {
+        "username": "admin_panel_viewer",
+        "password": "password123",
+        "roles": [{"name": "Viewer"}],
+    }
+    user_resp = await auth_client.post("/user/", json=user_payload)
+    viewer_id = user_resp.json()["id"]
+
+    viewer = AsyncClient(transport=ASGITransport(app=app), base_url="http://localhost")
+    login_resp = await viewer.post(
+        "/user/login",
+        json={"username": "admin_panel_viewer", "password": "password123"},
+    )
+    viewer.headers.update({"Authorization": login_resp.json()["access_token"]})
+
+    response = await viewer.get("/statistics/general")
+    assert response.status_code == 403
+
+    # What the admin panel does: write the row, then call the view's hook
+    role_permission = RolePermission(role_id=role.id, permission_id=permission.id)
+    async_db.add(role_permission)
+    await async_db.commit()
+    await RolePermissionView().after_model_change({}, role_permission, True, None)
+
+    response = await viewer.get("/statistics/general")
+    assert response.status_code == 200
+
+    user_role = (
+        await async_db.execute(select(UserRole).where(UserRole.user_id == viewer_id))
+    ).scalar_one()
+    await async_db.delete(user_role)
+    await async_db.commit()
+    await UserRoleView().after_model_delete(user_role, None)
+
+    response = await viewer.get("/statistics/general")
+    assert response.status_code == 403
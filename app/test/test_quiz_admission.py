@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.modules.quiz_process.admission import AdmissionController
+
+
+@pytest.mark.asyncio
+async def test_admission_bounds_concurrency_and_keeps_fifo_order():
+    controller = AdmissionController(
+        concurrency=2, queue_size=10, max_wait=5, rate=1000, burst=1000
+    )
+    active = 0
+    peak = 0
+    order = []
+
+    async def start(i):
+        nonlocal active, peak
+        async with controller.admit(quiz_id=1):
+            active += 1
+            peak = max(peak, active)
+            order.append(i)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(start(i) for i in range(6)))
+
+    assert peak == 2
+    assert order == list(range(6))
+    assert controller.metrics().admitted == 6
+    assert controller.metrics().quizzes == []
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_when_waiting_room_is_full():
+    controller = AdmissionController(
+        concurrency=1, queue_size=1, max_wait=5, rate=1000, burst=1000
+    )
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit(quiz_id=1):
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with controller.admit(quiz_id=1):
+            pass
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.detail["position"] == 2
+    assert "Retry-After" in exc_info.value.headers
+
+    stats = controller.metrics()
+    assert stats.rejected == 1
+    assert stats.quizzes[0].active == 1
+    assert stats.quizzes[0].waiting == 1
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+
+
+@pytest.mark.asyncio
+async def test_admission_times_out_waiters():
+    controller = AdmissionController(
+        concurrency=1, queue_size=5, max_wait=0.01, rate=1000, burst=1000
+    )
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit(quiz_id=1):
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with controller.admit(quiz_id=1):
+            pass
+    assert exc_info.value.detail["position"] == 1
+    assert controller.metrics().timed_out == 1
+
+    release.set()
+    await holder
+    assert controller.metrics().quizzes == []
+
+
+@pytest.mark.asyncio
+async def test_admission_refuses_rate_wait_beyond_max_wait():
+    controller = AdmissionController(
+        concurrency=10, queue_size=10, max_wait=0.5, rate=1, burst=1
+    )
+
+    async with controller.admit(quiz_id=1):
+        pass
+
+    # The next token is a second away, past the waiting budget
+    with pytest.raises(HTTPException) as exc_info:
+        async with controller.admit(quiz_id=1):
+            pass
+
+    assert exc_info.value.status_code == 503
+    assert controller.metrics().timed_out == 1
+    assert controller._bucket.tokens > -1
+    assert controller.metrics().quizzes == []
+
+
+@pytest.mark.asyncio
+async def test_admission_returns_token_of_cancelled_request():
+    controller = AdmissionController(
+        concurrency=10, queue_size=10, max_wait=5, rate=1, burst=1
+    )
+
+    async with controller.admit(quiz_id=1):
+        pass
+
+    async def start():
+        async with controller.admit(quiz_id=1):
+            pass
+
+    waiter = asyncio.create_task(start())
+    await asyncio.sleep(0.01)
+    assert controller._bucket.tokens < 0
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert controller._bucket.tokens >= 0
+    assert controller.metrics().quizzes == []
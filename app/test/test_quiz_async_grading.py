@@ -0,0 +1,145 @@
+import pytest
+
+from core.config import settings
+
+
+@pytest.mark.asyncio
+async def test_end_quiz_async_mode_enqueues_submission(
+    auth_client, test_subject, test_user, monkeypatch, start_attempt
+):
+    monkeypatch.setattr(settings.quiz_process, "async_grading", True)
+
+    quiz_payload = {
+        "title": "Async Grading Quiz",
+        "question_number": 1,
+        "duration": 60,
+        "pin": "8642",
+        "user_id": test_user["id"],
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    q_payload = {
+        "subject_id": test_subject.id,
+        "user_id": test_user["id"],
+        "text": "Async Q",
+        "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D"
+    }
+    q_resp = await auth_client.post("/question/", json=q_payload)
+    q_id = q_resp.json()["id"]
+    await start_attempt(quiz_id, "8642", [q_id])
+
+    end_payload = {
+        "quiz_id": quiz_id,
+        "answers": [{"question_id": q_id, "answer": "A"}]
+    }
+    response = await auth_client.post("/quiz_process/end_quiz", json=end_payload)
+    assert response.status_code == 202
+    attempt_id = response.json()["attempt_id"]
+
+    # No worker runs in tests, so the submission stays pending
+    poll = await auth_client.get(f"/quiz_process/end_quiz/{attempt_id}")
+    assert poll.status_code == 202
+    assert poll.json()["status"] == "pending"
+
+    poll = await auth_client.get("/quiz_process/end_quiz/unknown")
+    assert poll.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_redelivered_submission_is_saved_once(async_db, test_subject, test_user):
+    from sqlalchemy import func, select
+
+    from app.models.question.model import Question
+    from app.models.quiz.model import Quiz
+    from app.models.results.model import Result
+    from app.models.user_answers.model import UserAnswers
+    from app.modules.quiz_process.repository import get_quiz_process_repository
+    from app.modules.quiz_process.schemas import GradedAnswer, GradedSubmission
+
+    quiz = Quiz(
+        title="Redelivery Quiz",
+        question_number=1,
+        duration=30,
+        pin="1212",
+        is_active=True,
+        user_id=test_user["id"],
+        subject_id=test_subject.id,
+    )
+    question = Question(
+        text="Redelivered Q",
+        option_a="A", option_b="B", option_c="C", option_d="D",
+        subject_id=test_subject.id,
+        user_id=test_user["id"],
+    )
+    async_db.add_all([quiz, question])
+    await async_db.commit()
+
+    submission = GradedSubmission(
+        user_id=test_user["id"],
+        quiz_id=quiz.id,
+        subject_id=test_subject.id,
+        group_id=None,
+        answers=[GradedAnswer(question_id=question.id, answer="A", is_correct=True)],
+        total_questions=1,
+        correct_answers=1,
+        wrong_answers=0,
+        grade=100,
+        attempt_id="a" * 32,
+    )
+
+    # A worker that crashed after the commit gets the same entry again
+    repository = get_quiz_process_repository
+    assert len(await repository.save_submissions(async_db, [submission])) == 1
+    assert await repository.save_submissions(async_db, [submission, submission]) == []
+
+    results = await async_db.scalar(
+        select(func.count(Result.id)).where(Result.quiz_id == quiz.id)
+    )
+    answers = await async_db.scalar(
+        select(func.count(UserAnswers.id)).where(UserAnswers.quiz_id == quiz.id)
+    )
+    assert (results, answers) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_end_quiz_async_mode_conflicts_with_sweeper_claim(
+    auth_client, test_subject, test_user, monkeypatch, start_attempt
+):
+    from app.modules.quiz_process.attempt import quiz_attempt_store
+
+    monkeypatch.setattr(settings.quiz_process, "async_grading", True)
+
+    quiz_payload = {
+        "title": "Claimed Async Quiz",
+        "question_number": 1,
+        "duration": 60,
+        "pin": "8643",
+        "user_id": test_user["id"],
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    q_payload = {
+        "subject_id": test_subject.id,
+        "user_id": test_user["id"],
+        "text": "Claimed Q",
+        "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D"
+    }
+    q_resp = await auth_client.post("/question/", json=q_payload)
+    q_id = q_resp.json()["id"]
+    await start_attempt(quiz_id, "8643", [q_id])
+
+    # The sweeper got to the attempt first
+    assert await quiz_attempt_store.claim(quiz_id, test_user["id"])
+
+    end_payload = {
+        "quiz_id": quiz_id,
+        "answers": [{"question_id": q_id, "answer": "A"}]
+    }
+    response = await auth_client.post("/quiz_process/end_quiz", json=end_payload)
+    assert response.status_code == 409
@@ -0,0 +1,261 @@
+import pytest
+from sqlalchemy import select
+
+from app.models.quiz_questions.model import QuizQuestion
+from app.models.results.model import Result
+
+
+@pytest.mark.asyncio
+async def test_end_quiz_grades_from_attempt(
+    auth_client, test_subject, async_db, test_user
+):
+    user_id = test_user["id"]
+
+    quiz_payload = {
+        "title": "Attempt Quiz",
+        "question_number": 1,
+        "duration": 30,
+        "pin": "2468",
+        "user_id": user_id,
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    # Two questions in the pool, only one of them is handed out
+    question_ids = []
+    for i in range(2):
+        q_payload = {
+            "subject_id": test_subject.id,
+            "user_id": user_id,
+            "text": f"Attempt Q{i}",
+            "option_a": f"right-{i}", "option_b": "B", "option_c": "C", "option_d": "D"
+        }
+        q_resp = await auth_client.post("/question/", json=q_payload)
+        question_ids.append(q_resp.json()["id"])
+        async_db.add(QuizQuestion(quiz_id=quiz_id, question_id=question_ids[-1]))
+    await async_db.commit()
+
+    start_resp = await auth_client.post(
+        "/quiz_process/start_quiz", json={"quiz_id": quiz_id, "pin": "2468"}
+    )
+    assert start_resp.status_code == 200
+    issued_id = start_resp.json()["questions"][0]["id"]
+    not_issued_id = next(q_id for q_id in question_ids if q_id != issued_id)
+
+    # Answers to questions that were never issued are rejected
+    end_payload = {
+        "quiz_id": quiz_id,
+        "answers": [{"question_id": not_issued_id, "answer": "B"}]
+    }
+    response = await auth_client.post("/quiz_process/end_quiz", json=end_payload)
+    assert response.status_code == 400
+
+    issued_index = question_ids.index(issued_id)
+    end_payload["answers"] = [
+        {"question_id": issued_id, "answer": f"right-{issued_index}"}
+    ]
+    response = await auth_client.post("/quiz_process/end_quiz", json=end_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["correct_answers"] == 1
+    assert data["grade"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_start_quiz_is_repeatable_within_attempt(
+    auth_client, test_subject, async_db, test_user
+):
+    user_id = test_user["id"]
+
+    quiz_payload = {
+        "title": "Seeded Quiz",
+        "question_number": 3,
+        "duration": 30,
+        "pin": "1357",
+        "user_id": user_id,
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    for i in range(5):
+        q_payload = {
+            "subject_id": test_subject.id,
+            "user_id": user_id,
+            "text": f"Seeded Q{i}",
+            "option_a": f"A{i}", "option_b": f"B{i}",
+            "option_c": f"C{i}", "option_d": f"D{i}",
+        }
+        q_resp = await auth_client.post("/question/", json=q_payload)
+        async_db.add(QuizQuestion(quiz_id=quiz_id, question_id=q_resp.json()["id"]))
+    await async_db.commit()
+
+    start_payload = {"quiz_id": quiz_id, "pin": "1357"}
+    first = await auth_client.post("/quiz_process/start_quiz", json=start_payload)
+    second = await auth_client.post("/quiz_process/start_quiz", json=start_payload)
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert len(first.json()["questions"]) == 3
+
+    end_payload = {
+        "quiz_id": quiz_id,
+        "answers": [
+            {"question_id": q["id"], "answer": q["option_a"]}
+            for q in first.json()["questions"]
+        ]
+    }
+    response = await auth_client.post("/quiz_process/end_quiz", json=end_payload)
+    assert response.status_code == 200
+
+    # The result keeps the seed, which is enough to rebuild the paper
+    result = await async_db.execute(select(Result).where(Result.quiz_id == quiz_id))
+    assert result.scalar_one().seed is not None
+
+
+@pytest.mark.asyncio
+async def test_end_quiz_finalizes_from_autosaved_answers(
+    auth_client, test_subject, async_db, test_user
+):
+    user_id = test_user["id"]
+
+    quiz_payload = {
+        "title": "Autosave Quiz",
+        "question_number": 2,
+        "duration": 30,
+        "pin": "8080",
+        "user_id": user_id,
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    answers = {}
+    for i in range(2):
+        q_payload = {
+            "subject_id": test_subject.id,
+            "user_id": user_id,
+            "text": f"Autosave Q{i}",
+            "option_a": f"right-{i}", "option_b": "B", "option_c": "C", "option_d": "D"
+        }
+        q_resp = await auth_client.post("/question/", json=q_payload)
+        answers[q_resp.json()["id"]] = f"right-{i}"
+        async_db.add(QuizQuestion(quiz_id=quiz_id, question_id=q_resp.json()["id"]))
+    await async_db.commit()
+
+    # Nothing to autosave into before the quiz is started
+    first_id = next(iter(answers))
+    answer_payload = {"quiz_id": quiz_id, "question_id": first_id, "answer": "B"}
+    response = await auth_client.post("/quiz_process/answer", json=answer_payload)
+    assert response.status_code == 404
+
+    start_resp = await auth_client.post(
+        "/quiz_process/start_quiz", json={"quiz_id": quiz_id, "pin": "8080"}
+    )
+    assert start_resp.status_code == 200
+
+    # Changing an answer overwrites it
+    for answer in ("B", answers[first_id]):
+        answer_payload["answer"] = answer
+        response = await auth_client.post("/quiz_process/answer", json=answer_payload)
+        assert response.status_code == 200
+        assert response.json()["answered"] == 1
+
+    answer_payload = {"quiz_id": quiz_id, "question_id": 999999, "answer": "A"}
+    response = await auth_client.post("/quiz_process/answer", json=answer_payload)
+    assert response.status_code == 400
+
+    second_id = next(q_id for q_id in answers if q_id != first_id)
+    end_payload = {
+        "quiz_id": quiz_id,
+        "answers": [{"question_id": second_id, "answer": "C"}]
+    }
+    response = await auth_client.post("/quiz_process/end_quiz", json=end_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_questions"] == 2
+    assert data["correct_answers"] == 1
+    assert data["grade"] == 50.0
+
+
+@pytest.mark.asyncio
+async def test_end_quiz_counts_repeated_answer_once(
+    auth_client, test_subject, test_user, start_attempt
+):
+    quiz_payload = {
+        "title": "Repeated Answer Quiz",
+        "question_number": 2,
+        "duration": 30,
+        "pin": "3141",
+        "user_id": test_user["id"],
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    question_ids = []
+    for i in range(2):
+        q_payload = {
+            "subject_id": test_subject.id,
+            "user_id": test_user["id"],
+            "text": f"Repeated Q{i}",
+            "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D"
+        }
+        q_resp = await auth_client.post("/question/", json=q_payload)
+        question_ids.append(q_resp.json()["id"])
+    await start_attempt(quiz_id, "3141", question_ids)
+
+    end_payload = {
+        "quiz_id": quiz_id,
+        "answers": [{"question_id": question_ids[0], "answer": "A"}] * 3,
+    }
+    response = await auth_client.post("/quiz_process/end_quiz", json=end_payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["correct_answers"] == 1
+    # Graded out of the whole paper, the unanswered question is wrong
+    assert data["total_questions"] == 2
+    assert data["wrong_answers"] == 1
+    assert data["grade"] == 50.0
+
+
+@pytest.mark.asyncio
+async def test_attempt_store_outage_is_503_not_404(
+    auth_client, test_subject, test_user, monkeypatch
+):
+    from redis.exceptions import ConnectionError
+
+    from app.modules.quiz_process.attempt import quiz_attempt_store
+
+    quiz_payload = {
+        "title": "Outage Quiz",
+        "question_number": 1,
+        "duration": 30,
+        "pin": "2718",
+        "user_id": test_user["id"],
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    async def unreachable(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    # A paper is not handed out when its attempt cannot be stored
+    monkeypatch.setattr(quiz_attempt_store, "save", unreachable)
+    response = await auth_client.post(
+        "/quiz_process/start_quiz", json={"quiz_id": quiz_id, "pin": "2718"}
+    )
+    assert response.status_code == 503
+
+    # An unreadable attempt is not reported as a missing one
+    monkeypatch.setattr(quiz_attempt_store, "get", unreachable)
+    response = await auth_client.post(
+        "/quiz_process/end_quiz", json={"quiz_id": quiz_id, "answers": []}
+    )
+    assert response.status_code == 503
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app.modules.quiz_process.batcher import SubmissionBatcher
+from app.modules.quiz_process.schemas import GradedSubmission
+
+
+def make_submission(user_id: int, grade: int = 100) -> GradedSubmission:
+    return GradedSubmission(
+        user_id=user_id,
+        quiz_id=1,
+        subject_id=None,
+        group_id=None,
+        answers=[],
+        total_questions=1,
+        correct_answers=1 if grade else 0,
+        wrong_answers=0 if grade else 1,
+        grade=grade,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_share_one_commit():
+    calls = []
+
+    async def save(submissions):
+        calls.append([s.user_id for s in submissions])
+
+    batcher = SubmissionBatcher(save=save, window_ms=20, max_batch=100)
+    await asyncio.gather(*(batcher.save(make_submission(i)) for i in range(10)))
+
+    assert len(calls) == 1
+    assert sorted(calls[0]) == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_failed_submission_does_not_fail_the_batch():
+    async def save(submissions):
+        if any(s.grade == 0 for s in submissions):
+            raise RuntimeError("bad row")
+
+    batcher = SubmissionBatcher(save=save, window_ms=20, max_batch=100)
+    results = await asyncio.gather(
+        batcher.save(make_submission(1)),
+        batcher.save(make_submission(2, grade=0)),
+        batcher.save(make_submission(3)),
+        return_exceptions=True,
+    )
+
+    assert results[0] is None
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] is None
@@ -0,0 +1,147 @@
+import pytest
+
+from app.models.quiz_questions.model import QuizQuestion
+
+
+@pytest.mark.asyncio
+async def test_start_quiz_paper_refreshed_after_question_update(
+    auth_client, test_subject, async_db, test_user
+):
+    user_id = test_user["id"]
+
+    quiz_payload = {
+        "title": "Cached Paper Quiz",
+        "question_number": 1,
+        "duration": 60,
+        "pin": "4321",
+        "user_id": user_id,
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    q_payload = {
+        "subject_id": test_subject.id,
+        "user_id": user_id,
+        "text": "Old text",
+        "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D"
+    }
+    q_resp = await auth_client.post("/question/", json=q_payload)
+    q_id = q_resp.json()["id"]
+
+    async_db.add(QuizQuestion(quiz_id=quiz_id, question_id=q_id))
+    await async_db.commit()
+
+    start_payload = {"quiz_id": quiz_id, "pin": "4321"}
+
+    # First call builds the paper, second one is served from the cache
+    for _ in range(2):
+        response = await auth_client.post(
+            "/quiz_process/start_quiz", json=start_payload
+        )
+        assert response.status_code == 200
+        assert response.json()["questions"][0]["text"] == "Old text"
+
+    # Updating a linked question must invalidate the cached paper
+    q_payload["text"] = "New text"
+    update_resp = await auth_client.put(f"/question/{q_id}", json=q_payload)
+    assert update_resp.status_code == 200
+
+    response = await auth_client.post("/quiz_process/start_quiz", json=start_payload)
+    assert response.status_code == 200
+    assert response.json()["questions"][0]["text"] == "New text"
+
+    # Deactivating the quiz is visible immediately as well
+    quiz_payload["is_active"] = False
+    update_resp = await auth_client.put(f"/quiz/{quiz_id}", json=quiz_payload)
+    assert update_resp.status_code == 200
+
+    response = await auth_client.post("/quiz_process/start_quiz", json=start_payload)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_start_quiz_serves_variant_prepared_on_activation(
+    auth_client, test_subject, async_db, test_user, monkeypatch
+):
+    from app.modules.quiz_process.paper import quiz_paper_cache
+
+    # Variants are off by default
+    monkeypatch.setattr(quiz_paper_cache, "variants", 8)
+    user_id = test_user["id"]
+
+    quiz_payload = {
+        "title": "Variant Quiz",
+        "question_number": 2,
+        "duration": 60,
+        "pin": "9753",
+        "user_id": user_id,
+        "subject_id": test_subject.id,
+        "is_active": False
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    question_ids = set()
+    for i in range(4):
+        q_payload = {
+            "subject_id": test_subject.id,
+            "user_id": user_id,
+            "text": f"Variant Q{i}",
+            "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D"
+        }
+        q_resp = await auth_client.post("/question/", json=q_payload)
+        question_ids.add(q_resp.json()["id"])
+        async_db.add(QuizQuestion(quiz_id=quiz_id, question_id=q_resp.json()["id"]))
+    await async_db.commit()
+
+    # Activation renders the variants
+    quiz_payload["is_active"] = True
+    update_resp = await auth_client.put(f"/quiz/{quiz_id}", json=quiz_payload)
+    assert update_resp.status_code == 200
+
+    response = await auth_client.post(
+        "/quiz_process/start_quiz", json={"quiz_id": quiz_id, "pin": "9753"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["quiz_id"] == quiz_id
+    assert len(data["questions"]) == 2
+    assert {q["id"] for q in data["questions"]} <= question_ids
+
+
+@pytest.mark.asyncio
+async def test_admin_quiz_edit_invalidates_cached_paper(
+    auth_client, test_subject, async_db, test_user
+):
+    from types import SimpleNamespace
+
+    from app.models.quiz.model import Quiz
+    from app.models.quiz.view import QuizView
+
+    quiz_payload = {
+        "title": "Admin Quiz",
+        "question_number": 1,
+        "duration": 60,
+        "pin": "8642",
+        "user_id": test_user["id"],
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    start_payload = {"quiz_id": quiz_id, "pin": "8642"}
+    response = await auth_client.post("/quiz_process/start_quiz", json=start_payload)
+    assert response.json()["title"] == "Admin Quiz"
+
+    # What the admin panel does: edit the row, then call the view's hook
+    quiz = await async_db.get(Quiz, quiz_id)
+    quiz.title = "Renamed In Admin"
+    await async_db.commit()
+    request = SimpleNamespace(state=SimpleNamespace())
+    await QuizView().after_model_change({}, quiz, False, request)
+
+    response = await auth_client.post("/quiz_process/start_quiz", json=start_payload)
+    assert response.json()["title"] == "Renamed In Admin"
@@ -57,7 +57,7 @@ async def test_start_quiz(auth_client, test_subject, test_group, async_db):
 
 
 @pytest.mark.asyncio
-async def test_end_quiz(auth_client, test_subject, test_group):
+async def test_end_quiz(auth_client, test_subject, test_group, start_attempt):
     # Setup
     users_resp = await auth_client.get("/user/")
     user_id = users_resp.json()["users"][0]["id"]
@@ -102,6 +102,7 @@ async def test_end_quiz(auth_client, test_subject, test_group):
     
     q_resp = await auth_client.post("/question/", json=q_payload)
     question_id = q_resp.json()["id"]
+    await start_attempt(quiz_id, "5678", [question_id])
 
     # End Quiz
     end_payload = {
@@ -116,3 +117,84 @@ async def test_end_quiz(auth_client, test_subject, test_group):
     assert response.status_code == 200
     data = response.json()
     assert "grade" in data
+
+
+@pytest.mark.asyncio
+async def test_end_quiz_persists_all_answers(
+    auth_client, test_subject, async_db, test_user, start_attempt
+):
+    from sqlalchemy import select
+    from app.models.results.model import Result
+    from app.models.user_answers.model import UserAnswers
+
+    user_id = test_user["id"]
+    quiz_payload = {
+        "title": "Bulk Answers Quiz",
+        "question_number": 3,
+        "duration": 60,
+        "pin": "1357",
+        "user_id": user_id,
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    answers = []
+    for i in range(3):
+        q_payload = {
+            "subject_id": test_subject.id,
+            "user_id": user_id,
+            "text": f"Bulk Q{i}",
+            "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D"
+        }
+        q_resp = await auth_client.post("/question/", json=q_payload)
+        # Two correct answers, one wrong
+        answers.append({"question_id": q_resp.json()["id"], "answer": "A" if i < 2 else "B"})
+    await start_attempt(quiz_id, "1357", [a["question_id"] for a in answers])
+
+    response = await auth_client.post(
+        "/quiz_process/end_quiz", json={"quiz_id": quiz_id, "answers": answers}
+    )
+    assert response.status_code == 200
+    assert response.json()["correct_answers"] == 2
+
+    stmt = select(UserAnswers).where(UserAnswers.quiz_id == quiz_id)
+    saved = (await async_db.execute(stmt)).scalars().all()
+    assert len(saved) == 3
+    assert sum(1 for a in saved if a.is_correct) == 2
+
+    stmt = select(Result).where(Result.quiz_id == quiz_id)
+    result = (await async_db.execute(stmt)).scalar_one()
+    assert result.grade == 66
+    assert result.wrong_answers == 1
+
+
+@pytest.mark.asyncio
+async def test_end_quiz_requires_started_attempt(auth_client, test_subject, test_user):
+    quiz_payload = {
+        "title": "Unstarted Quiz",
+        "question_number": 1,
+        "duration": 60,
+        "pin": "2468",
+        "user_id": test_user["id"],
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    q_payload = {
+        "subject_id": test_subject.id,
+        "user_id": test_user["id"],
+        "text": "Never handed out",
+        "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D"
+    }
+    q_resp = await auth_client.post("/question/", json=q_payload)
+
+    # Any question of the table used to be graded without start_quiz
+    response = await auth_client.post(
+        "/quiz_process/end_quiz",
+        json={"quiz_id": quiz_id, "answers": [{"question_id": q_resp.json()["id"], "answer": "A"}]},
+    )
+    assert response.status_code == 404
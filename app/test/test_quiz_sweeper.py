@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.core.cache import get_redis
+from app.models.quiz_questions.model import QuizQuestion
+from app.models.results.model import Result
+from app.modules.quiz_process import sweeper
+from app.modules.quiz_process.attempt import quiz_attempt_store
+from core.config import settings
+
+
+@pytest.mark.asyncio
+async def test_sweeper_finalizes_expired_attempt(
+    auth_client, test_subject, async_db, test_user, background_session
+):
+    user_id = test_user["id"]
+
+    quiz_payload = {
+        "title": "Sweeper Quiz",
+        "question_number": 1,
+        "duration": 30,
+        "pin": "5555",
+        "user_id": user_id,
+        "subject_id": test_subject.id,
+        "is_active": True
+    }
+    quiz_resp = await auth_client.post("/quiz/", json=quiz_payload)
+    quiz_id = quiz_resp.json()["id"]
+
+    q_payload = {
+        "subject_id": test_subject.id,
+        "user_id": user_id,
+        "text": "Sweeper Q",
+        "option_a": "right", "option_b": "B", "option_c": "C", "option_d": "D"
+    }
+    q_resp = await auth_client.post("/question/", json=q_payload)
+    q_id = q_resp.json()["id"]
+    async_db.add(QuizQuestion(quiz_id=quiz_id, question_id=q_id))
+    await async_db.commit()
+
+    start_resp = await auth_client.post(
+        "/quiz_process/start_quiz", json={"quiz_id": quiz_id, "pin": "5555"}
+    )
+    assert start_resp.status_code == 200
+
+    answer_payload = {"quiz_id": quiz_id, "question_id": q_id, "answer": "right"}
+    response = await auth_client.post("/quiz_process/answer", json=answer_payload)
+    assert response.status_code == 200
+
+    # Nothing is due while the attempt is running
+    attempt_sweeper = sweeper.AttemptSweeper(interval=1, delay=0, batch_size=10)
+    assert await attempt_sweeper.sweep_once() == 0
+
+    # The student disappears and the deadline and grace period pass
+    attempt = await quiz_attempt_store.get(quiz_id, user_id)
+    deadline = time.time() - settings.quiz_process.attempt_grace_seconds - 1
+    await quiz_attempt_store.save(attempt.model_copy(update={"deadline": deadline}))
+
+    assert await attempt_sweeper.sweep_once() == 1
+    assert await quiz_attempt_store.get(quiz_id, user_id) is None
+
+    result = await async_db.execute(select(Result).where(Result.quiz_id == quiz_id))
+    assert result.scalar_one().grade == 100
+
+    # Already finalized, a second sweep does nothing
+    assert await attempt_sweeper.sweep_once() == 0
+
+    # A late end_quiz of the finalized attempt is refused, not graded again
+    end_payload = {
+        "quiz_id": quiz_id, "answers": [{"question_id": q_id, "answer": "B"}]
+    }
+    response = await auth_client.post("/quiz_process/end_quiz", json=end_payload)
+    assert response.status_code == 409
+
+    result = await async_db.execute(select(Result).where(Result.quiz_id == quiz_id))
+    assert len(result.scalars().all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_sweeper_drops_index_entry_of_lost_attempt():
+    # On the deadline index, but the attempt itself is gone
+    redis = get_redis()
+    await redis.zadd(
+        quiz_attempt_store.deadlines_key, {"999999:999999": time.time() - 60}
+    )
+
+    attempt_sweeper = sweeper.AttemptSweeper(interval=1, delay=0, batch_size=10)
+    assert await attempt_sweeper.sweep_once() == 0
+    assert await quiz_attempt_store.due(time.time(), 10) == []
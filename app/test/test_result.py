@@ -1,7 +1,7 @@
 import pytest
 
 @pytest.mark.asyncio
-async def test_list_results(auth_client, test_subject, test_group):
+async def test_list_results(auth_client, test_subject, test_group, start_attempt):
     # Setup: Create quiz and complete it to generate a result
     users_resp = await auth_client.get("/user/")
     user_id = users_resp.json()["users"][0]["id"]
@@ -32,6 +32,7 @@ async def test_list_results(auth_client, test_subject, test_group):
     }
     q_resp = await auth_client.post("/question/", json=q_payload)
     q_id = q_resp.json()["id"]
+    await start_attempt(quiz_id, "9988", [q_id])
 
     # 3. End Quiz (creates result)
     end_payload = {
@@ -63,7 +64,7 @@ async def test_list_results(auth_client, test_subject, test_group):
 
 
 @pytest.mark.asyncio
-async def test_get_result(auth_client, test_subject, test_group):
+async def test_get_result(auth_client, test_subject, test_group, start_attempt):
     # Reuse flow or create new
     # For simplicity, let's just rely on the fact that previous tests might have created results or we create one here.
     # To be isolated, we create one.
@@ -95,6 +96,7 @@ async def test_get_result(auth_client, test_subject, test_group):
     }
     q_resp = await auth_client.post("/question/", json=q_payload)
     q_id = q_resp.json()["id"]
+    await start_attempt(quiz_id, "7766", [q_id])
 
     end_payload = {
         "quiz_id": quiz_id,
@@ -119,7 +121,7 @@ async def test_get_result(auth_client, test_subject, test_group):
 
 
 @pytest.mark.asyncio
-async def test_delete_result(auth_client, test_subject, test_group):
+async def test_delete_result(auth_client, test_subject, test_group, start_attempt):
     users_resp = await auth_client.get("/user/")
     user_id = users_resp.json()["users"][0]["id"]
     
@@ -147,6 +149,7 @@ async def test_delete_result(auth_client, test_subject, test_group):
     }
     q_resp = await auth_client.post("/question/", json=q_payload)
     q_id = q_resp.json()["id"]
+    await start_attempt(quiz_id, "5544", [q_id])
 
     end_payload = {
         "quiz_id": quiz_id,
@@ -165,3 +168,63 @@ async def test_delete_result(auth_client, test_subject, test_group):
     # Verify deletion
     response = await auth_client.get(f"/result/{result_id}")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_export_results(
+    auth_client, async_db, test_user, test_subject, test_group, background_session
+):
+    import csv
+    import io
+    from openpyxl import load_workbook
+    from app.models.results.model import Result
+
+    for grade in (40, 100):
+        async_db.add(Result(
+            user_id=test_user["id"],
+            subject_id=test_subject.id,
+            group_id=test_group["id"],
+            correct_answers=grade // 20,
+            wrong_answers=5 - grade // 20,
+            grade=grade
+        ))
+    await async_db.commit()
+
+    response = await auth_client.get(f"/result/export?group_id={test_group['id']}&format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0][0] == "Result ID"
+    assert [row[-1] for row in rows[1:]] == ["40", "100"]
+    assert {row[7] for row in rows[1:]} == {test_group["name"]}
+
+    response = await auth_client.get(f"/result/export?group_id={test_group['id']}")
+    assert response.status_code == 200
+    sheet = load_workbook(io.BytesIO(response.content)).active
+    assert [row[-1] for row in sheet.iter_rows(min_row=2, values_only=True)] == [40, 100]
+
+    response = await auth_client.get(f"/result/export?group_id={test_group['id']}&quiz_id=1")
+    assert response.status_code == 400
+    response = await auth_client.get("/result/export?quiz_id=999999")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_export_escapes_formulas():
+    import io
+    from openpyxl import load_workbook
+    from core.utils.export import export_response
+
+    async def rows():
+        yield ["=HYPERLINK(\"http://evil\")", "@SUM(A1)", -5, "Ali"]
+
+    response = export_response(["Name", "Group", "Grade", "Other"], rows(), "csv", "x")
+    body = b"".join([chunk async for chunk in response.body_iterator]).decode("utf-8-sig")
+    assert body.splitlines()[1] == "\"'=HYPERLINK(\"\"http://evil\"\")\",'@SUM(A1),-5,Ali"
+
+    response = export_response(["Name", "Group", "Grade", "Other"], rows(), "xlsx", "x")
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    sheet = load_workbook(io.BytesIO(body)).active
+    assert list(sheet.iter_rows(min_row=2, values_only=True))[0] == (
+        "'=HYPERLINK(\"http://evil\")", "'@SUM(A1)", -5, "Ali"
+    )
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.core.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+
+    assert results == [1] * 5
+    assert calls == 1
+    assert flight.shared == 4
+    # Nothing in flight any more, the next call runs again
+    assert await flight.run("key", work) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_failures_and_keys_apart():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream")
+
+    async def ok():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    results = await asyncio.gather(
+        flight.run("a", fail), flight.run("a", fail), flight.run("b", ok),
+        return_exceptions=True,
+    )
+
+    assert [type(r) for r in results[:2]] == [ValueError, ValueError]
+    assert results[2] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_single_flight_waiter_takes_over_from_cancelled_caller():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    leader = asyncio.create_task(flight.run("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("key", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+
+    assert await follower == 2
+    assert leader.cancelled()
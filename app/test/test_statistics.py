@@ -95,3 +95,425 @@ async def test_statistics_endpoints(
     assert group_stat["name"] == test_group["name"]
     assert group_stat["total_quizzes_taken"] == 2
     assert group_stat["average_grade"] == 90.0
+
+
+@pytest.mark.asyncio
+async def test_statistics_rollups_follow_submissions_and_deletes(
+    auth_client, async_db, test_user, test_subject, test_group, test_teacher
+):
+    from sqlalchemy import select
+    from app.modules.quiz_process.repository import get_quiz_process_repository
+    from app.modules.quiz_process.schemas import GradedSubmission
+
+    quiz = Quiz(
+        title="Rollup Quiz",
+        question_number=5,
+        duration=30,
+        pin="9998",
+        is_active=True,
+        user_id=test_teacher["user_id"],
+        group_id=test_group["id"],
+        subject_id=test_subject.id
+    )
+    async_db.add(quiz)
+    await async_db.commit()
+    await async_db.refresh(quiz)
+
+    # Multi-row insert from end_quiz / the sweeper
+    await get_quiz_process_repository.save_submissions(async_db, [
+        GradedSubmission(
+            user_id=test_user["id"],
+            quiz_id=quiz.id,
+            subject_id=test_subject.id,
+            group_id=test_group["id"],
+            answers=[],
+            total_questions=5,
+            correct_answers=grade // 20,
+            wrong_answers=5 - grade // 20,
+            grade=grade,
+        )
+        for grade in (40, 60, 100)
+    ])
+
+    resp = await auth_client.get(f"/statistics/quiz/{quiz.id}")
+    data = resp.json()
+    assert (data["times_taken"], data["lowest_grade"], data["highest_grade"]) == (3, 40, 100)
+    assert data["average_grade"] == pytest.approx(200 / 3)
+
+    resp = await auth_client.get(f"/statistics/teacher/{test_teacher['id']}")
+    assert resp.json()["total_results"] == 3
+
+    # Deleting the best result recomputes the maximum
+    best = (await async_db.execute(
+        select(Result).where(Result.quiz_id == quiz.id, Result.grade == 100)
+    )).scalar_one()
+    resp = await auth_client.delete(f"/result/{best.id}")
+    assert resp.status_code == 204
+
+    resp = await auth_client.get(f"/statistics/quiz/{quiz.id}")
+    data = resp.json()
+    assert (data["times_taken"], data["highest_grade"], data["average_grade"]) == (2, 60, 50.0)
+
+    resp = await auth_client.get(f"/statistics/group/{test_group['id']}")
+    assert resp.json()["total_quizzes_taken"] == 2
+
+
+@pytest.mark.asyncio
+async def test_general_statistics_served_from_snapshot(
+    auth_client, async_db, test_user, test_subject, test_group, background_session
+):
+    from app.modules.statistics.snapshot import general_stats_snapshot
+
+    def result(grade):
+        return Result(
+            user_id=test_user["id"],
+            subject_id=test_subject.id,
+            group_id=test_group["id"],
+            correct_answers=grade // 20,
+            wrong_answers=5 - grade // 20,
+            grade=grade
+        )
+
+    async_db.add(result(80))
+    await async_db.commit()
+
+    resp = await auth_client.get("/statistics/general")
+    assert resp.status_code == 200
+    first = resp.json()
+    assert first["total_quizzes_taken"] == 1
+    assert first["as_of"]
+
+    # A new result shows up with the next refresh, not on the next request
+    async_db.add(result(40))
+    await async_db.commit()
+    resp = await auth_client.get("/statistics/general")
+    assert resp.json() == first
+
+    await general_stats_snapshot.refresh()
+    resp = await auth_client.get("/statistics/general")
+    data = resp.json()
+    assert (data["total_students_tested"], data["total_quizzes_taken"]) == (1, 2)
+    assert data["system_average_grade"] == 60.0
+    assert data["as_of"] > first["as_of"]
+
+
+@pytest.mark.asyncio
+async def test_grade_distribution_from_histograms(
+    auth_client, async_db, test_user, test_subject, test_group, test_teacher
+):
+    from sqlalchemy import select
+
+    quiz = Quiz(
+        title="Distribution Quiz",
+        question_number=5,
+        duration=30,
+        pin="9997",
+        is_active=True,
+        user_id=test_teacher["user_id"],
+        group_id=test_group["id"],
+        subject_id=test_subject.id
+    )
+    async_db.add(quiz)
+    await async_db.commit()
+    await async_db.refresh(quiz)
+
+    for grade in (20, 40, 40, 60, 80, 100, 100, 100, 100, 100):
+        async_db.add(Result(
+            user_id=test_user["id"],
+            quiz_id=quiz.id,
+            subject_id=test_subject.id,
+            group_id=test_group["id"],
+            correct_answers=grade // 20,
+            wrong_answers=5 - grade // 20,
+            grade=grade
+        ))
+    await async_db.commit()
+
+    resp = await auth_client.get(f"/statistics/quiz/{quiz.id}/distribution")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["count"] == 10
+    assert (data["p10"], data["median"], data["p90"]) == (20, 80, 100)
+    assert len(data["histogram"]) == 101
+    assert (data["histogram"][40], data["histogram"][100]) == (2, 5)
+
+    resp = await auth_client.get(f"/statistics/subject/{test_subject.id}/distribution")
+    assert resp.json()["count"] == 10
+
+    # Deleting a result rebuilds the affected histograms
+    worst = (await async_db.execute(
+        select(Result).where(Result.quiz_id == quiz.id, Result.grade == 20)
+    )).scalar_one()
+    await async_db.delete(worst)
+    await async_db.commit()
+
+    resp = await auth_client.get(f"/statistics/group/{test_group['id']}/distribution")
+    data = resp.json()
+    assert (data["count"], data["p10"], data["histogram"][20]) == (9, 40, 0)
+
+    resp = await auth_client.get("/statistics/quiz/999999/distribution")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_question_statistics_item_analysis(
+    auth_client, async_db, test_user, test_subject, test_group, test_teacher,
+    background_session, monkeypatch,
+):
+    import uuid
+    from app.core.cache import get_redis
+    from app.models.question.model import Question
+    from app.modules.statistics.item_analysis import item_analysis
+    from app.modules.quiz_process.repository import get_quiz_process_repository
+    from app.modules.quiz_process.schemas import GradedAnswer, GradedSubmission
+
+    quiz = Quiz(
+        title="Item Analysis Quiz",
+        question_number=2,
+        duration=30,
+        pin="9996",
+        is_active=True,
+        user_id=test_teacher["user_id"],
+        group_id=test_group["id"],
+        subject_id=test_subject.id
+    )
+    questions = [
+        Question(
+            subject_id=test_subject.id,
+            user_id=test_teacher["user_id"],
+            text=f"Question {i}",
+            option_a=f"right {i}",
+            option_b=f"wrong b {i}",
+            option_c=f"wrong c {i}",
+            option_d=f"wrong d {i}",
+        )
+        for i in (1, 2)
+    ]
+    async_db.add_all([quiz, *questions])
+    await async_db.commit()
+    q1, q2 = questions
+
+    async def submit(answer_1: str, answer_2: str):
+        answers = [
+            GradedAnswer(question_id=q.id, answer=answer, is_correct=answer.startswith("right"))
+            for q, answer in ((q1, answer_1), (q2, answer_2))
+        ]
+        correct = sum(a.is_correct for a in answers)
+        # One transaction per attempt, as end_quiz does
+        await get_quiz_process_repository.save_submissions(async_db, [
+            GradedSubmission(
+                user_id=test_user["id"],
+                quiz_id=quiz.id,
+                subject_id=test_subject.id,
+                group_id=test_group["id"],
+                answers=answers,
+                total_questions=2,
+                correct_answers=correct,
+                wrong_answers=2 - correct,
+                grade=correct * 50,
+                attempt_id=uuid.uuid4().hex,
+            )
+        ])
+
+    await submit("right 1", "right 2")
+    await submit("right 1", "wrong b 2")
+    await submit("wrong c 1", "wrong b 2")
+
+    resp = await auth_client.get(f"/statistics/question?quiz_id={quiz.id}")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["attempts"] == 3
+    items = {item["question_id"]: item for item in data["questions"]}
+    assert items[q1.id]["p_value"] == pytest.approx(2 / 3, abs=1e-3)
+    assert items[q2.id]["p_value"] == pytest.approx(1 / 3, abs=1e-3)
+    assert items[q1.id]["discrimination"] == 1.0
+    assert items[q1.id]["point_biserial"] > 0
+    assert items[q1.id]["distractors"] == {"a": 2, "b": 0, "c": 1, "d": 0, "other": 0}
+    assert items[q2.id]["distractors"] == {"a": 1, "b": 2, "c": 0, "d": 0, "other": 0}
+
+    # Cached until the refresher picks up the new result
+    await submit("right 1", "right 2")
+    resp = await auth_client.get(f"/statistics/question?quiz_id={quiz.id}")
+    assert resp.json() == data
+
+    await item_analysis.refresh()
+    resp = await auth_client.get(f"/statistics/question?quiz_id={quiz.id}")
+    assert resp.json()["attempts"] == 4
+
+    resp = await auth_client.get(f"/statistics/question?subject_id={test_subject.id}")
+    assert resp.json()["attempts"] == 4
+
+    resp = await auth_client.get("/statistics/question")
+    assert resp.status_code == 400
+
+    # A failed refresh leaves its scopes queued for the next one
+    await submit("wrong c 1", "right 2")
+
+    async def failing_compute(*args):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(item_analysis, "compute", failing_compute)
+    with pytest.raises(RuntimeError):
+        await item_analysis.refresh()
+    assert await get_redis().sismember(item_analysis._dirty_key, f"quiz:{quiz.id}")
+
+
+@pytest.mark.asyncio
+async def test_leaderboards_follow_submissions_and_rebuild(
+    auth_client, async_db, test_user, test_subject, test_group, test_teacher
+):
+    from fastapi_cache import FastAPICache
+    from app.modules.statistics.leaderboard import leaderboard
+    from app.modules.quiz_process.repository import get_quiz_process_repository
+    from app.modules.quiz_process.schemas import GradedSubmission
+
+    quiz = Quiz(
+        title="Leaderboard Quiz",
+        question_number=5,
+        duration=30,
+        pin="9995",
+        is_active=True,
+        user_id=test_teacher["user_id"],
+        group_id=test_group["id"],
+        subject_id=test_subject.id
+    )
+    async_db.add(quiz)
+    await async_db.commit()
+
+    async def submit(user_id: int, grade: int):
+        await get_quiz_process_repository.save_submissions(async_db, [
+            GradedSubmission(
+                user_id=user_id,
+                quiz_id=quiz.id,
+                subject_id=test_subject.id,
+                group_id=test_group["id"],
+                answers=[],
+                total_questions=5,
+                correct_answers=grade // 20,
+                wrong_answers=5 - grade // 20,
+                grade=grade,
+            )
+        ])
+
+    await submit(test_user["id"], 60)
+    await submit(test_teacher["user_id"], 80)
+    # A worse retake does not lower the best grade
+    await submit(test_teacher["user_id"], 40)
+
+    resp = await auth_client.get(f"/statistics/leaderboard/quiz/{quiz.id}?limit=5")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["size"] == 2
+    assert [(e["user_id"], e["grade"]) for e in data["entries"]] == [
+        (test_teacher["user_id"], 80),
+        (test_user["id"], 60),
+    ]
+
+    resp = await auth_client.get(
+        f"/statistics/leaderboard/group/{test_group['id']}/rank/{test_user['id']}"
+    )
+    assert (resp.json()["rank"], resp.json()["size"]) == (2, 2)
+
+    # Rebuilt from results after Redis lost them
+    redis = FastAPICache.get_backend().redis
+    await redis.delete(*[key async for key in redis.scan_iter(match="*:leaderboard:*")])
+    resp = await auth_client.get(f"/statistics/leaderboard/subject/{test_subject.id}")
+    assert resp.json()["size"] == 0
+
+    counts = await leaderboard.rebuild(async_db, redis)
+    assert counts["quiz"] >= 1
+    resp = await auth_client.get(f"/statistics/leaderboard/subject/{test_subject.id}")
+    assert [e["grade"] for e in resp.json()["entries"]] == [80, 60]
+
+    resp = await auth_client.get(f"/statistics/leaderboard/quiz/{quiz.id}/rank/999999")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_trends_from_hourly_rollups(
+    auth_client, async_db, test_user, test_subject, test_group, background_session
+):
+    from datetime import datetime
+    from app.modules.statistics.trends import trend_refresher
+
+    def result(grade, created_at):
+        return Result(
+            user_id=test_user["id"],
+            subject_id=test_subject.id,
+            group_id=test_group["id"],
+            correct_answers=grade // 20,
+            wrong_answers=5 - grade // 20,
+            grade=grade,
+            created_at=created_at,
+        )
+
+    results = [
+        result(40, datetime(2026, 3, 2, 9, 15)),
+        result(80, datetime(2026, 3, 2, 9, 45)),
+        result(60, datetime(2026, 3, 2, 14, 5)),
+        result(100, datetime(2026, 3, 3, 8, 0)),
+    ]
+    async_db.add_all(results)
+    await async_db.commit()
+    await trend_refresher.refresh()
+
+    url = f"/statistics/trends/group/{test_group['id']}"
+    window = "start=2026-03-01T00:00:00&end=2026-03-05T00:00:00"
+    resp = await auth_client.get(f"{url}?bucket=day&{window}")
+    assert resp.status_code == 200
+    points = [(p["bucket"][:10], p["count"], p["average_grade"]) for p in resp.json()["points"]]
+    assert points == [("2026-03-02", 3, 60.0), ("2026-03-03", 1, 100.0)]
+
+    resp = await auth_client.get(f"{url}?bucket=hour&{window}")
+    assert [p["count"] for p in resp.json()["points"]] == [2, 1, 1]
+
+    # Deleting a result recomputes its hour right away
+    await async_db.delete(results[0])
+    await async_db.commit()
+    resp = await auth_client.get(f"{url}?bucket=hour&{window}")
+    first = resp.json()["points"][0]
+    assert (first["count"], first["average_grade"]) == (1, 80.0)
+
+    resp = await auth_client.get(f"{url}?start=2026-03-05T00:00:00&end=2026-03-01T00:00:00")
+    assert resp.status_code == 400
+
+    # Without bounds the window ends at the database's clock, like created_at
+    from sqlalchemy import func, select
+    db_now = await async_db.scalar(select(func.localtimestamp()))
+    resp = await auth_client.get(url)
+    assert resp.status_code == 200
+    end = datetime.fromisoformat(resp.json()["end"])
+    assert abs((end - db_now).total_seconds()) < 60
+
+
+@pytest.mark.asyncio
+async def test_export_faculty_statistics(
+    auth_client, async_db, test_user, test_subject, test_group, test_faculty,
+    background_session,
+):
+    import csv
+    import io
+
+    for grade in (50, 70):
+        async_db.add(Result(
+            user_id=test_user["id"],
+            subject_id=test_subject.id,
+            group_id=test_group["id"],
+            correct_answers=grade // 20,
+            wrong_answers=5 - grade // 20,
+            grade=grade
+        ))
+    await async_db.commit()
+
+    resp = await auth_client.get(
+        f"/statistics/faculty/export?faculty_id={test_faculty['id']}&format=csv"
+    )
+    assert resp.status_code == 200
+    rows = list(csv.reader(io.StringIO(resp.content.decode("utf-8-sig"))))
+    assert rows[1] == [
+        str(test_faculty["id"]), test_faculty["name"],
+        str(test_group["id"]), test_group["name"], "2", "60.0",
+    ]
+
+    resp = await auth_client.get("/statistics/faculty/export?faculty_id=999999")
+    assert resp.status_code == 404